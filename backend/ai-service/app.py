@@ -5,10 +5,14 @@ import os
 from exceptions.exceptions import AppError, ErrorCode
 
 load_dotenv()
+from utils.metrics import init_metrics, instrument_pymongo
+# Phải gọi trước khi import routes (MongoClient được tạo khi import model)
+instrument_pymongo()
 from routes.ai_routes import ai_bp
 
 app = Flask(__name__)
 CORS(app)
+init_metrics(app, 'ai-service')
 
 app.register_blueprint(ai_bp)
 
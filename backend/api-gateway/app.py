@@ -1,10 +1,21 @@
-from flask import Flask, request, jsonify, Response
+from flask import Flask, request, jsonify, Response, g
 import requests
-import re
 import logging
-from functools import wraps
 from flask_cors import CORS
+from werkzeug.exceptions import MethodNotAllowed
 import os
+import math
+from config import Config
+from services.token_verifier import RevocationSet, RevocationSyncer, LocalTokenVerifier
+from services.internal_access import InternalAccess, INTERNAL_TOKEN_HEADER
+from services.introspection_cache import IntrospectionCache
+from services.route_table import RouteTable
+from services.response_cache import ResponseCache, etag_matches
+from services.single_flight import SingleFlight
+from utils.metrics import init_metrics, REGISTRY, Gauge
+from clients.upstream_client import (
+    build_upstream_clients, filter_headers, RequestBodyStream, iter_response_body, CircuitOpenError
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -23,6 +34,9 @@ CORS(app,
          "max_age": 3600
      }})
 
+# Request metrics on GET /metrics
+init_metrics(app, 'api-gateway')
+
 # Configuration
 API_PREFIX = "/api/v1"
 PORT = 8888
@@ -34,6 +48,7 @@ SERVICES = {
     "media-service": "http://localhost:8090",
     "recipe-service": "http://localhost:8082",
     "category-service": "http://localhost:8083",
+    "tag-service": "http://localhost:8084",
     "health-service": "http://localhost:8091",
     "ai-service": "http://localhost:8092",
     # Comment / rating / favorite / follow service
@@ -50,13 +65,129 @@ PUBLIC_ENDPOINTS = [
     r"/media/download/.*"
 ]
 
+# Internal endpoints of upstream services (e.g. /auth/internal/*, /users/internal/*): never proxied, answered 404
+BLOCKED_ENDPOINTS = [
+    r"/[^/]+/internal(?:/.*)?"
+]
+
+PROXY_METHODS = ['GET', 'POST', 'PUT', 'DELETE', 'PATCH']
+
+# Route table: (rule relative to API_PREFIX, methods, service)
+# More specific rules win regardless of order (werkzeug rule sorting)
+ROUTES = [
+    # Authentication service routes
+    ('/auth/<path:subpath>', PROXY_METHODS, 'authentication-service'),
+    
+    # Comment / rating / favorite / follow routes (Comment Service)
+    ('/recipes/<recipe_id>/comments', ['GET', 'POST'], 'comment-service'),
+    ('/comments/<comment_id>', ['PUT', 'DELETE'], 'comment-service'),
+    ('/comments/liked', ['GET'], 'comment-service'),
+    ('/comments/<comment_id>/like', ['POST', 'DELETE'], 'comment-service'),
+    ('/recipes/<recipe_id>/ratings', ['GET', 'POST'], 'comment-service'),
+    ('/recipes/<recipe_id>/ratings/summary', ['GET'], 'comment-service'),
+    ('/recipes/<recipe_id>/ratings/me', ['GET', 'PUT', 'DELETE'], 'comment-service'),
+    ('/favorites', ['GET'], 'comment-service'),
+    ('/favorites/status', ['GET'], 'comment-service'),
+    ('/users/<user_id>/favorites', ['GET'], 'comment-service'),
+    ('/recipes/<recipe_id>/favorite', ['POST', 'DELETE'], 'comment-service'),
+    ('/users/<user_id>/followers', ['GET'], 'comment-service'),
+    ('/users/<user_id>/following', ['GET'], 'comment-service'),
+    ('/users/<user_id>/follow', ['POST', 'DELETE'], 'comment-service'),
+    
+    # User service routes (/users/{userId}/recipes goes to recipe service)
+    ('/users/<userId>/recipes', PROXY_METHODS, 'recipe-service'),
+    ('/users/<path:subpath>', PROXY_METHODS, 'user-service'),
+    
+    # Media service routes
+    ('/media/<path:subpath>', PROXY_METHODS, 'media-service'),
+    
+    # Recipe service routes
+    ('/recipes', PROXY_METHODS, 'recipe-service'),
+    ('/recipes/<path:subpath>', PROXY_METHODS, 'recipe-service'),
+    ('/trending/<path:subpath>', ['GET'], 'recipe-service'),
+    ('/search/recipes', ['GET'], 'recipe-service'),
+    ('/search/suggestions', ['GET'], 'recipe-service'),
+    
+    # Category service routes
+    ('/categories', PROXY_METHODS, 'category-service'),
+    ('/categories/<path:subpath>', PROXY_METHODS, 'category-service'),
+    
+    # Tag service routes
+    ('/tags', PROXY_METHODS, 'tag-service'),
+    ('/tags/<path:subpath>', PROXY_METHODS, 'tag-service'),
+    
+    # Health service routes
+    ('/health', PROXY_METHODS, 'health-service'),
+    ('/health/<path:subpath>', PROXY_METHODS, 'health-service'),
+    
+    # AI service routes
+    ('/ai', PROXY_METHODS, 'ai-service'),
+    ('/ai/<path:subpath>', PROXY_METHODS, 'ai-service'),
+]
+
+# Compiled once at startup: service, stripped path and public flag in one lookup
+route_table = RouteTable(API_PREFIX, ROUTES, PUBLIC_ENDPOINTS, BLOCKED_ENDPOINTS)
+
+# Pooled keep-alive sessions, one per upstream service
+upstream_clients = build_upstream_clients(
+    SERVICES, Config.UPSTREAM_POOLS, Config.UPSTREAM_POOL_DEFAULTS, Config.UPSTREAM_RESILIENCE
+)
+
+# Local token verification (GATEWAY_AUTH_MODE=local)
+revocation_set = RevocationSet(Config.REVOCATION_MAX_SIZE)
+local_token_verifier = LocalTokenVerifier(Config.JWT_SIGNER_KEY, revocation_set)
+if Config.AUTH_MODE == 'local':
+    RevocationSyncer(
+        SERVICES['authentication-service'],
+        revocation_set,
+        Config.REVOCATION_SYNC_INTERVAL,
+        Config.INTERNAL_API_TOKEN
+    ).start()
+
+# Only upstream services may call /internal/* (shared secret or internal network)
+internal_access = InternalAccess(Config.INTERNAL_API_TOKEN, Config.INTERNAL_NETWORKS)
+
+# Introspection verdicts keyed by token jti
+introspection_cache = IntrospectionCache(Config.INTROSPECTION_CACHE_TTL, Config.INTROSPECTION_CACHE_MAX_SIZE)
+
+# Cached responses of hot GET endpoints (Config.RESPONSE_CACHE_RULES)
+response_cache = ResponseCache(
+    API_PREFIX,
+    Config.RESPONSE_CACHE_RULES if Config.RESPONSE_CACHE_ENABLED else {},
+    Config.RESPONSE_CACHE_MAX_BYTES,
+    Config.RESPONSE_CACHE_MAX_ENTRY_BYTES
+)
+
+# Collapses identical concurrent cache misses into one upstream call
+request_coalescer = SingleFlight()
+
+
+# Upstream state exported on /metrics (refreshed on each scrape)
+CIRCUIT_STATE_VALUES = {'closed': 0, 'half_open': 1, 'open': 2}
+UPSTREAM_CIRCUIT_STATE = REGISTRY.register(Gauge(
+    'gateway_upstream_circuit_state', 'Circuit breaker state (0 closed, 1 half-open, 2 open)', ('upstream',)
+))
+UPSTREAM_READ_TIMEOUT = REGISTRY.register(Gauge(
+    'gateway_upstream_read_timeout_seconds', 'Current (adaptive) read timeout', ('upstream',)
+))
+UPSTREAM_IN_FLIGHT = REGISTRY.register(Gauge(
+    'gateway_upstream_requests_in_flight', 'Requests waiting on the upstream', ('upstream',)
+))
+
+
+def refresh_gateway_metrics():
+    for name, client in upstream_clients.items():
+        UPSTREAM_CIRCUIT_STATE.set(CIRCUIT_STATE_VALUES[client.breaker.state], upstream=name)
+        UPSTREAM_READ_TIMEOUT.set(client.current_timeout()[1], upstream=name)
+        UPSTREAM_IN_FLIGHT.set(client.in_flight, upstream=name)
+
+
+REGISTRY.add_collector(refresh_gateway_metrics)
+
 
 def is_public_endpoint(path):
     """Check if the endpoint is public"""
-    for pattern in PUBLIC_ENDPOINTS:
-        if re.match(API_PREFIX + pattern, path):
-            return True
-    return False
+    return route_table.is_public(path)
 
 
 def create_api_response(code=0, message="Success!", data=None):
@@ -76,178 +207,309 @@ def unauthenticated_response():
     return jsonify(response), 401
 
 
+def circuit_open_response(service_name):
+    """Fail-fast response while the circuit of an upstream is open"""
+    response = create_api_response(code=503, message=f"Service unavailable: {service_name} is not responding")
+    return jsonify(response), 503
+
+
 def introspect_token(token):
-    """Call identity service to validate token"""
+    """Validate token via identity service, using cached verdicts when available"""
+    cached = introspection_cache.get(token)
+    if cached is not None:
+        return cached
+    
+    valid = call_introspect(token)
+    if valid is None:
+        # Identity service unreachable - do not cache the failure
+        return False
+    introspection_cache.put(token, valid)
+    return valid
+
+
+def call_introspect(token):
+    """Call identity service to validate token, None if it could not answer"""
     try:
         url = f"{SERVICES['authentication-service']}/auth/introspect"
         payload = {"accessToken": token}
         headers = {"Content-Type": "application/json"}
         
-        response = requests.post(url, json=payload, headers=headers, timeout=5)
+        response = upstream_clients['authentication-service'].request(
+            'POST', url, json=payload, headers=headers, timeout=5
+        )
         
         if response.status_code == 200:
             data = response.json()
             return data.get("data", {}).get("valid", False)
-        return False
+        return None
     except Exception as e:
         logger.error(f"Error introspecting token: {str(e)}")
-        return False
+        return None
 
 
-def authentication_filter(f):
-    """Authentication decorator for routes"""
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        logger.info("Enter authentication filter....")
-        
-        # Check if endpoint is public
-        if is_public_endpoint(request.path):
-            return f(*args, **kwargs)
-        
-        # Get token from Authorization header
-        auth_header = request.headers.get('Authorization')
-        if not auth_header:
-            return unauthenticated_response()
-        
-        # Extract token
-        token = auth_header.replace("Bearer ", "")
-        
-        # Validate token
-        if introspect_token(token):
-            return f(*args, **kwargs)
-        else:
-            return unauthenticated_response()
-    
-    return decorated_function
+def validate_token(token):
+    """Validate token locally when possible, otherwise via identity service"""
+    if Config.AUTH_MODE == 'local':
+        if revocation_set.is_fresh(Config.REVOCATION_MAX_STALENESS):
+            return local_token_verifier.verify(token)
+        logger.warning("Revocation set is stale, falling back to introspection")
+    return introspect_token(token)
 
 
-def proxy_request(service_url, path, strip_prefix_count=2):
-    """Proxy request to target service"""
-    # Strip prefix from path
-    path_parts = path.split('/')
-    # Remove empty strings and first 'strip_prefix_count' parts
-    filtered_parts = [p for p in path_parts if p]
-    if len(filtered_parts) >= strip_prefix_count:
-        target_path = '/' + '/'.join(filtered_parts[strip_prefix_count:])
-    else:
-        target_path = '/'
+def is_authenticated():
+    """Authentication filter: check the bearer token of the current request"""
+    logger.info("Enter authentication filter....")
+    
+    # Get token from Authorization header
+    auth_header = request.headers.get('Authorization')
+    if not auth_header:
+        return False
     
-    # Build target URL
-    target_url = f"{service_url}{target_path}"
+    # Extract token
+    token = auth_header.replace("Bearer ", "")
     
-    # Add query parameters if present
+    # Validate token
+    return validate_token(token)
+
+
+def build_target_url(upstream, target_path):
+    """Upstream URL for the current request, query parameters included"""
+    target_url = f"{upstream.base_url}{target_path}"
     if request.query_string:
         target_url += f"?{request.query_string.decode('utf-8')}"
+    return target_url
+
+
+def proxy_request(service_name, target_path):
+    """Proxy request to target service"""
+    upstream = upstream_clients[service_name]
+    target_url = build_target_url(upstream, target_path)
     
-    # Prepare headers (exclude host header)
-    headers = {key: value for key, value in request.headers if key.lower() != 'host'}
+    # Prepare headers (exclude host and hop-by-hop headers)
+    headers = filter_headers(request.headers, excluded=('host',))
     
     try:
-        # Forward request to target service
-        if request.method == 'GET':
-            response = requests.get(target_url, headers=headers, timeout=30)
-        elif request.method == 'POST':
-            response = requests.post(target_url, headers=headers, data=request.get_data(), timeout=30)
-        elif request.method == 'PUT':
-            response = requests.put(target_url, headers=headers, data=request.get_data(), timeout=30)
-        elif request.method == 'DELETE':
-            response = requests.delete(target_url, headers=headers, timeout=30)
-        elif request.method == 'PATCH':
-            response = requests.patch(target_url, headers=headers, data=request.get_data(), timeout=30)
+        if Config.PROXY_STREAMING:
+            return stream_upstream(upstream, target_url, headers)
+        
+        # Forward request to target service over the pooled session
+        if request.method in ('POST', 'PUT', 'PATCH'):
+            response = upstream.request(request.method, target_url, headers=headers, data=request.get_data())
         else:
-            return jsonify(create_api_response(code=405, message="Method not allowed")), 405
+            response = upstream.request(request.method, target_url, headers=headers)
         
-        # Return response
+        # Return response (body is already decoded by requests)
         return Response(
             response.content,
             status=response.status_code,
-            headers=dict(response.headers)
+            headers=filter_headers(response.headers, excluded=('content-encoding', 'content-length'))
         )
+    except CircuitOpenError:
+        return circuit_open_response(service_name)
     except requests.exceptions.RequestException as e:
         logger.error(f"Error proxying request to {target_url}: {str(e)}")
         return jsonify(create_api_response(code=500, message=f"Service unavailable: {str(e)}")), 500
 
 
-# Authentication service routes
-@app.route(f'{API_PREFIX}/auth/<path:subpath>', methods=['GET', 'POST', 'PUT', 'DELETE', 'PATCH'])
-@authentication_filter
-def authentication_service(subpath):
-    """Route requests to authentication service"""
-    return proxy_request(SERVICES['authentication-service'], request.path, strip_prefix_count=2)
-
-
-# Comment / rating / favorite / follow routes (Comment Service)
-@app.route(f'{API_PREFIX}/recipes/<recipe_id>/comments', methods=['GET', 'POST'])
-@app.route(f'{API_PREFIX}/comments/<comment_id>', methods=['PUT', 'DELETE'])
-@app.route(f'{API_PREFIX}/comments/<comment_id>/like', methods=['POST', 'DELETE'])
-@app.route(f'{API_PREFIX}/recipes/<recipe_id>/ratings', methods=['GET', 'POST'])
-@app.route(f'{API_PREFIX}/recipes/<recipe_id>/ratings/me', methods=['GET', 'PUT', 'DELETE'])
-@app.route(f'{API_PREFIX}/favorites', methods=['GET'])
-@app.route(f'{API_PREFIX}/recipes/<recipe_id>/favorite', methods=['POST', 'DELETE'])
-@app.route(f'{API_PREFIX}/users/<user_id>/followers', methods=['GET'])
-@app.route(f'{API_PREFIX}/users/<user_id>/following', methods=['GET'])
-@app.route(f'{API_PREFIX}/users/<user_id>/follow', methods=['POST', 'DELETE'])
-@authentication_filter
-def comment_service_handler(recipe_id=None, comment_id=None, user_id=None):
-    """Route comment/rating/favorite/follow-related requests to comment service"""
-    return proxy_request(SERVICES['comment-service'], request.path, strip_prefix_count=2)
-
-# User service routes (other user-related APIs)
-@app.route(f'{API_PREFIX}/users/<userId>/recipes', methods=['GET', 'POST', 'PUT', 'DELETE', 'PATCH'])
-@authentication_filter
-def user_recipes_service(userId):
-    """Route /users/{userId}/recipes to recipe service"""
-    return proxy_request(SERVICES['recipe-service'], request.path, strip_prefix_count=2)
-
-@app.route(f'{API_PREFIX}/users/<path:subpath>', methods=['GET', 'POST', 'PUT', 'DELETE', 'PATCH'])
-@authentication_filter
-def user_service(subpath):
-    """Route other /users/* requests to user service"""
-    return proxy_request(SERVICES['user-service'], request.path, strip_prefix_count=2)
-
-
-# Media service routes
-@app.route(f'{API_PREFIX}/media/<path:subpath>', methods=['GET', 'POST', 'PUT', 'DELETE', 'PATCH'])
-@authentication_filter
-def media_service(subpath):
-    """Route requests to media service"""
-    return proxy_request(SERVICES['media-service'], request.path, strip_prefix_count=2)
-
-
-# Recipe service routes
-@app.route(f'{API_PREFIX}/recipes', methods=['GET', 'POST', 'PUT', 'DELETE', 'PATCH'], strict_slashes=False)
-@app.route(f'{API_PREFIX}/recipes/<path:subpath>', methods=['GET', 'POST', 'PUT', 'DELETE', 'PATCH'])
-@authentication_filter
-def recipe_service_handler(subpath=''):
-    """Route requests to recipe service"""
-    return proxy_request(SERVICES['recipe-service'], request.path, strip_prefix_count=2)
-
-
-# Category service routes
-@app.route(f'{API_PREFIX}/categories', methods=['GET', 'POST', 'PUT', 'DELETE', 'PATCH'], strict_slashes=False)
-@app.route(f'{API_PREFIX}/categories/<path:subpath>', methods=['GET', 'POST', 'PUT', 'DELETE', 'PATCH'])
-@authentication_filter
-def category_service_handler(subpath=''):
-    """Route requests to category service"""
-    return proxy_request(SERVICES['category-service'], request.path, strip_prefix_count=2)
-
-
-# Health service routes
-@app.route(f'{API_PREFIX}/health', methods=['GET', 'POST', 'PUT', 'DELETE', 'PATCH'], strict_slashes=False)
-@app.route(f'{API_PREFIX}/health/<path:subpath>', methods=['GET', 'POST', 'PUT', 'DELETE', 'PATCH'])
-@authentication_filter
-def health_service_handler(subpath=''):
-    """Route requests to health service"""
-    return proxy_request(SERVICES['health-service'], request.path, strip_prefix_count=2)
-
-
-# AI service routes
-@app.route(f'{API_PREFIX}/ai', methods=['GET', 'POST', 'PUT', 'DELETE', 'PATCH'], strict_slashes=False)
-@app.route(f'{API_PREFIX}/ai/<path:subpath>', methods=['GET', 'POST', 'PUT', 'DELETE', 'PATCH'])
-@authentication_filter
-def ai_service_handler(subpath=''):
-    """Route requests to AI service"""
-    return proxy_request(SERVICES['ai-service'], request.path, strip_prefix_count=2)
+def stream_upstream(upstream, target_url, headers):
+    """Forward request and response bodies in chunks without buffering them in memory"""
+    body = None
+    if request.method in ('POST', 'PUT', 'PATCH'):
+        if request.content_length is not None:
+            body = RequestBodyStream(request.stream, request.content_length)
+        else:
+            # Chunked upload from client: let requests re-chunk it
+            headers.pop('Content-Length', None)
+            body = iter(lambda: request.stream.read(Config.PROXY_CHUNK_SIZE), b'')
+    
+    response = upstream.request(request.method, target_url, headers=headers, data=body, stream=True)
+    
+    return Response(
+        iter_response_body(response, Config.PROXY_CHUNK_SIZE),
+        status=response.status_code,
+        headers=filter_headers(response.headers),
+        direct_passthrough=True
+    )
+
+
+def fetch_cacheable(service_name, target_path, key, ttl):
+    """
+    GET a cacheable response from the upstream and store it
+    Returns (entry, None) when stored, (None, (status, headers, body)) when the upstream marked it uncacheable
+    """
+    upstream = upstream_clients[service_name]
+    target_url = build_target_url(upstream, target_path)
+    # Conditional headers are answered by the gateway, the upstream must return the full body
+    headers = filter_headers(request.headers, excluded=('host', 'if-none-match', 'if-modified-since'))
+    response = upstream.request('GET', target_url, headers=headers)
+    
+    if not response_cache.is_storable(response.status_code, response.headers):
+        uncached_headers = filter_headers(response.headers, excluded=('content-encoding', 'content-length'))
+        return None, (response.status_code, uncached_headers, response.content)
+    return response_cache.put(key, response.status_code, filter_headers(response.headers), response.content, ttl), None
+
+
+def cached_proxy_request(service_name, target_path, ttl):
+    """Serve a cacheable GET from the response cache, fetching and storing it on a miss"""
+    key = response_cache.make_key(request.path, request.query_string.decode('utf-8'))
+    entry = response_cache.get(key)
+    cache_status = 'HIT'
+    
+    if entry is None:
+        cache_status = 'MISS'
+        fetched = []
+        
+        def fetch():
+            fetched.append(True)
+            return fetch_cacheable(service_name, target_path, key, ttl)
+        
+        try:
+            # Identical concurrent misses share one upstream call
+            entry, uncached = request_coalescer.do(key, fetch) if Config.REQUEST_COALESCING else fetch()
+            if entry is None and not fetched:
+                # The shared response was not storable (error, private, no-store): it answers the request that
+                # fetched it only, other waiters fetch with their own headers
+                entry, uncached = fetch()
+        except CircuitOpenError:
+            return circuit_open_response(service_name)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error proxying request to {request.path}: {str(e)}")
+            return jsonify(create_api_response(code=500, message=f"Service unavailable: {str(e)}")), 500
+        
+        if entry is None:
+            status, headers, body = uncached
+            return Response(body, status=status, headers=headers)
+    
+    headers = {**entry.response_headers(), 'X-Cache': cache_status}
+    if etag_matches(request.headers.get('If-None-Match'), entry.etag):
+        response_cache.record_not_modified()
+        return Response(status=304, headers={k: headers[k] for k in ('ETag', 'Cache-Control', 'X-Cache')})
+    return Response(entry.body, status=entry.status, headers=headers)
+
+
+# All proxied routes, dispatched through ROUTES
+@app.route(API_PREFIX, methods=PROXY_METHODS)
+@app.route(f'{API_PREFIX}/<path:subpath>', methods=PROXY_METHODS)
+def gateway_route(subpath=''):
+    """Route requests to the service resolved by the route table"""
+    try:
+        match = route_table.resolve(request.path, request.method)
+    except MethodNotAllowed:
+        return jsonify(create_api_response(code=405, message="Method not allowed")), 405
+    
+    if match is None:
+        return jsonify(create_api_response(code=404, message="Not found")), 404
+    
+    # Label metrics with the ROUTES rule instead of the catch-all view
+    g.metrics_route = API_PREFIX + match.rule
+    
+    if not match.is_public and not is_authenticated():
+        return unauthenticated_response()
+    
+    if request.method == 'GET':
+        ttl = response_cache.ttl_for(request.path)
+        if ttl:
+            return cached_proxy_request(match.service, match.target_path, ttl)
+    
+    return proxy_request(match.service, match.target_path)
+
+
+# Internal endpoints (not proxied)
+MAX_TOKEN_ID_LENGTH = 255
+
+
+def is_internal_path(path):
+    return path.startswith('/internal/')
+
+
+@app.before_request
+def guard_internal_endpoints():
+    """Reject /internal/* requests that come neither with the shared secret nor from the internal network"""
+    if is_internal_path(request.path) and not internal_access.allows(
+            request.remote_addr, request.headers.get(INTERNAL_TOKEN_HEADER)):
+        return jsonify(create_api_response(code=403, message="Forbidden")), 403
+
+
+def revoke_token(data):
+    """Drop cached verdict and record revocation of a token, False if data is invalid"""
+    if not isinstance(data, dict):
+        return False
+    token_id = data.get('id')
+    expiry_time = data.get('expiryTime')
+    if not isinstance(token_id, str) or not token_id or len(token_id) > MAX_TOKEN_ID_LENGTH:
+        return False
+    if expiry_time is not None and (
+            isinstance(expiry_time, bool) or not isinstance(expiry_time, (int, float)) or not math.isfinite(expiry_time)):
+        return False
+    
+    introspection_cache.invalidate(token_id)
+    if expiry_time:
+        revocation_set.add(token_id, float(expiry_time))
+    return True
+
+
+def purge_response_cache(data):
+    """Drop cached responses listed by an upstream, None if data is invalid"""
+    if not isinstance(data, dict):
+        return None
+    if data.get('all') is True:
+        return response_cache.clear()
+    
+    paths = data.get('paths') or []
+    prefixes = data.get('prefixes') or []
+    if not isinstance(paths, list) or not isinstance(prefixes, list) or not (paths or prefixes):
+        return None
+    if not all(isinstance(path, str) and path.startswith('/') for path in paths + prefixes):
+        return None
+    return response_cache.purge(paths, prefixes)
+
+
+def collect_upstream_metrics():
+    """Circuit breaker state, timeouts and latency histograms per upstream"""
+    return {name: client.metrics() for name, client in upstream_clients.items()}
+
+
+def collect_stats():
+    """Runtime statistics of the gateway"""
+    return {
+        "authMode": Config.AUTH_MODE,
+        "introspectionCache": introspection_cache.stats(),
+        "responseCache": response_cache.stats(),
+        "singleFlight": request_coalescer.stats(),
+        "upstreamPools": {name: client.stats() for name, client in upstream_clients.items()},
+        "revokedTokens": len(revocation_set),
+        "revocationEvictions": revocation_set.evictions,
+        "internalRequestsDenied": internal_access.denied
+    }
+
+
+@app.route('/internal/tokens/revoked', methods=['POST'])
+def token_revoked():
+    """Called by authentication-service when a token is invalidated (logout)"""
+    if not revoke_token(request.get_json(silent=True) or {}):
+        return jsonify(create_api_response(code=400, message="Invalid token id or expiryTime")), 400
+    return jsonify(create_api_response()), 200
+
+
+@app.route('/internal/cache/purge', methods=['POST'])
+def cache_purge():
+    """Called by upstream services when cached data changes"""
+    purged = purge_response_cache(request.get_json(silent=True) or {})
+    if purged is None:
+        return jsonify(create_api_response(code=400, message="Missing paths or prefixes")), 400
+    return jsonify(create_api_response(data={"purged": purged})), 200
+
+
+@app.route('/internal/metrics', methods=['GET'])
+def gateway_metrics():
+    """Circuit breaker state, timeouts and latency histograms per upstream"""
+    return jsonify(create_api_response(data=collect_upstream_metrics())), 200
+
+
+@app.route('/internal/stats', methods=['GET'])
+def gateway_stats():
+    """Runtime statistics of the gateway"""
+    return jsonify(create_api_response(data=collect_stats())), 200
 
 
 # Health check endpoint
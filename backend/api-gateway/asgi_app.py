@@ -0,0 +1,376 @@
+"""
+Async (ASGI) engine for the API Gateway
+
+Same route table (ROUTES), PUBLIC_ENDPOINTS and response envelope as app.py, but upstream calls
+are made with a non-blocking HTTP client (aiohttp), so a slow upstream does not hold a worker.
+
+Run:
+    uvicorn asgi_app:app --host 0.0.0.0 --port 8888
+"""
+import aiohttp
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from starlette.applications import Starlette
+from starlette.background import BackgroundTask
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+from werkzeug.exceptions import MethodNotAllowed
+
+from config import Config
+from clients.upstream_client import filter_headers, CircuitOpenError, FAILURE_STATUSES
+from services.internal_access import INTERNAL_TOKEN_HEADER
+from services.response_cache import etag_matches
+from services.single_flight import AsyncSingleFlight
+from utils.metrics import REGISTRY, HTTP_REQUESTS, HTTP_LATENCY, HTTP_IN_FLIGHT
+import app as gateway
+
+logger = logging.getLogger(__name__)
+
+PROXY_METHODS = gateway.PROXY_METHODS
+
+
+def client_timeout(connect_timeout, read_timeout) -> aiohttp.ClientTimeout:
+    """
+    aiohttp timeout of an upstream call
+    `connect` bounds waiting for a free pooled connection (ASYNC_POOL_TIMEOUT) plus opening it
+    """
+    return aiohttp.ClientTimeout(
+        connect=Config.ASYNC_POOL_TIMEOUT + connect_timeout, sock_connect=connect_timeout, sock_read=read_timeout
+    )
+
+
+def build_async_clients() -> dict:
+    """One pooled aiohttp session per upstream, with the same timeouts as the sync engine"""
+    clients = {}
+    for name, upstream in gateway.upstream_clients.items():
+        connect_timeout, read_timeout = upstream.timeout
+        clients[name] = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=Config.ASYNC_MAX_CONNECTIONS),
+            timeout=client_timeout(connect_timeout, read_timeout),
+            # Pass bodies through untouched, like the sync streaming mode
+            auto_decompress=False
+        )
+    return clients
+
+
+# Created on startup: sessions must be bound to the running event loop
+async_clients = {}
+
+# Collapses identical concurrent cache misses into one upstream call
+request_coalescer = AsyncSingleFlight()
+
+
+class MetricsMiddleware:
+    """ASGI counterpart of utils.metrics.init_metrics (same metric names, service label api-gateway)"""
+
+    def __init__(self, app, paths=()):
+        self.app = app
+        # Fixed (non-proxied) paths are labelled as-is, anything else not routed as 'unmatched'
+        self.paths = set(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['path'] == '/metrics':
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = {'code': 500}
+        state = scope.setdefault('state', {})
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                status['code'] = message['status']
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc(service='api-gateway')
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec(service='api-gateway')
+            labels = dict(
+                service='api-gateway', method=scope['method'],
+                route=state.get('metrics_route', scope['path'] if scope['path'] in self.paths else 'unmatched'),
+                status=str(status['code'])
+            )
+            HTTP_REQUESTS.inc(**labels)
+            HTTP_LATENCY.observe(time.perf_counter() - started, **labels)
+
+
+def api_response(code=0, message="Success!", data=None, status=200):
+    return JSONResponse(gateway.create_api_response(code=code, message=message, data=data), status_code=status)
+
+
+def circuit_open_response(service_name):
+    return api_response(code=503, message=f"Service unavailable: {service_name} is not responding", status=503)
+
+
+async def upstream_request(service_name, method, url, timeout=None, **kwargs) -> aiohttp.ClientResponse:
+    """
+    Send a request through the pooled session of a service, guarded by its circuit breaker
+    Uses the same breaker, adaptive timeout, latency histogram and in-flight counter as the sync engine.
+    The caller must release the response.
+    """
+    upstream = gateway.upstream_clients[service_name]
+    upstream.admit()
+    if timeout is None:
+        connect_timeout, read_timeout = upstream.current_timeout()
+        timeout = client_timeout(connect_timeout, read_timeout)
+
+    with upstream._lock:
+        upstream.in_flight += 1
+        upstream.total_requests += 1
+    started = time.monotonic()
+    failed = True
+    try:
+        response = await async_clients[service_name].request(method, url, timeout=timeout, **kwargs)
+        failed = response.status in FAILURE_STATUSES
+        return response
+    finally:
+        upstream.record_result(time.monotonic() - started, failed)
+        with upstream._lock:
+            upstream.in_flight -= 1
+
+
+async def call_introspect_async(token):
+    """Call identity service to validate token, None if it could not answer"""
+    url = f"{gateway.SERVICES['authentication-service']}/auth/introspect"
+    try:
+        response = await upstream_request(
+            'authentication-service', 'POST', url, json={"accessToken": token}, timeout=aiohttp.ClientTimeout(total=5)
+        )
+        async with response:
+            if response.status == 200:
+                data = await response.json()
+                return data.get("data", {}).get("valid", False)
+            return None
+    except Exception as e:
+        logger.error(f"Error introspecting token: {str(e)}")
+        return None
+
+
+async def validate_token_async(token):
+    """Async counterpart of app.validate_token"""
+    if Config.AUTH_MODE == 'local':
+        if gateway.revocation_set.is_fresh(Config.REVOCATION_MAX_STALENESS):
+            return gateway.local_token_verifier.verify(token)
+        logger.warning("Revocation set is stale, falling back to introspection")
+
+    cached = gateway.introspection_cache.get(token)
+    if cached is not None:
+        return cached
+
+    valid = await call_introspect_async(token)
+    if valid is None:
+        return False
+    gateway.introspection_cache.put(token, valid)
+    return valid
+
+
+def build_target_url(match, request: Request):
+    target_url = f"{gateway.SERVICES[match.service]}{match.target_path}"
+    if request.url.query:
+        target_url += f"?{request.url.query}"
+    return target_url
+
+
+async def fetch_cacheable(request: Request, match, key, ttl):
+    """Async counterpart of app.fetch_cacheable"""
+    cache = gateway.response_cache
+    target_url = build_target_url(match, request)
+    headers = filter_headers(
+        request.headers, excluded=('host', 'if-none-match', 'if-modified-since', 'accept-encoding')
+    )
+    # The cached body is served to every client, whatever Accept-Encoding they send
+    headers['Accept-Encoding'] = 'identity'
+    response = await upstream_request(
+        match.service, 'GET', target_url, headers=headers, allow_redirects=False, skip_auto_headers=('User-Agent',)
+    )
+    async with response:
+        body = await response.read()
+
+    response_headers = filter_headers(response.headers, excluded=('content-encoding', 'content-length'))
+    if not cache.is_storable(response.status, response.headers):
+        return None, (response.status, response_headers, body)
+    return cache.put(key, response.status, response_headers, body, ttl), None
+
+
+async def cached_proxy(request: Request, match, ttl):
+    """Async counterpart of app.cached_proxy_request"""
+    cache = gateway.response_cache
+    key = cache.make_key(request.url.path, request.url.query)
+    entry = cache.get(key)
+    cache_status = 'HIT'
+
+    if entry is None:
+        cache_status = 'MISS'
+        fetched = []
+
+        def fetch():
+            fetched.append(True)
+            return fetch_cacheable(request, match, key, ttl)
+
+        try:
+            entry, uncached = await (request_coalescer.do(key, fetch) if Config.REQUEST_COALESCING else fetch())
+            if entry is None and not fetched:
+                # Not storable: only the request that fetched it may see it (see app.cached_proxy_request)
+                entry, uncached = await fetch()
+        except CircuitOpenError:
+            return circuit_open_response(match.service)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Error proxying request to {request.url.path}: {str(e)}")
+            return api_response(code=500, message=f"Service unavailable: {str(e)}", status=500)
+
+        if entry is None:
+            status, headers, body = uncached
+            return Response(body, status_code=status, headers=headers)
+
+    headers = {**entry.response_headers(), 'X-Cache': cache_status}
+    if etag_matches(request.headers.get('If-None-Match'), entry.etag):
+        cache.record_not_modified()
+        return Response(status_code=304, headers={k: headers[k] for k in ('ETag', 'Cache-Control', 'X-Cache')})
+    return Response(entry.body, status_code=entry.status, headers=headers)
+
+
+async def proxy(request: Request):
+    """Resolve route, authenticate and stream the request to the upstream service"""
+    try:
+        match = gateway.route_table.resolve(request.url.path, request.method)
+    except MethodNotAllowed:
+        return api_response(code=405, message="Method not allowed", status=405)
+
+    if match is None:
+        return api_response(code=404, message="Not found", status=404)
+
+    request.state.metrics_route = gateway.API_PREFIX + match.rule
+
+    # Authentication filter
+    if not match.is_public:
+        auth_header = request.headers.get('Authorization')
+        if not auth_header:
+            return api_response(code=1401, message="Unauthenticated", status=401)
+        if not await validate_token_async(auth_header.replace("Bearer ", "")):
+            return api_response(code=1401, message="Unauthenticated", status=401)
+
+    if request.method == 'GET':
+        ttl = gateway.response_cache.ttl_for(request.url.path)
+        if ttl:
+            return await cached_proxy(request, match, ttl)
+
+    target_url = build_target_url(match, request)
+    headers = filter_headers(request.headers, excluded=('host',))
+    body = request.stream() if request.method in ('POST', 'PUT', 'PATCH') else None
+
+    try:
+        response = await upstream_request(
+            match.service, request.method, target_url, headers=headers, data=body,
+            allow_redirects=False, skip_auto_headers=('User-Agent', 'Accept-Encoding', 'Content-Type')
+        )
+    except CircuitOpenError:
+        return circuit_open_response(match.service)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.error(f"Error proxying request to {target_url}: {str(e)}")
+        return api_response(code=500, message=f"Service unavailable: {str(e)}", status=500)
+
+    return StreamingResponse(
+        response.content.iter_chunked(Config.PROXY_CHUNK_SIZE),
+        status_code=response.status,
+        headers=filter_headers(response.headers),
+        background=BackgroundTask(response.release)
+    )
+
+
+def internal_only(handler):
+    """Same guard as app.guard_internal_endpoints: shared secret or internal network"""
+    async def guarded(request: Request):
+        remote_addr = request.client.host if request.client else None
+        if not gateway.internal_access.allows(remote_addr, request.headers.get(INTERNAL_TOKEN_HEADER)):
+            return api_response(code=403, message="Forbidden", status=403)
+        return await handler(request)
+    return guarded
+
+
+async def token_revoked(request: Request):
+    """Called by authentication-service when a token is invalidated (logout)"""
+    try:
+        data = await request.json()
+    except ValueError:
+        data = {}
+    if not gateway.revoke_token(data or {}):
+        return api_response(code=400, message="Invalid token id or expiryTime", status=400)
+    return api_response()
+
+
+async def cache_purge(request: Request):
+    """Called by upstream services when cached data changes"""
+    try:
+        data = await request.json()
+    except ValueError:
+        data = {}
+    purged = gateway.purge_response_cache(data or {})
+    if purged is None:
+        return api_response(code=400, message="Missing paths or prefixes", status=400)
+    return api_response(data={"purged": purged})
+
+
+async def gateway_metrics(request: Request):
+    return api_response(data=gateway.collect_upstream_metrics())
+
+
+async def gateway_stats(request: Request):
+    return api_response(data={**gateway.collect_stats(), "singleFlight": request_coalescer.stats()})
+
+
+async def metrics(request: Request):
+    return PlainTextResponse(REGISTRY.render(), media_type='text/plain; version=0.0.4')
+
+
+async def health_check(request: Request):
+    return api_response(message="API Gateway is running")
+
+
+@asynccontextmanager
+async def lifespan(app):
+    async_clients.update(build_async_clients())
+    yield
+    for client in async_clients.values():
+        await client.close()
+
+
+INTERNAL_ROUTES = [
+    Route('/health', health_check, methods=['GET']),
+    Route('/metrics', metrics, methods=['GET']),
+    Route('/internal/tokens/revoked', internal_only(token_revoked), methods=['POST']),
+    Route('/internal/cache/purge', internal_only(cache_purge), methods=['POST']),
+    Route('/internal/metrics', internal_only(gateway_metrics), methods=['GET']),
+    Route('/internal/stats', internal_only(gateway_stats), methods=['GET']),
+]
+
+app = Starlette(
+    routes=INTERNAL_ROUTES + [
+        Route('/{path:path}', proxy, methods=PROXY_METHODS),
+    ],
+    middleware=[
+        Middleware(MetricsMiddleware, paths=[route.path for route in INTERNAL_ROUTES]),
+        Middleware(
+            CORSMiddleware,
+            allow_origins=["*"],
+            allow_methods=PROXY_METHODS + ["OPTIONS"],
+            allow_headers=["Content-Type", "Authorization", "Accept", "Origin", "X-Requested-With"],
+            expose_headers=["Content-Type", "Authorization"],
+            allow_credentials=True,
+            max_age=3600
+        )
+    ],
+    lifespan=lifespan
+)
+
+
+if __name__ == '__main__':
+    import uvicorn
+    logger.info(f"Starting async API Gateway on port {gateway.PORT}")
+    uvicorn.run(app, host='0.0.0.0', port=gateway.PORT)
@@ -0,0 +1,145 @@
+"""
+Load benchmark: sync Flask gateway (app.py) vs async gateway (asgi_app.py)
+
+Starts a fake upstream on the media-service port that answers after --delay ms,
+runs each engine in its own process and fires --requests requests with
+--concurrency of them in flight against the public /api/v1/media/download/* route.
+
+Run (from the api-gateway folder, with media-service stopped):
+    python bench_engines.py --requests 2000 --concurrency 200 --delay 200
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+import aiohttp
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+UPSTREAM_PORT = 8090  # media-service port in SERVICES
+BENCH_PATH = "/api/v1/media/download/bench.png"
+
+
+async def fake_upstream(scope, receive, send):
+    """Minimal ASGI upstream: sleep, then return a small body"""
+    if scope['type'] != 'http':
+        return
+    delay = float(os.getenv('BENCH_UPSTREAM_DELAY_MS', '0')) / 1000
+    if delay:
+        await asyncio.sleep(delay)
+    body = b'{"ok": true}'
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def start_process(args, env=None):
+    return subprocess.Popen(
+        args, cwd=HERE, env={**os.environ, **(env or {})},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+def wait_until_up(url, timeout=20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=5)
+            return
+        except urllib.error.HTTPError:
+            return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not start")
+
+
+async def run_load(base_url, total, concurrency):
+    latencies = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=60)) as client:
+        async def one():
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    async with client.get(base_url + BENCH_PATH) as response:
+                        await response.read()
+                        if response.status != 200:
+                            errors += 1
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "rps": total / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p95": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "p99": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "errors": errors
+    }
+
+
+def bench_engine(name, command, port, args):
+    process = start_process(command)
+    try:
+        wait_until_up(f"http://127.0.0.1:{port}/health")
+        # Warm up connection pools
+        asyncio.run(run_load(f"http://127.0.0.1:{port}", min(100, args.requests), min(20, args.concurrency)))
+        result = asyncio.run(run_load(f"http://127.0.0.1:{port}", args.requests, args.concurrency))
+    finally:
+        process.terminate()
+        process.wait()
+    print(f"{name:<6} {result['rps']:>9.1f} {result['p50']:>9.1f} {result['p95']:>9.1f} "
+          f"{result['p99']:>9.1f} {result['errors']:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--delay', type=float, default=200, help="upstream latency in ms")
+    parser.add_argument('--sync-port', type=int, default=8898)
+    parser.add_argument('--async-port', type=int, default=8899)
+    args = parser.parse_args()
+
+    upstream = start_process(
+        [sys.executable, '-m', 'uvicorn', 'bench_engines:fake_upstream',
+         '--host', '127.0.0.1', '--port', str(UPSTREAM_PORT), '--lifespan', 'off', '--log-level', 'warning'],
+        env={'BENCH_UPSTREAM_DELAY_MS': str(args.delay)}
+    )
+    try:
+        wait_until_up(f"http://127.0.0.1:{UPSTREAM_PORT}/")
+        print(f"{args.requests} requests, concurrency {args.concurrency}, upstream delay {args.delay:.0f} ms")
+        print(f"{'engine':<6} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+        bench_engine('sync', [
+            sys.executable, '-c',
+            f"from app import app; app.run(host='127.0.0.1', port={args.sync_port}, threaded=True)"
+        ], args.sync_port, args)
+        bench_engine('async', [
+            sys.executable, '-m', 'uvicorn', 'asgi_app:app',
+            '--host', '127.0.0.1', '--port', str(args.async_port), '--log-level', 'warning'
+        ], args.async_port, args)
+    finally:
+        upstream.terminate()
+        upstream.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Micro-benchmark of per-request routing overhead
+
+legacy: werkzeug match + re.match over PUBLIC_ENDPOINTS + split/join prefix stripping
+        (what the per-route Flask views did before the route table)
+table:  RouteTable.resolve - one call for service, stripped path and public flag
+
+Run:
+    python bench_routing.py --iterations 200000
+"""
+import argparse
+import re
+import timeit
+
+from app import API_PREFIX, PUBLIC_ENDPOINTS, ROUTES, route_table
+from werkzeug.routing import Map, Rule
+
+SAMPLE_REQUESTS = [
+    ('/api/v1/auth/login', 'POST'),
+    ('/api/v1/recipes', 'GET'),
+    ('/api/v1/recipes/6650f1e2a1b2c3d4e5f60718', 'GET'),
+    ('/api/v1/recipes/6650f1e2a1b2c3d4e5f60718/comments', 'GET'),
+    ('/api/v1/users/u-123/recipes', 'GET'),
+    ('/api/v1/users/u-123/followers', 'GET'),
+    ('/api/v1/media/download/9963eeb2-e8fd-4aef-9585-3f605adc0e7f.png', 'GET'),
+    ('/api/v1/categories', 'GET'),
+    ('/api/v1/health/medical-records', 'POST'),
+    ('/api/v1/ai/recommendations', 'GET'),
+]
+
+legacy_adapter = Map(
+    [Rule(API_PREFIX + rule, methods=methods, endpoint=service) for rule, methods, service in ROUTES],
+    strict_slashes=False
+).bind('localhost')
+
+
+def legacy_is_public_endpoint(path):
+    for pattern in PUBLIC_ENDPOINTS:
+        if re.match(API_PREFIX + pattern, path):
+            return True
+    return False
+
+
+def legacy_strip(path, strip_prefix_count=2):
+    filtered_parts = [p for p in path.split('/') if p]
+    if len(filtered_parts) >= strip_prefix_count:
+        return '/' + '/'.join(filtered_parts[strip_prefix_count:])
+    return '/'
+
+
+def legacy_resolve(path, method):
+    service, _ = legacy_adapter.match(path, method=method)
+    return service, legacy_strip(path), legacy_is_public_endpoint(path)
+
+
+def run_legacy():
+    for path, method in SAMPLE_REQUESTS:
+        legacy_resolve(path, method)
+
+
+def run_table():
+    for path, method in SAMPLE_REQUESTS:
+        route_table.resolve(path, method)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iterations', type=int, default=200000, help="number of routed requests")
+    args = parser.parse_args()
+
+    # Sanity check: both resolve the same way
+    for path, method in SAMPLE_REQUESTS:
+        match = route_table.resolve(path, method)
+        assert legacy_resolve(path, method) == (match.service, match.target_path, match.is_public), path
+
+    loops = max(1, args.iterations // len(SAMPLE_REQUESTS))
+    for name, fn in (('legacy', run_legacy), ('table', run_table)):
+        best = min(timeit.repeat(fn, number=loops, repeat=5))
+        per_request_us = best / (loops * len(SAMPLE_REQUESTS)) * 1e6
+        print(f"{name:<7} {per_request_us:8.2f} us/request")
+
+
+if __name__ == '__main__':
+    main()
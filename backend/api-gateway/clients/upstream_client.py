@@ -0,0 +1,211 @@
+import time
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+import logging
+from services.circuit_breaker import CircuitBreaker
+from services.latency_histogram import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+# Headers that apply to a single connection and must not be forwarded (RFC 7230 section 6.1)
+HOP_BY_HOP_HEADERS = {
+    'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization',
+    'te', 'trailer', 'trailers', 'transfer-encoding', 'upgrade'
+}
+
+
+# Upstream statuses that count as a failure for the circuit breaker (gateway/overload errors)
+FAILURE_STATUSES = {502, 503, 504}
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised without contacting the upstream while its circuit is open"""
+
+    def __init__(self, service_name: str):
+        super().__init__(f"Circuit open for {service_name}")
+        self.service_name = service_name
+
+
+def filter_headers(headers, excluded=()) -> dict:
+    """Drop hop-by-hop headers, headers listed in Connection, and any extra excluded ones"""
+    connection_tokens = {
+        token.strip().lower()
+        for value in [headers.get('Connection', '')]
+        for token in value.split(',') if token.strip()
+    }
+    dropped = HOP_BY_HOP_HEADERS | connection_tokens | {name.lower() for name in excluded}
+    return {key: value for key, value in headers.items() if key.lower() not in dropped}
+
+
+class RequestBodyStream:
+    """
+    File-like wrapper over the incoming WSGI body stream
+    Exposes the client's Content-Length so requests sends the body with the same length
+    while reading it in blocks instead of loading it into memory
+    """
+
+    def __init__(self, stream, length: int):
+        self.stream = stream
+        self.length = length
+
+    def __len__(self):
+        return self.length
+
+    def read(self, size: int = -1) -> bytes:
+        return self.stream.read(size)
+
+
+# Per-service keys of UPSTREAM_POOLS handled by UpstreamClient.configure_resilience
+RESILIENCE_OPTIONS = {
+    'failure_threshold', 'open_seconds', 'adaptive_timeout', 'timeout_multiplier', 'min_read_timeout', 'min_samples'
+}
+
+
+def iter_response_body(response: requests.Response, chunk_size: int):
+    """
+    Yield the raw upstream body chunk by chunk, then release the connection to the pool
+    Content is not decoded so Content-Encoding/Content-Length stay valid
+    """
+    try:
+        for chunk in response.raw.stream(chunk_size, decode_content=False):
+            yield chunk
+    finally:
+        response.close()
+
+
+class UpstreamClient:
+    """
+    Keep-alive HTTP session to a single upstream service
+    Connections are pooled and reused instead of opening a new TCP connection per request
+    """
+
+    def __init__(self, name: str, base_url: str, pool_size: int = 20,
+                 connect_timeout: float = 3, read_timeout: float = 30):
+        self.name = name
+        self.base_url = base_url
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+
+        self.session = requests.Session()
+        # pool_block=False: when all connections are busy, open an extra one instead of waiting
+        # (it is discarded after use rather than kept in the pool)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._adapter = adapter
+
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.total_requests = 0
+
+        self.breaker = CircuitBreaker(name)
+        self.latency = LatencyHistogram()
+        self.adaptive_timeout = False
+        self.timeout_multiplier = 3.0
+        self.min_read_timeout = 1.0
+        self.min_samples = 50
+        self._adaptive_read_timeout = None
+
+    def configure_resilience(self, failure_threshold: int, open_seconds: float, adaptive_timeout: bool,
+                             timeout_multiplier: float, min_read_timeout: float, min_samples: int) -> None:
+        """Circuit breaker and adaptive timeout settings (Config.CIRCUIT_BREAKER / ADAPTIVE_TIMEOUT)"""
+        self.breaker = CircuitBreaker(self.name, failure_threshold, open_seconds)
+        self.adaptive_timeout = adaptive_timeout
+        self.timeout_multiplier = timeout_multiplier
+        self.min_read_timeout = min_read_timeout
+        self.min_samples = min_samples
+
+    def current_timeout(self) -> tuple:
+        """
+        (connect, read) timeout for the next request
+        Read timeout follows the observed p99 latency (x multiplier), never above the configured one;
+        half-open probes use the configured timeout so a slower but healthy upstream can recover
+        """
+        if not self.adaptive_timeout or self._adaptive_read_timeout is None or self.breaker.is_probing():
+            return self.timeout
+        return (self.timeout[0], self._adaptive_read_timeout)
+
+    def admit(self) -> None:
+        """Fail fast while the circuit is open"""
+        if not self.breaker.allow_request():
+            raise CircuitOpenError(self.name)
+
+    def record_result(self, elapsed: float, failed: bool) -> None:
+        """Feed the outcome of one upstream call into the breaker and latency histogram"""
+        if failed:
+            self.breaker.record_failure()
+            return
+        self.breaker.record_success()
+        self.latency.observe(elapsed)
+        # Recompute every min_samples requests instead of sorting the window on each one
+        if self.adaptive_timeout and self.latency.count % self.min_samples == 0:
+            p99 = self.latency.percentile(99)
+            self._adaptive_read_timeout = min(
+                self.timeout[1], max(self.min_read_timeout, p99 * self.timeout_multiplier)
+            )
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send request through the pooled session, guarded by the circuit breaker"""
+        self.admit()
+        kwargs.setdefault('timeout', self.current_timeout())
+        with self._lock:
+            self.in_flight += 1
+            self.total_requests += 1
+        started = time.monotonic()
+        failed = True
+        try:
+            response = self.session.request(method, url, **kwargs)
+            failed = response.status_code in FAILURE_STATUSES
+            return response
+        finally:
+            self.record_result(time.monotonic() - started, failed)
+            with self._lock:
+                self.in_flight -= 1
+
+    def stats(self) -> dict:
+        """Pool usage of this upstream"""
+        opened = 0
+        idle = 0
+        for key in list(self._adapter.poolmanager.pools.keys()):
+            pool = self._adapter.poolmanager.pools.get(key)
+            if pool is None:
+                continue
+            opened += pool.num_connections
+            # Queue holds idle connections plus None placeholders for never-opened slots
+            idle += sum(1 for conn in list(pool.pool.queue) if conn is not None)
+        return {
+            "poolSize": self.pool_size,
+            "inFlight": self.in_flight,
+            "idleConnections": idle,
+            "connectionsOpened": opened,
+            "totalRequests": self.total_requests,
+            "connectTimeout": self.timeout[0],
+            "readTimeout": self.timeout[1],
+            "currentReadTimeout": self.current_timeout()[1]
+        }
+
+    def metrics(self) -> dict:
+        """Circuit state and latency histogram of this upstream"""
+        return {
+            "circuit": self.breaker.stats(),
+            "timeout": {
+                "adaptive": self.adaptive_timeout,
+                "configured": self.timeout[1],
+                "current": self.current_timeout()[1]
+            },
+            "latency": self.latency.snapshot()
+        }
+
+
+def build_upstream_clients(services: dict, pool_config: dict, default_config: dict,
+                           resilience_config: dict = None) -> dict:
+    """Create one UpstreamClient per service in SERVICES"""
+    clients = {}
+    for name, base_url in services.items():
+        options = {**default_config, **pool_config.get(name, {})}
+        resilience = {key: options.pop(key) for key in list(options) if key in RESILIENCE_OPTIONS}
+        clients[name] = UpstreamClient(name, base_url, **options)
+        if resilience_config is not None:
+            clients[name].configure_resilience(**{**resilience_config, **resilience})
+    return clients
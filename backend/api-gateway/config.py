@@ -1,6 +1,8 @@
 """
 Configuration file for API Gateway
 """
+import os
+
 
 class Config:
     """Base configuration"""
@@ -18,8 +20,95 @@ class Config:
     MEDIA_SERVICE_URL = 'http://localhost:8090'
     RECIPE_SERVICE_URL = 'http://localhost:8082'
     CATEGORY_SERVICE_URL = 'http://localhost:8083'
+    TAG_SERVICE_URL = 'http://localhost:8084'
     AI_SERVICE_URL = 'http://localhost:8092'
     
+    # Authentication mode
+    # - 'introspect': call authentication-service /auth/introspect for every request
+    # - 'local': verify HS512 signature in the gateway, check revocation against a local replica
+    AUTH_MODE = os.getenv('GATEWAY_AUTH_MODE', 'introspect')
+    
+    # Must match JWT_SIGNER_KEY of authentication-service
+    JWT_SIGNER_KEY = os.getenv(
+        'JWT_SIGNER_KEY',
+        '4vCM6CA5NXhXhG+LjHY+PfQRZYGjm13cHoNxVPuDyEYz2XB5SO/8Ko2vCxBkqHeT'
+    )
+    
+    # Revocation set replication (local mode only)
+    REVOCATION_SYNC_INTERVAL = int(os.getenv('REVOCATION_SYNC_INTERVAL', 10))  # seconds
+    # Fall back to introspection when the replica is older than this
+    REVOCATION_MAX_STALENESS = int(os.getenv('REVOCATION_MAX_STALENESS', 60))  # seconds
+    
+    # Single revocations pushed by authentication-service kept in memory at most
+    REVOCATION_MAX_SIZE = int(os.getenv('REVOCATION_MAX_SIZE', 100000))
+    
+    # /internal/* endpoints (revocation push, cache purge, stats): shared secret sent by upstream services
+    # in X-Internal-Token; when unset, only callers from INTERNAL_NETWORKS are accepted
+    INTERNAL_API_TOKEN = os.getenv('INTERNAL_API_TOKEN', '')
+    INTERNAL_NETWORKS = [
+        network.strip() for network in os.getenv(
+            'INTERNAL_NETWORKS', '127.0.0.0/8,::1/128,10.0.0.0/8,172.16.0.0/12,192.168.0.0/16'
+        ).split(',') if network.strip()
+    ]
+    
+    # Introspection verdict cache (introspect mode)
+    INTROSPECTION_CACHE_TTL = int(os.getenv('INTROSPECTION_CACHE_TTL', 30))  # seconds, capped by token exp
+    INTROSPECTION_CACHE_MAX_SIZE = int(os.getenv('INTROSPECTION_CACHE_MAX_SIZE', 10000))
+    
+    # Upstream connection pools (keep-alive sessions per service)
+    UPSTREAM_POOL_DEFAULTS = {
+        'pool_size': int(os.getenv('UPSTREAM_POOL_SIZE', 20)),
+        'connect_timeout': float(os.getenv('UPSTREAM_CONNECT_TIMEOUT', 3)),  # seconds
+        'read_timeout': float(os.getenv('UPSTREAM_READ_TIMEOUT', 30))  # seconds
+    }
+    # Per-service overrides
+    UPSTREAM_POOLS = {
+        'authentication-service': {'pool_size': 50},
+        'recipe-service': {'pool_size': 50},
+        # Upload/download time depends on file size, keep the configured timeout
+        'media-service': {'pool_size': 20, 'read_timeout': 60, 'adaptive_timeout': False},
+        'health-service': {'pool_size': 10, 'read_timeout': 60},
+        'ai-service': {'pool_size': 10, 'read_timeout': 30},
+    }
+    
+    # Circuit breaker and adaptive read timeout per upstream (overridable per service in UPSTREAM_POOLS)
+    UPSTREAM_RESILIENCE = {
+        # Consecutive failures (connection error, timeout, 502/503/504) before the circuit opens
+        'failure_threshold': int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', 5)),
+        'open_seconds': float(os.getenv('CIRCUIT_OPEN_SECONDS', 30)),  # before a half-open probe
+        # Read timeout = p99 latency x multiplier, between min_read_timeout and the configured read_timeout
+        'adaptive_timeout': os.getenv('ADAPTIVE_TIMEOUT', 'true').lower() == 'true',
+        'timeout_multiplier': float(os.getenv('ADAPTIVE_TIMEOUT_MULTIPLIER', 3)),
+        'min_read_timeout': float(os.getenv('ADAPTIVE_TIMEOUT_MIN', 2)),  # seconds
+        'min_samples': int(os.getenv('ADAPTIVE_TIMEOUT_MIN_SAMPLES', 50))
+    }
+    
+    # Stream request/response bodies through the gateway in chunks instead of buffering them
+    PROXY_STREAMING = os.getenv('PROXY_STREAMING', 'true').lower() == 'true'
+    PROXY_CHUNK_SIZE = int(os.getenv('PROXY_CHUNK_SIZE', 64 * 1024))  # bytes
+    
+    # Async engine (asgi_app.py): connections per upstream may exceed the keep-alive pool size
+    ASYNC_MAX_CONNECTIONS = int(os.getenv('ASYNC_MAX_CONNECTIONS', 1000))
+    ASYNC_POOL_TIMEOUT = float(os.getenv('ASYNC_POOL_TIMEOUT', 10))  # seconds waiting for a free connection
+    
+    # Response cache for hot, non-personalized GET endpoints
+    RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+    RESPONSE_CACHE_MAX_BYTES = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+    RESPONSE_CACHE_MAX_ENTRY_BYTES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRY_BYTES', 1024 * 1024))
+    # Rule relative to API_PREFIX -> TTL in seconds (0: never cache, e.g. personalized routes)
+    RESPONSE_CACHE_RULES = {
+        '/categories': 300,
+        '/categories/<categoryId>': 300,
+        '/tags/popular': 60,
+        '/trending/recipes': 60,
+        '/recipes/trending/recipes': 60,
+        # Recipe detail only: /recipes/feed, /recipes/export, ... are not ids and never match
+        '/recipes/<objectid:recipeId>': 30,
+    }
+
+    # Identical concurrent cache misses share a single upstream call
+    REQUEST_COALESCING = os.getenv('REQUEST_COALESCING', 'true').lower() == 'true'
+    
     # Public endpoints (regex patterns)
     PUBLIC_ENDPOINTS = [
         r'/auth/.*'
@@ -0,0 +1,91 @@
+import time
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker of one upstream service
+
+    closed    -> requests pass, `failure_threshold` consecutive failures open the circuit
+    open      -> requests are rejected immediately for `open_seconds`
+    half_open -> up to `half_open_max_calls` probe requests pass;
+                 a successful probe closes the circuit, a failed one opens it again
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, open_seconds: float = 30,
+                 half_open_max_calls: int = 1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self.consecutive_failures = 0
+        self.times_opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    def allow_request(self) -> bool:
+        """False while the circuit is open or all half-open probes are taken"""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and self._probes < self.half_open_max_calls:
+                self._probes += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def is_probing(self) -> bool:
+        with self._lock:
+            return self._current_state() == HALF_OPEN
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info(f"Circuit of {self.name} closed")
+            self._state = CLOSED
+            self.consecutive_failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.consecutive_failures += 1
+            state = self._current_state()
+            if state == HALF_OPEN or (state == CLOSED and self.consecutive_failures >= self.failure_threshold):
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self.times_opened += 1
+                logger.warning(f"Circuit of {self.name} opened after {self.consecutive_failures} failures")
+
+    def stats(self) -> dict:
+        with self._lock:
+            state = self._current_state()
+            retry_in = max(0.0, self.open_seconds - (time.monotonic() - self._opened_at)) if state == OPEN else 0.0
+            return {
+                "state": state,
+                "consecutiveFailures": self.consecutive_failures,
+                "timesOpened": self.times_opened,
+                "rejected": self.rejected,
+                "retryIn": round(retry_in, 1)
+            }
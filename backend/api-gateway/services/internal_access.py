@@ -0,0 +1,42 @@
+import hmac
+import ipaddress
+import logging
+from typing import Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Header carrying the shared secret of service-to-service calls
+INTERNAL_TOKEN_HEADER = 'X-Internal-Token'
+
+
+class InternalAccess:
+    """
+    Guard of the /internal/* endpoints (revocation push, cache purge, stats), which are not for public clients
+    - With a shared secret configured, callers must send it in X-Internal-Token (any source address)
+    - Without one, only callers from the internal networks (loopback and private ranges by default) are accepted
+    """
+
+    def __init__(self, token: str, networks: Iterable[str]):
+        self.token = token or ''
+        self.networks = [ipaddress.ip_network(network, strict=False) for network in networks]
+        self.denied = 0
+
+    def allows(self, remote_addr: Optional[str], token: Optional[str]) -> bool:
+        """Check a request by its peer address and X-Internal-Token header"""
+        if self.token:
+            allowed = token is not None and hmac.compare_digest(token.encode(), self.token.encode())
+        else:
+            allowed = self._is_internal_address(remote_addr)
+        if not allowed:
+            self.denied += 1
+            logger.warning(f"Rejected internal request from {remote_addr}")
+        return allowed
+
+    def _is_internal_address(self, remote_addr: Optional[str]) -> bool:
+        try:
+            address = ipaddress.ip_address(remote_addr)
+        except (TypeError, ValueError):
+            return False
+        if address.version == 6 and address.ipv4_mapped is not None:
+            address = address.ipv4_mapped
+        return any(address in network for network in self.networks)
@@ -0,0 +1,89 @@
+import jwt
+import time
+import threading
+import logging
+from collections import OrderedDict
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class IntrospectionCache:
+    """
+    Bounded LRU cache of introspection verdicts keyed by token id (jti)
+    An entry lives at most `ttl` seconds and never past the token's own `exp`
+    """
+
+    def __init__(self, ttl: int, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()  # jti -> (token, valid, expires_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def read_claims(token: str) -> Optional[dict]:
+        """Read jti/exp without verifying - the verdict itself comes from introspection"""
+        try:
+            claims = jwt.decode(token, options={"verify_signature": False, "verify_exp": False})
+        except jwt.InvalidTokenError:
+            return None
+        if not claims.get('jti') or not claims.get('exp'):
+            return None
+        return claims
+
+    def get(self, token: str) -> Optional[bool]:
+        """Return the cached verdict for this token or None on miss"""
+        claims = self.read_claims(token)
+        if claims is None:
+            return None
+
+        jti = claims['jti']
+        with self._lock:
+            entry = self._entries.get(jti)
+            if entry is not None and entry[2] <= time.time():
+                del self._entries[jti]
+                entry = None
+            # Compare the full token so a forged token reusing a jti never hits
+            if entry is None or entry[0] != token:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(jti)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, token: str, valid: bool) -> None:
+        """Store an introspection verdict"""
+        claims = self.read_claims(token)
+        if claims is None:
+            return
+
+        expires_at = min(time.time() + self.ttl, float(claims['exp']))
+        if expires_at <= time.time():
+            return
+
+        with self._lock:
+            self._entries[claims['jti']] = (token, valid, expires_at)
+            self._entries.move_to_end(claims['jti'])
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, jti: str) -> None:
+        """Drop the verdict of a revoked token"""
+        with self._lock:
+            if self._entries.pop(jti, None) is not None:
+                self.invalidations += 1
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxSize": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hitRatio": round(self.hits / total, 4) if total else 0.0
+        }
@@ -0,0 +1,64 @@
+import bisect
+import threading
+from collections import deque
+from typing import List, Optional
+
+# Upper bounds in seconds (Prometheus-style cumulative buckets, +Inf is implicit)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class LatencyHistogram:
+    """
+    Bucketed latency histogram plus a window of recent samples
+    Buckets are cumulative over the process lifetime, percentiles use the recent window
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, window: int = 500):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self._recent.append(seconds)
+            self.count += 1
+            self.total += seconds
+
+    def percentile(self, q: float) -> Optional[float]:
+        """q-th percentile (0-100) of the recent window, None without samples"""
+        with self._lock:
+            samples = sorted(self._recent)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(q / 100 * (len(samples) - 1))))
+        return samples[index]
+
+    def recent_count(self) -> int:
+        return len(self._recent)
+
+    def cumulative_counts(self) -> List[int]:
+        """Count of observations <= each bucket bound, last item is +Inf"""
+        with self._lock:
+            counts = list(self._counts)
+        running = 0
+        cumulative = []
+        for count in counts:
+            running += count
+            cumulative.append(running)
+        return cumulative
+
+    def snapshot(self) -> dict:
+        cumulative = self.cumulative_counts()
+        percentiles = {f"p{q}": self.percentile(q) for q in (50, 95, 99)}
+        return {
+            "count": self.count,
+            "sum": round(self.total, 6),
+            "buckets": [
+                {"le": str(bound), "count": cumulative[i]} for i, bound in enumerate(self.buckets)
+            ] + [{"le": "+Inf", "count": cumulative[-1]}],
+            **{name: round(value, 6) if value is not None else None for name, value in percentiles.items()}
+        }
@@ -0,0 +1,187 @@
+import hashlib
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from services.route_table import compile_rule, rule_specificity
+
+# Upstream Cache-Control directives that forbid storing a shared copy
+_UNCACHEABLE_DIRECTIVES = ('no-store', 'private', 'no-cache')
+
+# Response headers that are not replayed from the cache (recomputed or per-response)
+_VOLATILE_HEADERS = {'date', 'set-cookie', 'etag', 'cache-control', 'content-length', 'content-encoding'}
+
+
+@dataclass
+class CachedResponse:
+    """Buffered upstream response"""
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+    etag: str
+    ttl: int
+    expires_at: float
+
+    @property
+    def size(self) -> int:
+        return len(self.body)
+
+    def response_headers(self) -> Dict[str, str]:
+        """Headers to send with a cached copy"""
+        remaining = max(0, int(self.expires_at - time.time()))
+        return {
+            **self.headers,
+            'ETag': self.etag,
+            'Cache-Control': f'public, max-age={remaining}'
+        }
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of If-None-Match against an ETag (RFC 7232 section 3.2)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    candidates = [value.strip() for value in if_none_match.split(',')]
+    return any(value.removeprefix('W/') == etag.removeprefix('W/') for value in candidates)
+
+
+class ResponseCache:
+    """
+    In-memory cache of public, idempotent GET responses
+    Only routes listed in `rules` are cached, each with its own TTL (0 disables caching for a rule)
+    Bounded by total body size, least recently used entries are evicted first
+    """
+
+    def __init__(self, api_prefix: str, rules: Dict[str, int], max_bytes: int, max_entry_bytes: int):
+        """
+        Args:
+            api_prefix: Prefix of gateway paths (e.g. /api/v1)
+            rules: rule relative to api_prefix (werkzeug syntax) -> TTL in seconds
+            max_bytes: Memory cap over all cached bodies
+            max_entry_bytes: Larger responses are never cached
+        """
+        self.api_prefix = api_prefix
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        # Same precedence as the route table: /recipes/feed wins over /recipes/<recipeId>
+        self._rules: List[Tuple] = [
+            (compile_rule(rule), ttl) for rule, ttl in sorted(rules.items(), key=lambda item: rule_specificity(item[0]))
+        ]
+
+        self._entries = OrderedDict()  # key -> CachedResponse
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.evictions = 0
+        self.purged = 0
+
+    def ttl_for(self, path: str) -> int:
+        """TTL of the first rule matching a gateway path, 0 if the path is not cacheable"""
+        if not path.startswith(self.api_prefix):
+            return 0
+        relative_path = path[len(self.api_prefix):]
+        for pattern, ttl in self._rules:
+            if pattern.match(relative_path):
+                return ttl
+        return 0
+
+    @staticmethod
+    def make_key(path: str, query_string: str) -> str:
+        return f"{path.rstrip('/') or '/'}?{query_string}" if query_string else (path.rstrip('/') or '/')
+
+    @staticmethod
+    def is_storable(status: int, headers) -> bool:
+        """Only plain 200 responses the upstream does not mark as private"""
+        if status != 200:
+            return False
+        cache_control = (headers.get('Cache-Control') or '').lower()
+        return not any(directive in cache_control for directive in _UNCACHEABLE_DIRECTIVES)
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= time.time():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: str, status: int, headers, body: bytes, ttl: int) -> CachedResponse:
+        """Store a buffered response and return the entry (also when it is too large to keep)"""
+        etag = headers.get('ETag') or f'"{hashlib.sha1(body).hexdigest()}"'
+        entry = CachedResponse(
+            status=status,
+            headers={k: v for k, v in headers.items() if k.lower() not in _VOLATILE_HEADERS},
+            body=body,
+            etag=etag,
+            ttl=ttl,
+            expires_at=time.time() + ttl
+        )
+        if entry.size > self.max_entry_bytes:
+            return entry
+
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = entry
+            self._size += entry.size
+            while self._size > self.max_bytes and self._entries:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+        return entry
+
+    def record_not_modified(self) -> None:
+        self.not_modified += 1
+
+    def purge(self, paths: List[str] = (), prefixes: List[str] = ()) -> int:
+        """
+        Drop entries by exact path (any query string) or by path prefix
+        Paths are relative to api_prefix, e.g. /recipes/<id> or /categories
+        """
+        exact = {self.api_prefix + (path.rstrip('/') or '/') for path in paths}
+        starts = tuple(self.api_prefix + prefix for prefix in prefixes)
+        removed = 0
+        with self._lock:
+            for key in list(self._entries.keys()):
+                path = key.split('?', 1)[0]
+                if path in exact or (starts and path.startswith(starts)):
+                    self._remove(key)
+                    removed += 1
+            self.purged += removed
+        return removed
+
+    def clear(self) -> int:
+        with self._lock:
+            removed = len(self._entries)
+            self._entries.clear()
+            self._size = 0
+            self.purged += removed
+        return removed
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry.size
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._size,
+            "maxBytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "notModified": self.not_modified,
+            "evictions": self.evictions,
+            "purged": self.purged,
+            "hitRatio": round(self.hits / total, 4) if total else 0.0
+        }
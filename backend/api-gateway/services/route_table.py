@@ -0,0 +1,114 @@
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from werkzeug.exceptions import MethodNotAllowed
+
+# <name> matches one segment, <path:name> matches the rest of the path (like werkzeug converters),
+# <objectid:name> matches a MongoDB ObjectId segment only (24 hex digits)
+_CONVERTER_RE = re.compile(r'<(?:(path|objectid):)?(\w+)>')
+_CONVERTER_PATTERNS = {None: '[^/]+', 'path': '.+?', 'objectid': '[0-9a-fA-F]{24}'}
+
+
+@dataclass(frozen=True)
+class RouteMatch:
+    """Result of resolving a request path"""
+    service: str
+    target_path: str
+    is_public: bool
+    rule: str
+
+
+@dataclass(frozen=True)
+class _CompiledRoute:
+    pattern: re.Pattern
+    methods: frozenset
+    service: str
+    rule: str
+
+
+def compile_rule(rule: str) -> re.Pattern:
+    """Compile a werkzeug-style rule into an anchored regex (trailing slash optional)"""
+    parts = []
+    position = 0
+    for converter in _CONVERTER_RE.finditer(rule):
+        parts.append(re.escape(rule[position:converter.start()]))
+        parts.append(_CONVERTER_PATTERNS[converter.group(1)])
+        position = converter.end()
+    parts.append(re.escape(rule[position:].rstrip('/')))
+    return re.compile(''.join(parts) + '/?$')
+
+
+def rule_specificity(rule: str) -> Tuple[int, int, int]:
+    """Sort key: catch-all rules last, then more static segments first (same order as werkzeug)"""
+    has_path = '<path:' in rule
+    segments = [s for s in rule.split('/') if s]
+    static_segments = sum(1 for s in segments if '<' not in s)
+    return (has_path, -static_segments, -len(segments))
+
+
+class RouteTable:
+    """
+    Routing table compiled once at startup
+    Resolves target service, path without API prefix and public/private flag in a single call
+    Rules are bucketed by their first segment, so a request only tries the few rules of its bucket
+    """
+
+    def __init__(self, api_prefix: str, routes: List[Tuple[str, List[str], str]], public_endpoints: List[str],
+                 blocked_endpoints: List[str] = ()):
+        """
+        Args:
+            api_prefix: Prefix stripped before forwarding (e.g. /api/v1)
+            routes: (rule, methods, service) - rule is relative to api_prefix, werkzeug syntax
+            public_endpoints: Regex patterns relative to api_prefix
+            blocked_endpoints: Regex patterns relative to api_prefix that are never proxied (whole path must match)
+        """
+        self.api_prefix = api_prefix
+        self._prefix_length = len(api_prefix)
+
+        self._buckets: Dict[str, List[_CompiledRoute]] = {}
+        for rule, methods, service in sorted(routes, key=lambda route: rule_specificity(route[0])):
+            first_segment = rule.strip('/').split('/', 1)[0]
+            self._buckets.setdefault(first_segment, []).append(
+                _CompiledRoute(compile_rule(rule), frozenset(methods), service, rule)
+            )
+
+        # One alternation instead of a re.match per pattern per request
+        self._public_re = re.compile(
+            '|'.join(f'(?:{re.escape(api_prefix)}{pattern})' for pattern in public_endpoints)
+        ) if public_endpoints else None
+        self._blocked_re = re.compile(
+            '|'.join(f'(?:{pattern})' for pattern in blocked_endpoints)
+        ) if blocked_endpoints else None
+
+    def is_public(self, path: str) -> bool:
+        return bool(self._public_re and self._public_re.match(path))
+
+    def resolve(self, path: str, method: str) -> Optional[RouteMatch]:
+        """
+        Resolve a request path
+        Returns None if no route matches, raises MethodNotAllowed if the path only matches other methods
+        """
+        if not path.startswith(self.api_prefix):
+            return None
+        relative_path = path[self._prefix_length:]
+        if not relative_path.startswith('/'):
+            return None
+        if self._blocked_re and self._blocked_re.fullmatch(relative_path):
+            return None
+
+        end = relative_path.find('/', 1)
+        first_segment = relative_path[1:end] if end != -1 else relative_path[1:]
+
+        allowed = set()
+        for route in self._buckets.get(first_segment, ()):
+            if route.pattern.match(relative_path):
+                if method in route.methods:
+                    target_path = relative_path.rstrip('/') or '/'
+                    return RouteMatch(
+                        service=route.service, target_path=target_path, is_public=self.is_public(path), rule=route.rule
+                    )
+                allowed |= route.methods
+
+        if allowed:
+            raise MethodNotAllowed(valid_methods=sorted(allowed))
+        return None
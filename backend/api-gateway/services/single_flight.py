@@ -0,0 +1,91 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict
+
+
+class _Call:
+    """Upstream call in progress, shared by every request with the same key"""
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Collapse identical concurrent calls into one (sync engine, one thread per request)
+    The first caller of a key runs the call, callers arriving while it runs wait and share its result
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.collapsed = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Run fn once per key at a time, re-raising its exception in every waiter"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                self.collapsed += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> dict:
+        return {
+            "inFlight": len(self._calls),
+            "upstreamCalls": self.leaders,
+            "collapsed": self.collapsed
+        }
+
+
+class AsyncSingleFlight:
+    """
+    asyncio counterpart of SingleFlight (async engine)
+    The call runs in its own task so a disconnecting first caller does not cancel it for the others
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Task] = {}
+        self.leaders = 0
+        self.collapsed = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+            self.leaders += 1
+        else:
+            self.collapsed += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        return {
+            "inFlight": len(self._calls),
+            "upstreamCalls": self.leaders,
+            "collapsed": self.collapsed
+        }
@@ -0,0 +1,140 @@
+import jwt
+import time
+import threading
+import requests
+import logging
+from typing import Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class RevocationSet:
+    """
+    Local replica of authentication-service's invalidated_token table
+    Maps token id (jti) -> expiry timestamp; entries are dropped once the token expires
+    Single pushed revocations are bounded by max_size: when full, expired entries are pruned first, then the entry
+    expiring soonest is dropped (the next snapshot from authentication-service restores it if still valid)
+    """
+
+    def __init__(self, max_size: Optional[int] = None):
+        self._entries: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._last_synced_at = None
+        self.max_size = max_size
+        self.evictions = 0
+
+    def add(self, jti: str, exp: float) -> bool:
+        """Mark a single token as revoked, False if the token has already expired"""
+        now = time.time()
+        if exp <= now:
+            return False
+        with self._lock:
+            if self.max_size is not None and jti not in self._entries and len(self._entries) >= self.max_size:
+                self._entries = {key: value for key, value in self._entries.items() if value > now}
+                while len(self._entries) >= self.max_size:
+                    del self._entries[min(self._entries, key=self._entries.get)]
+                    self.evictions += 1
+            self._entries[jti] = exp
+        return True
+
+    def replace(self, entries: Iterable[Tuple[str, float]]) -> None:
+        """Replace the whole replica with a fresh snapshot"""
+        now = time.time()
+        fresh = {jti: exp for jti, exp in entries if exp > now}
+        with self._lock:
+            # Keep entries pushed after the snapshot was taken
+            for jti, exp in self._entries.items():
+                if exp > now and jti not in fresh:
+                    fresh[jti] = exp
+            self._entries = fresh
+            self._last_synced_at = now
+
+    def contains(self, jti: str) -> bool:
+        """Check if token id is revoked"""
+        with self._lock:
+            return jti in self._entries
+
+    def prune(self) -> None:
+        """Remove entries of tokens that have already expired"""
+        now = time.time()
+        with self._lock:
+            self._entries = {jti: exp for jti, exp in self._entries.items() if exp > now}
+
+    def is_fresh(self, max_staleness: float) -> bool:
+        """Check if the replica was synced recently enough to be trusted"""
+        return self._last_synced_at is not None and time.time() - self._last_synced_at <= max_staleness
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RevocationSyncer:
+    """Background thread that periodically pulls invalidated tokens from authentication-service"""
+
+    def __init__(self, auth_service_url: str, revocations: RevocationSet, interval: int, internal_token: str = ''):
+        self.url = f"{auth_service_url}/auth/internal/invalidated-tokens"
+        # Shared secret required by authentication-service's /auth/internal/* endpoints
+        self.headers = {'X-Internal-Token': internal_token} if internal_token else None
+        self.revocations = revocations
+        self.interval = interval
+        self._thread = None
+        self._stop = threading.Event()
+
+    def sync_once(self) -> bool:
+        """Fetch a full snapshot of invalidated tokens"""
+        try:
+            response = requests.get(self.url, headers=self.headers, timeout=5)
+            if response.status_code != 200:
+                logger.error(f"Revocation sync failed with status {response.status_code}")
+                return False
+            tokens = response.json().get("data", {}).get("tokens", [])
+            self.revocations.replace((t["id"], t["expiryTime"]) for t in tokens)
+            return True
+        except Exception as e:
+            logger.error(f"Error syncing revocation set: {str(e)}")
+            return False
+
+    def start(self) -> None:
+        """Start syncing in a daemon thread"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="revocation-syncer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.sync_once()
+            self.revocations.prune()
+            self._stop.wait(self.interval)
+
+
+class LocalTokenVerifier:
+    """
+    Verify access tokens inside the gateway
+    Same rules as JWTService.verify_token in authentication-service: HS512 signature,
+    token-type 'access', not expired, and jti not invalidated
+    """
+
+    def __init__(self, signer_key: str, revocations: RevocationSet):
+        self.signer_key = signer_key
+        self.revocations = revocations
+
+    def verify(self, token: str) -> bool:
+        """Return True if the access token is valid"""
+        try:
+            payload = jwt.decode(token, self.signer_key, algorithms=['HS512'])
+        except jwt.InvalidTokenError as e:
+            logger.info(f"Local token verification failed: {str(e)}")
+            return False
+
+        if payload.get('token-type') != 'access':
+            return False
+
+        token_id = payload.get('jti')
+        if not token_id or self.revocations.contains(token_id):
+            return False
+
+        return True
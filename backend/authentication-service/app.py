@@ -6,6 +6,7 @@ from config import Config
 from extensions import db, bcrypt
 from routes.auth_routes import auth_bp
 from exceptions.error_handler import register_error_handlers
+from utils.metrics import init_metrics, instrument_sqlalchemy
 import logging
 
 # Configure logging
@@ -27,12 +28,16 @@ def create_app(config_class=Config):
     })
     
     # Initialize extensions
+    instrument_sqlalchemy()
     db.init_app(app)
     bcrypt.init_app(app)
     
     # Register error handlers
     register_error_handlers(app)
     
+    # Request and DB metrics on GET /metrics
+    init_metrics(app, 'authentication-service')
+    
     # Register blueprints
     app.register_blueprint(auth_bp, url_prefix='/auth')
     
@@ -0,0 +1,33 @@
+import requests
+from flask import current_app
+from datetime import datetime
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class GatewayClient:
+    """HTTP client to notify api-gateway about token changes"""
+    
+    @staticmethod
+    def notify_token_revoked(token_id: str, expiry_time: datetime) -> None:
+        """
+        Tell the gateway to drop cached verdicts of a revoked token
+        POST /internal/tokens/revoked
+        Best effort: the gateway cache expires on its own TTL anyway
+        """
+        try:
+            url = f"{current_app.config['GATEWAY_URL']}/internal/tokens/revoked"
+            data = {
+                'id': token_id,
+                'expiryTime': expiry_time.timestamp()
+            }
+            
+            headers = {}
+            if current_app.config.get('INTERNAL_API_TOKEN'):
+                headers['X-Internal-Token'] = current_app.config['INTERNAL_API_TOKEN']
+            
+            requests.post(url, json=data, headers=headers, timeout=2)
+            
+        except requests.RequestException as e:
+            logger.warning(f"Error notifying gateway about revoked token: {str(e)}")
@@ -28,6 +28,20 @@ class Config:
         'http://localhost:8081/users'
     )
     
+    GATEWAY_URL = os.getenv(
+        'GATEWAY_URL',
+        'http://localhost:8888'
+    )
+    # Shared secret of internal calls (INTERNAL_API_TOKEN of api-gateway): sent to the gateway's /internal/*
+    # endpoints and required on this service's /auth/internal/* endpoints
+    INTERNAL_API_TOKEN = os.getenv('INTERNAL_API_TOKEN', '')
+    # Without a shared secret, /auth/internal/* only accepts callers from these networks
+    INTERNAL_NETWORKS = [
+        network.strip() for network in os.getenv(
+            'INTERNAL_NETWORKS', '127.0.0.0/8,::1/128,10.0.0.0/8,172.16.0.0/12,192.168.0.0/16'
+        ).split(',') if network.strip()
+    ]
+    
     # Google OAuth configuration
     GOOGLE_CLIENT_ID = os.getenv(
         'GOOGLE_CLIENT_ID',
@@ -1,6 +1,7 @@
 from extensions import db
 from models.models import UserEntity, Role, InvalidatedToken
-from typing import Optional
+from typing import Optional, List
+from datetime import datetime
 
 
 class UserRepository:
@@ -83,3 +84,8 @@ class InvalidatedTokenRepository:
     def find_by_id(token_id: str) -> Optional[InvalidatedToken]:
         """Find invalidated token by ID"""
         return InvalidatedToken.query.get(token_id)
+    
+    @staticmethod
+    def find_all_not_expired() -> List[InvalidatedToken]:
+        """Find invalidated tokens that have not expired yet"""
+        return InvalidatedToken.query.filter(InvalidatedToken.expiry_time > datetime.now()).all()
@@ -1,4 +1,4 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from services.authentication_service import AuthenticationService
 from services.user_service import UserService
 from services.google_oauth_service import GoogleOAuthService
@@ -10,7 +10,8 @@ from dto.requests import (
     UserCreationRequest
 )
 from dto.responses import ApiResponse
-from exceptions.exceptions import AppException
+from exceptions.exceptions import AppException, ErrorCode
+from utils.internal_access import is_internal_request, INTERNAL_TOKEN_HEADER
 from utils.validators import validate_email, validate_password, validate_username
 import logging
 
@@ -19,6 +20,16 @@ logger = logging.getLogger(__name__)
 auth_bp = Blueprint('auth', __name__)
 
 
+@auth_bp.before_request
+def guard_internal_endpoints():
+    """/auth/internal/* is for other services only (shared secret or internal network)"""
+    if request.path.startswith('/auth/internal/') and not is_internal_request(
+            request.remote_addr, request.headers.get(INTERNAL_TOKEN_HEADER),
+            current_app.config.get('INTERNAL_API_TOKEN'), current_app.config.get('INTERNAL_NETWORKS', [])):
+        logger.warning(f"Rejected internal request from {request.remote_addr}")
+        raise AppException(ErrorCode.UNAUTHORIZED)
+
+
 @auth_bp.route('/login', methods=['POST'])
 def login():
     """
@@ -96,6 +107,26 @@ def introspect():
     }), 200
 
 
+@auth_bp.route('/internal/invalidated-tokens', methods=['GET'])
+def invalidated_tokens():
+    """
+    List unexpired invalidated tokens (internal endpoint)
+    GET /auth/internal/invalidated-tokens
+    """
+    tokens = AuthenticationService.get_invalidated_tokens()
+    
+    return jsonify({
+        'code': 0,
+        'message': 'Thành công',
+        'data': {
+            'tokens': [
+                {'id': t.id, 'expiryTime': t.expiry_time.timestamp()}
+                for t in tokens
+            ]
+        }
+    }), 200
+
+
 @auth_bp.route('/logout', methods=['POST'])
 def logout():
     """
@@ -5,7 +5,9 @@ from dto.requests import AuthenticationRequest, IntrospectRequest, LogoutRequest
 from dto.responses import AuthenticationResponse, IntrospectResponse, RefreshTokenResponse
 from exceptions.exceptions import AppException, ErrorCode
 from utils.jwt_service import JWTService
+from clients.gateway_client import GatewayClient
 from datetime import datetime
+from typing import List
 import logging
 
 logger = logging.getLogger(__name__)
@@ -34,6 +36,14 @@ class AuthenticationService:
         
         return IntrospectResponse(valid=valid)
     
+    @staticmethod
+    def get_invalidated_tokens() -> List[InvalidatedToken]:
+        """
+        Get invalidated tokens that are still unexpired
+        Used by api-gateway to replicate the revocation set for local token verification
+        """
+        return InvalidatedTokenRepository.find_all_not_expired()
+    
     @staticmethod
     def authenticate(request: AuthenticationRequest) -> AuthenticationResponse:
         """
@@ -107,6 +117,7 @@ class AuthenticationService:
             InvalidatedTokenRepository.save(
                 InvalidatedToken(id=access_token_id, expiry_time=access_expiry)
             )
+            GatewayClient.notify_token_revoked(access_token_id, access_expiry)
         except Exception as e:
             logger.info(f"Access token already expired: {str(e)}")
         
@@ -0,0 +1,24 @@
+import hmac
+import ipaddress
+from typing import Iterable, Optional
+
+# Header carrying the shared secret of service-to-service calls
+INTERNAL_TOKEN_HEADER = 'X-Internal-Token'
+
+
+def is_internal_request(remote_addr: Optional[str], token: Optional[str], api_token: str,
+                        networks: Iterable[str]) -> bool:
+    """
+    Check a call to an internal endpoint (same rules as the api-gateway /internal/* guard)
+    - With a shared secret configured, the caller must send it in X-Internal-Token
+    - Without one, only callers from the internal networks are accepted
+    """
+    if api_token:
+        return token is not None and hmac.compare_digest(token.encode(), api_token.encode())
+    try:
+        address = ipaddress.ip_address(remote_addr)
+    except (TypeError, ValueError):
+        return False
+    if address.version == 6 and address.ipv4_mapped is not None:
+        address = address.ipv4_mapped
+    return any(address in ipaddress.ip_network(network, strict=False) for network in networks)
@@ -4,6 +4,7 @@ from mongoengine import connect
 from dotenv import load_dotenv
 import os
 from routes.category_routes import category_bp
+from utils.metrics import init_metrics, instrument_pymongo
 
 load_dotenv()
 app = Flask(__name__)
@@ -16,6 +17,10 @@ CORS(app, resources={
     }
 })
 
+# Metrics: request latency + thời gian query MongoDB, xem tại GET /metrics
+instrument_pymongo()
+init_metrics(app, 'category-service')
+
 # Kết nối MongoDB
 try:
     mongo_uri = os.getenv('MONGO_URI')
@@ -1,6 +1,7 @@
 from flask import request, jsonify, g
 from models.category_model import Category
 from exceptions.exceptions import ErrorCode
+from utils.gateway_cache import purge_gateway_cache
 from datetime import datetime
 
 def _handle_error(e, code=500):
@@ -37,6 +38,7 @@ def create_category():
             icon=data.get('icon')
         )
         new_category.save()
+        purge_gateway_cache(prefixes=['/categories'])
         
         return jsonify(new_category.to_json()), 200 # 200 OK theo openapi
     except Exception as e:
@@ -78,6 +80,7 @@ def update_category(categoryId):
         
         category.updatedAt = datetime.utcnow()
         category.save()
+        purge_gateway_cache(prefixes=['/categories'])
         
         return jsonify(category.to_json()), 200
     except Exception as e:
@@ -94,6 +97,7 @@ def delete_category(categoryId):
             }), 404
             
         category.delete()
+        purge_gateway_cache(prefixes=['/categories'])
         return jsonify({"message": "Xóa thành công"}), 200
     except Exception as e:
         return _handle_error(e)
\ No newline at end of file
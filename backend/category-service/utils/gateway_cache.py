@@ -0,0 +1,26 @@
+import requests
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+GATEWAY_URL = os.getenv('GATEWAY_URL', 'http://localhost:8888')
+# Shared secret của các endpoint /internal/* của gateway (INTERNAL_API_TOKEN của api-gateway)
+INTERNAL_API_TOKEN = os.getenv('INTERNAL_API_TOKEN', '')
+
+
+def purge_gateway_cache(paths=None, prefixes=None):
+    """
+    Báo api-gateway xóa các response đã cache khi dữ liệu thay đổi
+    POST /internal/cache/purge - path tính từ /api/v1 (vd: /recipes/<id>)
+    Best effort: nếu gateway không phản hồi, cache vẫn tự hết hạn theo TTL
+    """
+    try:
+        requests.post(
+            f"{GATEWAY_URL}/internal/cache/purge",
+            json={"paths": paths or [], "prefixes": prefixes or []},
+            headers={'X-Internal-Token': INTERNAL_API_TOKEN} if INTERNAL_API_TOKEN else None,
+            timeout=2
+        )
+    except requests.RequestException as e:
+        logger.warning(f"Error purging gateway cache: {str(e)}")
@@ -2,12 +2,17 @@ from flask import Flask
 from databases import db
 from routes import bp
 from config import Config
+from utils.metrics import init_metrics, instrument_sqlalchemy
+from migrations import ensure_schema, start_legacy_migration
+from rating_sync import start_rating_sync
 
 
 def create_app():
     app = Flask(__name__)
     app.config['SQLALCHEMY_DATABASE_URI'] = Config.SQLALCHEMY_DATABASE_URI
+    instrument_sqlalchemy()
     db.init_app(app)
+    init_metrics(app, 'comment-service')
     app.register_blueprint(bp)
     return app
 
@@ -16,6 +21,9 @@ if __name__ == '__main__':
     app = create_app()
 
     with app.app_context():
-        db.create_all()
+        # ensure_schema() gọi create_all, và cần biết bảng nào vừa được tạo
+        ensure_schema()
+    start_legacy_migration(app)
+    start_rating_sync(app)
 
     app.run(debug=True, port=8085)
@@ -0,0 +1,160 @@
+"""
+Benchmark: trang comment của một recipe "hot" (CommentRepository)
+
+Nạp một recipe có --hot comment (mặc định 100k) cùng --comments comment của các recipe khác vào database
+qua DBAPI executemany, rồi đo trang đầu, trang giữa và trang cuối theo từng kiểu sort:
+- cursor (keyset, get_comments_page): thời gian mỗi trang không phụ thuộc vị trí trang
+- page (offset, get_comments_to_recipe): trang càng sâu càng chậm, để so sánh
+Sau đó --threads thread cùng like/unlike ngẫu nhiên 20 comment của trang đầu (CommentLikeRepository), đo số
+thao tác/giây và kiểm tra likes_count của từng comment đúng bằng số dòng trong comment_likes (không mất lượt nào)
+
+Mặc định dùng SQLite (file tạm), --url để chạy trên MySQL thật (database riêng, bảng bị xóa và tạo lại).
+
+Run:
+    python bench_comments.py
+    python bench_comments.py --hot 20000 --comments 100000
+"""
+import argparse
+import os
+import pickle
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import Flask
+
+from bench_favorites import measure
+from databases import db
+from models import Comment, CommentLike
+from repositories import CommentRepository, CommentLikeRepository
+
+INSERT_BATCH = 50000
+LIMIT = 20
+
+
+def load(connection, placeholder, args, rng):
+    cursor = connection.cursor()
+    sql = ("INSERT INTO comments (id, recipe_id, content, author, images, likes_count, is_liked, created_at, updated_at)"
+           " VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)").replace('%s', placeholder)
+    start = datetime.now() - timedelta(days=365)
+    images = pickle.dumps([])
+    rows = []
+    for i in range(args.hot + args.comments):
+        recipe_id = 'recipe-hot' if i < args.hot else f'recipe-{rng.randrange(args.recipes):08d}'
+        created_at = start + timedelta(seconds=rng.randrange(365 * 86400))
+        likes = int(rng.paretovariate(1.2)) - 1
+        rows.append((f'comment-{i:09d}', recipe_id, 'Món này rất ngon!', f'user-{rng.randrange(100000)}', images,
+                     likes, False, created_at, created_at))
+        if len(rows) >= INSERT_BATCH:
+            cursor.executemany(sql, rows)
+            rows.clear()
+    if rows:
+        cursor.executemany(sql, rows)
+    connection.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--hot', type=int, default=100000)
+    parser.add_argument('--comments', type=int, default=1000000)
+    parser.add_argument('--recipes', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--likes', type=int, default=20000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--url')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    path = None
+    if not args.url:
+        path = os.path.join(tempfile.mkdtemp(), 'bench_comments.db')
+        args.url = f'sqlite:///{path}'
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = args.url
+    db.init_app(app)
+    rng = random.Random(args.seed)
+
+    with app.app_context():
+        CommentLike.__table__.drop(db.engine, checkfirst=True)
+        CommentLike.__table__.create(db.engine)
+        table = Comment.__table__
+        table.drop(db.engine, checkfirst=True)
+        # Index tạo sau khi nạp (nhanh hơn cập nhật index cho từng dòng)
+        indexes = set(table.indexes)
+        table.indexes.clear()
+        table.create(db.engine)
+        table.indexes.update(indexes)
+
+        started = time.perf_counter()
+        connection = db.engine.raw_connection()
+        try:
+            load(connection, '?' if db.engine.dialect.paramstyle == 'qmark' else '%s', args, rng)
+        finally:
+            connection.close()
+        for index in table.indexes:
+            index.create(db.engine)
+        print(f"Loaded {args.hot + args.comments} comments ({args.hot} on the hot recipe) "
+              f"in {time.perf_counter() - started:.0f}s")
+
+        pages = (args.hot + LIMIT - 1) // LIMIT
+        for sort in ('newest', 'oldest', 'most_liked'):
+            # Cursor của trang giữa và trang cuối: đi hết các trang một lần
+            cursors, cursor = [None], None
+            while True:
+                _, cursor = CommentRepository.get_comments_page('recipe-hot', LIMIT, sort, cursor)
+                if cursor is None:
+                    break
+                cursors.append(cursor)
+            for label, page in (('first', 1), ('middle', pages // 2), ('last', pages)):
+                cursor = cursors[page - 1]
+                measure(f"{sort:<10} cursor, {label} page ({page})", args.repeat,
+                        lambda i: CommentRepository.get_comments_page('recipe-hot', LIMIT, sort, cursor))
+            for label, page in (('first', 1), ('last', pages)):
+                measure(f"{sort:<10} offset, {label} page ({page})", args.repeat,
+                        lambda i: CommentRepository.get_comments_to_recipe('recipe-hot', page, LIMIT, sort))
+
+        hot, _ = CommentRepository.get_comments_page('recipe-hot', LIMIT, 'newest')
+        hot_ids = [c.id for c in hot]
+        Comment.query.filter(Comment.id.in_(hot_ids)).update({Comment.likes_count: 0}, synchronize_session=False)
+        db.session.commit()
+        db.session.remove()
+
+    def like_worker(seed, operations):
+        worker_rng = random.Random(seed)
+        with app.app_context():
+            for _ in range(operations):
+                comment_id = worker_rng.choice(hot_ids)
+                user_id = f'user-{worker_rng.randrange(2000)}'
+                if worker_rng.random() < 0.7:
+                    CommentLikeRepository.like(comment_id, user_id)
+                else:
+                    CommentLikeRepository.unlike(comment_id, user_id)
+            db.session.remove()
+
+    per_thread = args.likes // args.threads
+    workers = [threading.Thread(target=like_worker, args=(args.seed + i, per_thread)) for i in range(args.threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        counts = dict(db.session.query(Comment.id, Comment.likes_count).filter(Comment.id.in_(hot_ids)))
+        edges = dict(db.session.query(CommentLike.comment_id, db.func.count())
+                     .filter(CommentLike.comment_id.in_(hot_ids)).group_by(CommentLike.comment_id))
+        mismatched = [i for i in hot_ids if counts[i] != edges.get(i, 0)]
+        print(f"like/unlike on {len(hot_ids)} comments, {args.threads} threads: "
+              f"{per_thread * args.threads / elapsed:.0f} ops/s, {sum(edges.values())} likes, "
+              f"{len(mismatched)} counters differ from comment_likes")
+        db.session.remove()
+
+    if path:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -18,4 +18,14 @@ class Config:
     # Load yaml config
     yaml_config = load_yaml_config()
     SQLALCHEMY_DATABASE_URI: str = yaml_config['database']['url']
+    RECIPE_SERVICE_URL: str = yaml_config.get('services', {}).get('recipe_service_url', 'http://localhost:8082')
+    # Đẩy tổng hợp rating sang recipe-service (rating_sync.py)
+    RATING_PUSH_SECONDS: float = yaml_config.get('rating_sync', {}).get('push_seconds', 5)
+    RATING_PUSH_BATCH_SIZE: int = yaml_config.get('rating_sync', {}).get('batch_size', 500)
+    # Endpoint /api/internal/*: shared secret trong header X-Internal-Token (giống INTERNAL_API_TOKEN của api-gateway,
+    # biến môi trường INTERNAL_API_TOKEN được ưu tiên); để trống thì chỉ nhận request từ internal.networks
+    INTERNAL_API_TOKEN: str = os.getenv('INTERNAL_API_TOKEN', yaml_config.get('internal', {}).get('api_token') or '')
+    INTERNAL_NETWORKS: list[str] = yaml_config.get('internal', {}).get('networks') or [
+        '127.0.0.0/8', '::1/128', '10.0.0.0/8', '172.16.0.0/12', '192.168.0.0/16'
+    ]
     
\ No newline at end of file
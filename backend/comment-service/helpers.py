@@ -1,6 +1,51 @@
-﻿import random
+﻿import base64
+import hmac
+import ipaddress
+import json
+import random
 import string
+from datetime import datetime
+
+
+# Header chứa shared secret của các request giữa các service
+INTERNAL_TOKEN_HEADER = 'X-Internal-Token'
+
+
+def is_internal_request(remote_addr: str | None, token: str | None, api_token: str, networks: list[str]) -> bool:
+    """Có shared secret thì request phải gửi đúng secret; không có thì chỉ nhận địa chỉ thuộc `networks`"""
+    if api_token:
+        return token is not None and hmac.compare_digest(token.encode(), api_token.encode())
+    try:
+        address = ipaddress.ip_address(remote_addr)
+    except (TypeError, ValueError):
+        return False
+    if address.version == 6 and address.ipv4_mapped is not None:
+        address = address.ipv4_mapped
+    return any(address in ipaddress.ip_network(network, strict=False) for network in networks)
 
 
 def make_random_string(length: int) -> str:
     return ''.join(random.choice(string.ascii_letters + string.digits) for _ in range(length))
+
+
+def encode_cursor(value, id: str, sort: str | None = None) -> str:
+    """Cursor opaque = base64(giá trị cột sort, id, kiểu sort) của phần tử cuối trang"""
+    if isinstance(value, datetime):
+        value = {'$date': value.isoformat()}
+    payload = json.dumps({'s': sort, 'v': value, 'id': id}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, sort: str | None = None) -> tuple:
+    """Trả về (giá trị cột sort, id), raise ValueError nếu cursor sai hoặc không cùng kiểu sort"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode((cursor + '=' * (-len(cursor) % 4)).encode()))
+        value = payload['v']
+        if isinstance(value, dict):
+            value = datetime.fromisoformat(value['$date'])
+        id = str(payload['id'])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Cursor không hợp lệ") from e
+    if payload.get('s') != sort:
+        raise ValueError("Cursor không khớp với kiểu sắp xếp")
+    return value, id
@@ -0,0 +1,125 @@
+"""
+Chuyển dữ liệu dạng list pickle sang bảng quan hệ có index
+
+- users.follower_ids -> bảng follows (+ users.followers_count/following_count)
+- recipes.favorited_user_ids -> bảng favorites (+ recipes.favorites_count)
+
+ensure_schema() tạo bảng, thêm cột bộ đếm và index còn thiếu vào bảng đã có; bảng rating_summaries khi mới tạo được
+tính từ các rating đã có. migrate_legacy_data() chuyển lần lượt từng user/recipe còn dữ liệu cũ, mỗi dòng một
+transaction nên service vẫn chạy bình thường trong lúc chuyển.
+Follow/unfollow/đọc follower của một user (hoặc yêu thích một recipe) chưa chuyển sẽ chuyển dòng đó trước
+(xem FollowRepository/FavoriteRepository); danh sách đang theo dõi / yêu thích của một user chỉ đủ khi chuyển xong
+
+Chạy tay: python migrations.py (app.py cũng chạy ở thread nền khi khởi động)
+"""
+import logging
+import threading
+
+from sqlalchemy import inspect, text
+
+from databases import db
+from models import User, Recipe, RatingSummary
+from repositories import FollowRepository, FavoriteRepository, RatingSummaryRepository
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+# Bảng -> cột bộ đếm thêm vào bảng đã có
+COUNTER_COLUMNS = {
+    'users': ('followers_count', 'following_count'),
+    'recipes': ('favorites_count',),
+}
+# Cột bộ đếm có từ trước nhưng cho phép NULL (comment cũ): NULL -> 0 rồi đặt NOT NULL DEFAULT 0
+NULLABLE_COUNTER_COLUMNS = {
+    'comments': ('likes_count',),
+}
+
+
+def ensure_schema():
+    # create_all chỉ tạo bảng còn thiếu, không thêm cột / index vào bảng đã có
+    had_summaries = inspect(db.engine).has_table(RatingSummary.__tablename__)
+    db.create_all()
+    inspector = inspect(db.engine)
+    with db.engine.begin() as connection:
+        for table, counters in COUNTER_COLUMNS.items():
+            columns = {column['name'] for column in inspector.get_columns(table)}
+            for column in counters:
+                if column not in columns:
+                    connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0"))
+        for table, counters in NULLABLE_COUNTER_COLUMNS.items():
+            nullable = {column['name'] for column in inspector.get_columns(table) if column['nullable']}
+            for column in counters:
+                if column not in nullable:
+                    continue
+                logger.info(f"Backfilling NULL {table}.{column}")
+                connection.execute(text(f"UPDATE {table} SET {column} = 0 WHERE {column} IS NULL"))
+                # SQLite không đổi được ràng buộc của cột: chỉ backfill (mỗi lần khởi động)
+                if connection.dialect.name == 'mysql':
+                    connection.execute(text(f"ALTER TABLE {table} MODIFY {column} INTEGER NOT NULL DEFAULT 0"))
+        for table in db.metadata.sorted_tables:
+            existing = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing:
+                    logger.info(f"Creating index {index.name} on {table.name}")
+                    index.create(connection)
+    if not had_summaries:
+        # Bảng rating_summaries mới tạo: tính từ các rating đã có, rồi đẩy sang recipe-service (rating_sync.py)
+        RatingSummaryRepository.rebuild_all()
+        logger.info("Rating summaries rebuilt from ratings")
+
+
+def _migrate_rows(id_column, legacy_column, migrate, batch_size: int) -> tuple[int, int]:
+    """Gọi migrate(id) cho từng dòng còn dữ liệu cũ, trả về (số quan hệ đã thêm, số dòng còn lại)"""
+    migrated = 0
+    last_id = ''
+    while True:
+        ids = [row[0] for row in db.session.query(id_column)
+               .filter(legacy_column.isnot(None), id_column > last_id)
+               .order_by(id_column).limit(batch_size)]
+        db.session.rollback()
+        if not ids:
+            break
+        for id in ids:
+            try:
+                migrated += migrate(id)
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Error migrating {legacy_column.key} of {id}: {str(e)}")
+        last_id = ids[-1]
+    remaining = db.session.query(id_column).filter(legacy_column.isnot(None)).count()
+    db.session.rollback()
+    return migrated, remaining
+
+
+def migrate_legacy_data(batch_size: int = BATCH_SIZE) -> dict:
+    """Trả về số quan hệ đã thêm vào từng bảng"""
+    follows, remaining = _migrate_rows(User.user_id, User.follower_ids,
+                                       FollowRepository.migrate_legacy_followers, batch_size)
+    if remaining == 0:
+        FollowRepository.legacy_pending = False
+    logger.info(f"Legacy follows migrated: {follows} relations, {remaining} users remaining")
+
+    favorites, remaining = _migrate_rows(Recipe.id, Recipe.favorited_user_ids,
+                                         lambda id: FavoriteRepository.migrate_legacy_favorites([id]), batch_size)
+    if remaining == 0:
+        FavoriteRepository.legacy_pending = False
+    logger.info(f"Legacy favorites migrated: {favorites} relations, {remaining} recipes remaining")
+    return {'follows': follows, 'favorites': favorites}
+
+
+def start_legacy_migration(app):
+    def run():
+        with app.app_context():
+            migrate_legacy_data()
+
+    threading.Thread(target=run, name='legacy-migration', daemon=True).start()
+
+
+if __name__ == '__main__':
+    from app import create_app
+
+    logging.basicConfig(level=logging.INFO)
+    with create_app().app_context():
+        ensure_schema()
+        print(f"Migrated relations: {migrate_legacy_data()}")
@@ -13,46 +13,30 @@ class User(db.Model):
     avatar = db.Column(db.String(255))
     bio = db.Column(db.String(255))
     recipes_count = db.Column(db.Integer)
-    follower_ids = db.Column(db.LargeBinary) # list[User.id]
+    # Định dạng cũ: list[User.id] follower đã pickle, NULL sau khi đã chuyển sang bảng follows (migrations.py)
+    follower_ids = db.Column(db.LargeBinary)
+    # Bộ đếm, cập nhật cùng transaction với bảng follows
+    followers_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    following_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     created_at = db.Column(db.DateTime)
 
     def __init__(self, user_id: str, username: str, full_name: str, avatar: str, bio: str, recipes_count: str,
-                 followers: list[str], created_at: str):
+                 created_at: str):
         self.user_id = user_id
         self.username = username
         self.full_name = full_name
         self.avatar = avatar
         self.bio = bio
         self.recipes_count = recipes_count
-        self.follower_ids = pickle.dumps(followers)
+        self.follower_ids = None
+        self.followers_count = 0
+        self.following_count = 0
         self.created_at = created_at
 
-    def get_followers_count(self):
-        return len(pickle.loads(self.follower_ids))
-
-    def get_following_count(self):
-        return len([u for u in pickle.loads(self.follower_ids) if u.is_favorited_by(self.user_id)])
-
-    def accept_follow_by(self, user_id: str):
-        follower_ids: list[str] = pickle.loads(self.follower_ids)
-
-        if user_id not in follower_ids:
-            follower_ids.append(user_id)
-
-        self.follower_ids = pickle.dumps(follower_ids)
-
-    def accept_unfollow_by(self, user_id: str):
-        follower_ids: list[str] = pickle.loads(self.follower_ids)
-        follower_ids.remove(user_id)
-        self.follower_ids = pickle.dumps(follower_ids)
-
-    def is_favorited_by(self, user_id: str):
-        follower_ids: list[str] = pickle.loads(self.follower_ids)
-        return user_id in follower_ids
+    def get_legacy_follower_ids(self) -> list[str]:
+        return pickle.loads(self.follower_ids) if self.follower_ids is not None else []
 
     def to_dict(self):
-        users: list[User] = User.query.all()
-
         return {
             "user_id": self.user_id,
             "username": self.username,
@@ -60,38 +44,67 @@ class User(db.Model):
             "avatar": self.avatar,
             "bio": self.bio,
             "recipes_count": self.recipes_count,
-            "followers_count": len(pickle.loads(self.follower_ids)),
-            "following_count": len([u for u in users if u.is_favorited_by(self.user_id)]),
+            "followers_count": self.followers_count or 0,
+            "following_count": self.following_count or 0,
             "created_at": self.created_at
         }
 
 
+class Follow(db.Model):
+    """follower_id theo dõi followee_id, mỗi quan hệ một dòng"""
+    __tablename__ = 'follows'
+    # PK (follower_id, followee_id): danh sách đang theo dõi của một user + chống follow trùng
+    follower_id = db.Column(db.String(255), primary_key=True)
+    followee_id = db.Column(db.String(255), primary_key=True)
+    created_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        # Trang follower / following mới nhất trước: đọc thẳng theo index, không sort
+        db.Index('ix_follows_followee_created', 'followee_id', 'created_at', 'follower_id'),
+        db.Index('ix_follows_follower_created', 'follower_id', 'created_at', 'followee_id'),
+    )
+
+    def __init__(self, follower_id: str, followee_id: str, created_at: datetime):
+        self.follower_id = follower_id
+        self.followee_id = followee_id
+        self.created_at = created_at
+
+
 class Comment(db.Model):
     __tablename__ = 'comments'
     id = db.Column(db.String(255), primary_key=True)
-    # Một recipe có thể có nhiều comment, không nên unique
-    recipe_id = db.Column(db.String(255), index=True)
+    # Một recipe có thể có nhiều comment, không nên unique (index: xem __table_args__)
+    recipe_id = db.Column(db.String(255))
     content = db.Column(db.String(255))
     author = db.Column(db.String(255)) # User.id
     images = db.Column(db.LargeBinary) # actually a list[str] underneath!
-    likes_count = db.Column(db.Integer)
+    # Bộ đếm, cập nhật cùng transaction với bảng comment_likes
+    likes_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Không dùng nữa: is_liked tính theo user hiện tại từ bảng comment_likes
     is_liked = db.Column(db.Boolean)
     created_at = db.Column(db.DateTime)
     updated_at = db.Column(db.DateTime)
 
+    __table_args__ = (
+        # Comment của một recipe theo newest/oldest và most_liked: lọc + sắp xếp + keyset đều trên index,
+        # id là cột phụ để thứ tự ổn định
+        db.Index('ix_comments_recipe_created', 'recipe_id', 'created_at', 'id'),
+        db.Index('ix_comments_recipe_likes', 'recipe_id', 'likes_count', 'id'),
+    )
+
     def __init__(self, id: str, recipe_id: str, content: str, author: str, images: list[str],
-                 likes_count: int, is_liked: bool, created_at: datetime, updated_at: datetime):
+                 likes_count: int, created_at: datetime, updated_at: datetime):
         self.id = id
         self.recipe_id = recipe_id
         self.content = content
         self.author = author
         self.images = pickle.dumps(images)
         self.likes_count = likes_count
-        self.is_liked = is_liked
+        self.is_liked = False
         self.created_at = created_at
         self.updated_at = updated_at
 
-    def to_dict(self):
+    def to_dict(self, is_liked: bool = False):
         return {
             "id": self.id,
             "recipe_id": self.recipe_id,
@@ -99,12 +112,26 @@ class Comment(db.Model):
             "author": self.author,
             "images": pickle.loads(self.images),
             "likes_count": self.likes_count,
-            "is_liked": self.is_liked,
+            "is_liked": is_liked,
             "created_at": self.created_at.strftime("%d-%m-%Y %H:%M:%S"),
             "updated_at": self.updated_at.strftime("%d-%m-%Y %H:%M:%S")
         }
 
 
+class CommentLike(db.Model):
+    """user_id thích comment_id, mỗi lượt thích một dòng"""
+    __tablename__ = 'comment_likes'
+    # PK (comment_id, user_id): chống thích trùng + "đã thích comment nào trong trang này" bằng một query
+    comment_id = db.Column(db.String(255), primary_key=True)
+    user_id = db.Column(db.String(255), primary_key=True)
+    created_at = db.Column(db.DateTime, nullable=False)
+
+    def __init__(self, comment_id: str, user_id: str, created_at: datetime):
+        self.comment_id = comment_id
+        self.user_id = user_id
+        self.created_at = created_at
+
+
 class Rating(db.Model):
     __tablename__ = 'ratings'
     # primary key riêng cho rating
@@ -117,6 +144,13 @@ class Rating(db.Model):
     created_at = db.Column(db.DateTime)
     updated_at = db.Column(db.DateTime)
 
+    __table_args__ = (
+        # Trang rating của một recipe, mới nhất trước (keyset theo created_at, id)
+        db.Index('ix_ratings_recipe_created', 'recipe_id', 'created_at', 'id'),
+        # Rating của user hiện tại cho một recipe (ratings/me)
+        db.Index('ix_ratings_recipe_author', 'recipe_id', 'author'),
+    )
+
     def __init__(self, id: str | None, recipe_id: str, rating: int, review: str, author: str,
                  created_at: datetime, updated_at: datetime):
         self.id = id
@@ -138,6 +172,52 @@ class Rating(db.Model):
         }
 
 
+# Số sao hợp lệ của một rating, mỗi mức một cột đếm trong RatingSummary
+RATING_STARS = range(1, 6)
+
+
+class RatingSummary(db.Model):
+    """
+    Tổng hợp rating của một recipe (số rating, tổng điểm, số rating theo từng mức sao)
+    Cập nhật cùng transaction với bảng ratings (cộng/trừ tại chỗ), không phải đọc lại các rating
+    """
+    __tablename__ = 'rating_summaries'
+    recipe_id = db.Column(db.String(255), primary_key=True)
+    ratings_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    ratings_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    stars_1 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    stars_2 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    stars_3 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    stars_4 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    stars_5 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Khởi đầu bằng mili giây epoch và tăng mỗi lần thay đổi; pending = chưa đẩy bản mới nhất sang recipe-service
+    # (rating_sync.py)
+    version = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')
+    pending = db.Column(db.Boolean, nullable=False, default=False, server_default='0')
+
+    __table_args__ = (
+        db.Index('ix_rating_summaries_pending', 'pending', 'recipe_id'),
+    )
+
+    @staticmethod
+    def empty(recipe_id: str) -> 'RatingSummary':
+        """Tổng hợp của recipe chưa có rating nào (chưa có dòng trong bảng)"""
+        return RatingSummary(recipe_id=recipe_id, ratings_count=0, ratings_sum=0, version=0, pending=False,
+                             **{f'stars_{stars}': 0 for stars in RATING_STARS})
+
+    @property
+    def average_rating(self) -> float:
+        return round(self.ratings_sum / self.ratings_count, 2) if self.ratings_count else 0.0
+
+    def to_dict(self):
+        return {
+            "recipeId": self.recipe_id,
+            "averageRating": self.average_rating,
+            "ratingsCount": self.ratings_count,
+            "histogram": {str(stars): getattr(self, f'stars_{stars}') for stars in RATING_STARS},
+        }
+
+
 class Category(db.Model):
     __tablename__ = 'categories'
     id = db.Column(db.String(255), primary_key=True)
@@ -201,11 +281,14 @@ class Recipe(db.Model):
     servings = db.Column(db.Integer)
     average_ratings = db.Column(db.Float)
     ratings_count = db.Column(db.Integer)
-    favorited_user_ids = db.Column(db.LargeBinary) # list[User.id]
+    # Định dạng cũ: list[User.id] đã pickle, NULL sau khi đã chuyển sang bảng favorites (migrations.py)
+    favorited_user_ids = db.Column(db.LargeBinary)
+    # Bộ đếm, cập nhật cùng transaction với bảng favorites
+    favorites_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     def __init__(self, id: str, title: str, description: str, thumbnail: str, author: str,
                  category: str, difficulty: str, cooking_time: int, ratings_count: int,
-                 servings: int, average_ratings: float, rating_count: int, favorited_user_ids: list[str]):
+                 servings: int, average_ratings: float, rating_count: int):
         self.id = id
         self.title = title
         self.description = description
@@ -218,24 +301,11 @@ class Recipe(db.Model):
         self.servings = servings
         self.average_ratings = average_ratings
         self.rating_count = rating_count
-        self.favorited_user_ids = pickle.dumps(favorited_user_ids)
-
-    def set_as_favorite_of(self, user_id: str):
-        favorited_user_ids: list[str] = pickle.loads(self.favorited_user_ids)
-
-        if user_id not in favorited_user_ids:
-            favorited_user_ids.append(user_id)
+        self.favorited_user_ids = None
+        self.favorites_count = 0
 
-        self.favorited_user_ids = pickle.dumps(favorited_user_ids)
-
-    def unset_as_favorite_of(self, user_id: str):
-        favorited_user_ids: list[str] = pickle.loads(self.favorited_user_ids)
-        favorited_user_ids.append(user_id)
-        self.favorited_user_ids = pickle.dumps(favorited_user_ids)
-
-    def is_favorited_by(self, user_id: str):
-        favorited_user_ids: list[str] = pickle.loads(self.favorited_user_ids)
-        return user_id in favorited_user_ids
+    def get_legacy_favorited_user_ids(self) -> list[str]:
+        return pickle.loads(self.favorited_user_ids) if self.favorited_user_ids is not None else []
 
     def to_dict(self):
         return {
@@ -250,25 +320,30 @@ class Recipe(db.Model):
             "ratingsCount": self.ratings_count,
             "servings": self.servings,
             "averageRatings": self.average_ratings,
-            "ratingCount": self.rating_count,
-            "favoritedUserIds": pickle.loads(self.favorited_user_ids)
+            "ratingCount": self.ratings_count,
+            "favoritesCount": self.favorites_count or 0
         }
 
-    def to_dict_for(self, user_id: str):
-        favorited_user_ids: list[str] = pickle.loads(self.favorited_user_ids)
+    def to_dict_for(self, is_favorited: bool):
+        return {**self.to_dict(), "isFavorited": is_favorited}
 
-        return {
-            "id": self.id,
-            "title": self.title,
-            "description": self.description,
-            "thumbnail": self.thumbnail,
-            "author": self.author,
-            "category": self.category,
-            "difficulty": self.difficulty,
-            "cookingTime": self.cooking_time,
-            "ratingsCount": self.ratings_count,
-            "servings": self.servings,
-            "averageRatings": self.average_ratings,
-            "ratingCount": self.rating_count,
-            "isFavorited": user_id in favorited_user_ids
-        }
+
+class Favorite(db.Model):
+    """user_id yêu thích recipe_id, mỗi quan hệ một dòng"""
+    __tablename__ = 'favorites'
+    # PK (user_id, recipe_id): kiểm tra isFavorited cho cả trang recipe bằng một query + chống trùng
+    user_id = db.Column(db.String(255), primary_key=True)
+    recipe_id = db.Column(db.String(255), primary_key=True)
+    created_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        # Trang yêu thích của một user, mới nhất trước (keyset theo created_at, recipe_id)
+        db.Index('ix_favorites_user_created', 'user_id', 'created_at', 'recipe_id'),
+        # Đếm / liệt kê người yêu thích một recipe
+        db.Index('ix_favorites_recipe', 'recipe_id', 'user_id'),
+    )
+
+    def __init__(self, user_id: str, recipe_id: str, created_at: datetime):
+        self.user_id = user_id
+        self.recipe_id = recipe_id
+        self.created_at = created_at
@@ -0,0 +1,59 @@
+"""
+Đẩy tổng hợp rating (RatingSummary) sang recipe-service: Recipe.averageRating / ratingsCount
+
+- Tạo/sửa/xóa rating chỉ cập nhật RatingSummary trong cùng transaction và đánh dấu pending
+- Thread nền mỗi RATING_PUSH_SECONDS giây đọc các tổng hợp pending theo lô RATING_PUSH_BATCH_SIZE, gửi cả lô trong một
+  request (recipe-service ghi bằng một bulk_write), chép sang bảng recipes của service này rồi bỏ pending
+- Recipe được rating nhiều lần giữa hai lần đẩy chỉ được gửi một lần, với giá trị mới nhất
+- Lỗi mạng / recipe-service không chạy: giữ pending, đẩy lại ở lần sau (gửi giá trị tuyệt đối + version nên gửi lại
+  không làm sai số liệu)
+"""
+import logging
+import threading
+import time
+
+from config import Config
+from databases import db
+from recipe_client import push_rating_summaries
+from repositories import RatingSummaryRepository, RecipeRepository
+
+logger = logging.getLogger(__name__)
+
+
+def push_pending(batch_size: int = Config.RATING_PUSH_BATCH_SIZE) -> int:
+    """Đẩy một lượt mọi tổng hợp pending, trả về số recipe đã đẩy"""
+    pushed = 0
+    last_id = ''
+    while True:
+        summaries = RatingSummaryRepository.get_pending(batch_size, last_id)
+        if not summaries:
+            break
+        ok = push_rating_summaries([
+            {"recipeId": s.recipe_id, "averageRating": s.average_rating, "ratingsCount": s.ratings_count,
+             "version": s.version}
+            for s in summaries
+        ])
+        if not ok:
+            db.session.rollback()
+            break
+        last_id = summaries[-1].recipe_id
+        RecipeRepository.update_ratings(summaries)
+        RatingSummaryRepository.mark_pushed(summaries)
+        pushed += len(summaries)
+    return pushed
+
+
+def start_rating_sync(app, interval: float = Config.RATING_PUSH_SECONDS):
+    def run():
+        while True:
+            time.sleep(interval)
+            with app.app_context():
+                try:
+                    pushed = push_pending()
+                    if pushed:
+                        logger.info(f"Pushed {pushed} rating summaries to recipe-service")
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error(f"Error pushing rating summaries: {str(e)}")
+
+    threading.Thread(target=run, name='rating-sync', daemon=True).start()
@@ -0,0 +1,33 @@
+import logging
+
+import requests
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def request_feed_rebuild(user_id: str):
+    """
+    Báo recipe-service dựng lại feed của user sau khi follow/unfollow
+    Best effort: nếu lỗi, feed vẫn được dựng lại định kỳ ở recipe-service
+    """
+    try:
+        requests.post(f"{Config.RECIPE_SERVICE_URL}/internal/feed/{user_id}/rebuild", timeout=2)
+    except requests.RequestException as e:
+        logger.warning(f"Error requesting feed rebuild for {user_id}: {str(e)}")
+
+
+def push_rating_summaries(summaries: list[dict]) -> bool:
+    """
+    Gửi averageRating/ratingsCount mới của nhiều recipe trong một request (POST /internal/recipes/ratings)
+    Mỗi phần tử có version: recipe-service bỏ qua bản cũ hơn bản đã ghi. False nếu lỗi (đẩy lại ở lần sau)
+    """
+    try:
+        response = requests.post(f"{Config.RECIPE_SERVICE_URL}/internal/recipes/ratings",
+                                 json={"ratings": summaries}, timeout=10)
+        response.raise_for_status()
+        return True
+    except requests.RequestException as e:
+        logger.warning(f"Error pushing {len(summaries)} rating summaries: {str(e)}")
+        return False
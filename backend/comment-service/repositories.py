@@ -1,29 +1,97 @@
+import time
+from datetime import datetime, timedelta
+from operator import gt, lt
+
+from sqlalchemy import bindparam, case, delete, func, insert, literal, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+
 from databases import db
+from helpers import encode_cursor, decode_cursor
 from models import *
 
+# Số phần tử tối đa trong một mệnh đề IN / một lần insert
+CHUNK_SIZE = 500
+
+
+def _chunks(items: list, size: int = CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _version_seed() -> int:
+    """
+    Version khởi đầu của RatingSummary (mili giây epoch): lớn hơn version đã đẩy sang recipe-service trước đó
+    kể cả khi dòng được tạo lại (rebuild_all), nên lần đẩy sau không bị bỏ qua vì cũ
+    """
+    return int(time.time() * 1000)
+
+
+def _page(query, page: int | None, limit_per_page: int | None):
+    if page is None or limit_per_page is None:
+        return query
+    return query.offset((max(page, 1) - 1) * limit_per_page).limit(limit_per_page)
+
+
+def _keyset_after(column, value, id_column, id: str, after):
+    """
+    Điều kiện "sau (value, id)" theo thứ tự (column, id_column), after = lt (giảm dần) hoặc gt (tăng dần)
+    So sánh row value (column, id) < (value, id): MySQL/SQLite đọc thẳng một khoảng của index, kể cả khi
+    nhiều dòng trùng value (vd likes_count = 0), thay vì quét lại từ đầu
+    """
+    return after(tuple_(column, id_column), tuple_(value, id))
+
+
+def _insert_missing_edges(model, owner_column, owner_id: str, member_column, member_ids: list[str]) -> list[str]:
+    """
+    Thêm các quan hệ (owner_id, member) chưa có trong bảng, trả về các member đã thêm
+    Dữ liệu pickle cũ không có thời điểm tạo: giữ thứ tự của danh sách (phần tử cuối là mới nhất)
+    """
+    existing: set[str] = set()
+    for chunk in _chunks(member_ids):
+        existing.update(row[0] for row in db.session.query(member_column)
+                        .filter(owner_column == owner_id, member_column.in_(chunk)))
+    new = [m for m in member_ids if m not in existing]
+
+    now = datetime.now()
+    rows = [{owner_column.key: owner_id, member_column.key: m, 'created_at': now - timedelta(microseconds=len(new) - i)}
+            for i, m in enumerate(new)]
+    for chunk in _chunks(rows):
+        db.session.execute(insert(model), chunk)
+    return new
+
+
+def _retry_on_conflict(migrate, id: str) -> int:
+    """Request song song chèn cùng quan hệ trong lúc chuyển dữ liệu cũ: đọc lại và thử thêm một lần"""
+    try:
+        return migrate(id)
+    except IntegrityError:
+        db.session.rollback()
+        return migrate(id)
+
 
 class UserRepository:
     @staticmethod
     def get_by_id(id: str) -> User:
         return User.query.filter_by(user_id=id).first()
 
+    @staticmethod
+    def get_by_ids(ids: list[str]) -> dict[str, User]:
+        users: dict[str, User] = {}
+        for chunk in _chunks(ids):
+            users.update((u.user_id, u) for u in User.query.filter(User.user_id.in_(chunk)))
+        return users
+
     @staticmethod
     def all() -> list[User]:
         return User.query.all()
 
     @staticmethod
-    def get_followers_of(user_id: str, page: int, limit_per_page: int) -> list[User]:
-        users: list[User] = (User.query.filter_by(user_id=user_id)
-                             .paginate(page=page, per_page=limit_per_page, error_out=False))
-
-        return users
+    def get_follower_ids(user_id: str) -> list[str]:
+        return FollowRepository.get_follower_ids(user_id)
 
     @staticmethod
-    def get_users_following(user_id: str, page: int, limit_per_page: int) -> list[User]:
-        users: list[User] = (User.query.filter_by(user_id=user_id)
-                             .paginate(page=page, per_page=limit_per_page, error_out=False))
-
-        return users
+    def get_following_ids(user_id: str) -> list[str]:
+        return FollowRepository.get_following_ids(user_id)
 
     @staticmethod
     def save(user: User):
@@ -31,6 +99,118 @@ class UserRepository:
         db.session.commit()
 
 
+class FollowRepository:
+    # Còn user có follower_ids dạng pickle chưa chuyển sang bảng follows (migrations.py đặt False khi xong)
+    legacy_pending = True
+
+    @staticmethod
+    def exists(follower_id: str, followee_id: str) -> bool:
+        return db.session.get(Follow, (follower_id, followee_id)) is not None
+
+    @staticmethod
+    def follow(follower_id: str, followee_id: str) -> bool:
+        """Thêm quan hệ và tăng bộ đếm trong cùng transaction, False nếu đã follow từ trước"""
+        FollowRepository.migrate_legacy_followers(followee_id)
+        if FollowRepository.exists(follower_id, followee_id):
+            return False
+        db.session.add(Follow(follower_id, followee_id, datetime.now()))
+        try:
+            db.session.flush()
+        except IntegrityError:
+            # Request song song đã thêm cùng quan hệ
+            db.session.rollback()
+            return False
+        FollowRepository._add_counts([follower_id], followee_id, 1)
+        db.session.commit()
+        return True
+
+    @staticmethod
+    def unfollow(follower_id: str, followee_id: str) -> bool:
+        """Xóa quan hệ và giảm bộ đếm trong cùng transaction, False nếu chưa follow"""
+        FollowRepository.migrate_legacy_followers(followee_id)
+        deleted = (Follow.query.filter_by(follower_id=follower_id, followee_id=followee_id)
+                   .delete(synchronize_session=False))
+        if deleted:
+            FollowRepository._add_counts([follower_id], followee_id, -1)
+        db.session.commit()
+        return deleted > 0
+
+    @staticmethod
+    def _add_counts(follower_ids: list[str], followee_id: str, delta: int):
+        """followers_count của followee += delta cho mỗi follower, following_count của từng follower += delta"""
+        (User.query.filter_by(user_id=followee_id)
+         .update({User.followers_count: User.followers_count + delta * len(follower_ids)},
+                 synchronize_session=False))
+        for chunk in _chunks(follower_ids):
+            (User.query.filter(User.user_id.in_(chunk))
+             .update({User.following_count: User.following_count + delta}, synchronize_session=False))
+
+    @staticmethod
+    def count_followers(user_id: str) -> int:
+        FollowRepository.migrate_legacy_followers(user_id)
+        user = db.session.get(User, user_id)
+        if user is not None:
+            return user.followers_count
+        return Follow.query.filter_by(followee_id=user_id).count()
+
+    @staticmethod
+    def count_following(user_id: str) -> int:
+        user = db.session.get(User, user_id)
+        if user is not None:
+            return user.following_count
+        return Follow.query.filter_by(follower_id=user_id).count()
+
+    @staticmethod
+    def get_follower_ids(user_id: str, page: int | None = None, limit_per_page: int | None = None) -> list[str]:
+        """Id follower mới nhất trước (index ix_follows_followee_created), không truyền page thì lấy hết"""
+        FollowRepository.migrate_legacy_followers(user_id)
+        query = (db.session.query(Follow.follower_id).filter(Follow.followee_id == user_id)
+                 .order_by(Follow.created_at.desc(), Follow.follower_id.desc()))
+        return [row[0] for row in _page(query, page, limit_per_page)]
+
+    @staticmethod
+    def get_following_ids(user_id: str, page: int | None = None, limit_per_page: int | None = None) -> list[str]:
+        """Id user đang theo dõi, mới nhất trước (index ix_follows_follower_created)"""
+        query = (db.session.query(Follow.followee_id).filter(Follow.follower_id == user_id)
+                 .order_by(Follow.created_at.desc(), Follow.followee_id.desc()))
+        return [row[0] for row in _page(query, page, limit_per_page)]
+
+    @staticmethod
+    def migrate_legacy_followers(user_id: str) -> int:
+        """
+        Chuyển follower_ids (pickle) của một user sang bảng follows nếu chưa chuyển, trả về số quan hệ thêm mới
+        Gọi trước mọi thao tác đọc/ghi follower của user để quan hệ cũ không bị mất hay sống lại sau unfollow
+        """
+        if not FollowRepository.legacy_pending:
+            return 0
+        pending = (db.session.query(User.user_id)
+                   .filter(User.user_id == user_id, User.follower_ids.isnot(None)).first())
+        if pending is None:
+            return 0
+        return _retry_on_conflict(FollowRepository._migrate_legacy_followers, user_id)
+
+    @staticmethod
+    def _migrate_legacy_followers(user_id: str) -> int:
+        user = db.session.get(User, user_id, with_for_update=True)
+        if user is None or user.follower_ids is None:
+            db.session.rollback()
+            return 0
+        legacy = [f for f in dict.fromkeys(user.get_legacy_follower_ids()) if isinstance(f, str) and f != user_id]
+        new = _insert_missing_edges(Follow, Follow.followee_id, user_id, Follow.follower_id, legacy)
+        FollowRepository._add_counts(new, user_id, 1)
+        user.follower_ids = None
+        db.session.commit()
+        return len(new)
+
+
+# sort -> (cột sort, chiều); id là cột phụ cùng chiều (index ix_comments_recipe_created / ix_comments_recipe_likes)
+COMMENT_SORTS = {
+    'newest': (Comment.created_at, -1),
+    'oldest': (Comment.created_at, 1),
+    'most_liked': (Comment.likes_count, -1),
+}
+
+
 class CommentRepository:
     @staticmethod
     def get_all_comments() -> list[Comment]:
@@ -40,22 +220,44 @@ class CommentRepository:
     def get_by_id(id: str) -> Comment:
         return Comment.query.filter_by(id=id).first()
 
+    @staticmethod
+    def exists(id: str) -> bool:
+        return db.session.query(Comment.id).filter_by(id=id).first() is not None
+
+    @staticmethod
+    def _ordered_comments_of(recipe_id: str, sorting_criteria: str):
+        if sorting_criteria not in COMMENT_SORTS:
+            raise ValueError(f"Unknown sorting criteria '{sorting_criteria}'!")
+        column, direction = COMMENT_SORTS[sorting_criteria]
+        order = (column.desc(), Comment.id.desc()) if direction < 0 else (column.asc(), Comment.id.asc())
+        return Comment.query.filter(Comment.recipe_id == recipe_id).order_by(*order)
+
     @staticmethod
     def get_comments_to_recipe(recipe_id: str, page: int, limit_per_page: int,
                                sorting_criteria: str) -> list[Comment]:
-        comments: list[Comment] = Comment.query.paginate(page=page, per_page=limit_per_page, error_out=False)
-        result: list[Comment] = [c for c in comments if c.recipe_id == recipe_id]
-
-        if sorting_criteria == "newest":
-            result.sort(key=lambda c: c.created_at, reverse=True)
-        elif sorting_criteria == "oldest":
-            result.sort(key=lambda c: c.created_at, reverse=False)
-        elif sorting_criteria == "most_liked":
-            result.sort(key=lambda c: c.likes_count, reverse=True)
-        else:
-            raise Exception(f"Unknown sorting criteria '{sorting_criteria}'!")
+        """Trang thứ `page` (offset): lọc và sắp xếp trong database"""
+        query = CommentRepository._ordered_comments_of(recipe_id, sorting_criteria)
+        return _page(query, page, limit_per_page).all()
 
-        return result
+    @staticmethod
+    def get_comments_page(recipe_id: str, limit: int, sorting_criteria: str,
+                          cursor: str | None = None) -> tuple[list[Comment], str | None]:
+        """
+        Keyset pagination: trang sau phần tử cuối của trang trước (cursor), đọc thẳng theo index
+        nên trang thứ 5000 của một recipe cũng nhanh như trang đầu. Trả về (comments, nextCursor)
+        """
+        query = CommentRepository._ordered_comments_of(recipe_id, sorting_criteria)
+        column, direction = COMMENT_SORTS[sorting_criteria]
+        if cursor:
+            value, comment_id = decode_cursor(cursor, sorting_criteria)
+            after = lt if direction < 0 else gt
+            query = query.filter(_keyset_after(column, value, Comment.id, comment_id, after))
+        # Lấy thêm 1 phần tử để biết còn trang sau không
+        comments = query.limit(limit + 1).all()
+        if len(comments) <= limit:
+            return comments, None
+        last = comments[limit - 1]
+        return comments[:limit], encode_cursor(getattr(last, column.key), last.id, sorting_criteria)
 
     @staticmethod
     def save(comment: Comment):
@@ -64,10 +266,63 @@ class CommentRepository:
 
     @staticmethod
     def delete(comment: Comment):
+        CommentLike.query.filter_by(comment_id=comment.id).delete(synchronize_session=False)
         db.session.delete(comment)
         db.session.commit()
 
 
+class CommentLikeRepository:
+    # Câu lệnh dựng sẵn một lần, chạy thẳng trên connection của session (không qua ORM) cho đường like/unlike
+    _insert_like = insert(CommentLike).values(comment_id=bindparam('comment_id'), user_id=bindparam('user_id'),
+                                              created_at=bindparam('created_at'))
+    _delete_like = delete(CommentLike).where(CommentLike.comment_id == bindparam('comment_id'),
+                                             CommentLike.user_id == bindparam('user_id'))
+    _add_likes = (update(Comment).where(Comment.id == bindparam('comment_id'))
+                  .values(likes_count=func.coalesce(Comment.likes_count, 0) + bindparam('delta')))
+
+    @staticmethod
+    def like(comment_id: str, user_id: str) -> bool:
+        """
+        Thêm lượt thích và tăng likes_count (UPDATE ... + 1, không đọc-sửa-ghi) trong cùng transaction
+        False nếu user đã thích từ trước: PK (comment_id, user_id) chặn cả request song song
+        """
+        connection = db.session.connection()
+        try:
+            connection.execute(CommentLikeRepository._insert_like,
+                               {'comment_id': comment_id, 'user_id': user_id, 'created_at': datetime.now()})
+        except IntegrityError:
+            db.session.rollback()
+            return False
+        connection.execute(CommentLikeRepository._add_likes, {'comment_id': comment_id, 'delta': 1})
+        db.session.commit()
+        return True
+
+    @staticmethod
+    def unlike(comment_id: str, user_id: str) -> bool:
+        """Xóa lượt thích và giảm likes_count trong cùng transaction, False nếu chưa thích"""
+        connection = db.session.connection()
+        deleted = connection.execute(CommentLikeRepository._delete_like,
+                                     {'comment_id': comment_id, 'user_id': user_id}).rowcount
+        if deleted:
+            connection.execute(CommentLikeRepository._add_likes, {'comment_id': comment_id, 'delta': -1})
+        db.session.commit()
+        return deleted > 0
+
+    @staticmethod
+    def count_likes(comment_id: str) -> int:
+        likes_count = db.session.query(Comment.likes_count).filter_by(id=comment_id).scalar()
+        return likes_count or 0
+
+    @staticmethod
+    def get_liked_ids(user_id: str, comment_ids: list[str]) -> set[str]:
+        """Các comment trong comment_ids mà user đã thích: một query theo PK (comment_id, user_id)"""
+        liked: set[str] = set()
+        for chunk in _chunks(list(dict.fromkeys(comment_ids))):
+            liked.update(row[0] for row in db.session.query(CommentLike.comment_id)
+                         .filter(CommentLike.user_id == user_id, CommentLike.comment_id.in_(chunk)))
+        return liked
+
+
 class RatingRepository:
     @staticmethod
     def get_by_id(id: str) -> Rating:
@@ -82,17 +337,128 @@ class RatingRepository:
         return Rating.query.filter_by(author=author_id, recipe_id=recipe_id).first()
 
     @staticmethod
-    def get_all_of_recipe_id(recipe_id: str) -> list[Rating]:
-        return list(Rating.query.filter_by(recipe_id=recipe_id).all())
+    def _newest_ratings_of(recipe_id: str):
+        return Rating.query.filter(Rating.recipe_id == recipe_id).order_by(Rating.created_at.desc(), Rating.id.desc())
+
+    @staticmethod
+    def get_ratings_of_recipe(recipe_id: str, page: int, limit_per_page: int) -> list[Rating]:
+        """Trang thứ `page` (offset), mới nhất trước"""
+        return _page(RatingRepository._newest_ratings_of(recipe_id), page, limit_per_page).all()
+
+    @staticmethod
+    def get_ratings_page(recipe_id: str, limit: int, cursor: str | None = None) -> tuple[list[Rating], str | None]:
+        """Keyset pagination theo index ix_ratings_recipe_created, trả về (ratings, nextCursor)"""
+        query = RatingRepository._newest_ratings_of(recipe_id)
+        if cursor:
+            created_at, rating_id = decode_cursor(cursor)
+            query = query.filter(_keyset_after(Rating.created_at, created_at, Rating.id, rating_id, lt))
+        ratings = query.limit(limit + 1).all()
+        if len(ratings) <= limit:
+            return ratings, None
+        last = ratings[limit - 1]
+        return ratings[:limit], encode_cursor(last.created_at, last.id)
 
     @staticmethod
-    def save(rating: Rating):
+    def create(rating: Rating):
         db.session.add(rating)
+        RatingSummaryRepository.adjust(rating.recipe_id, 1, added=rating.rating)
         db.session.commit()
 
     @staticmethod
-    def delete(rating: Rating):
-        db.session.delete(rating)
+    def update(rating: Rating, value: int, review: str) -> Rating | None:
+        """
+        Sửa điểm + review, cộng phần chênh lệch vào RatingSummary trong cùng transaction
+        UPDATE chỉ khớp khi điểm vẫn là giá trị vừa đọc: request song song sửa cùng rating thì đọc lại và thử lại
+        None nếu rating đã bị xóa
+        """
+        while rating is not None:
+            rating_id, old = rating.id, rating.rating
+            updated = db.session.execute(
+                update(Rating).where(Rating.id == rating_id, Rating.rating.is_not_distinct_from(old))
+                .values(rating=value, review=review, updated_at=datetime.now())
+            ).rowcount
+            if updated:
+                RatingSummaryRepository.adjust(rating.recipe_id, 0, removed=old, added=value)
+                db.session.commit()
+                return rating
+            db.session.rollback()
+            rating = RatingRepository.get_by_id(rating_id)
+        return None
+
+    @staticmethod
+    def delete(rating: Rating) -> bool:
+        """Xóa rating và trừ khỏi RatingSummary trong cùng transaction, False nếu đã bị xóa"""
+        while rating is not None:
+            rating_id, old = rating.id, rating.rating
+            deleted = db.session.execute(
+                delete(Rating).where(Rating.id == rating_id, Rating.rating.is_not_distinct_from(old))
+            ).rowcount
+            if deleted:
+                RatingSummaryRepository.adjust(rating.recipe_id, -1, removed=old)
+                db.session.commit()
+                return True
+            db.session.rollback()
+            rating = RatingRepository.get_by_id(rating_id)
+        return False
+
+
+class RatingSummaryRepository:
+    @staticmethod
+    def get(recipe_id: str) -> RatingSummary | None:
+        return db.session.get(RatingSummary, recipe_id)
+
+    @staticmethod
+    def adjust(recipe_id: str, count_delta: int, removed: int | None = None, added: int | None = None):
+        """
+        Cộng thay đổi của một rating (bỏ điểm removed, thêm điểm added) vào RatingSummary của recipe: một UPDATE
+        tại chỗ (không đọc-sửa-ghi), tạo dòng nếu recipe chưa có. Gọi trong transaction ghi bảng ratings
+        """
+        changes = {'ratings_count': count_delta, 'ratings_sum': (added or 0) - (removed or 0)}
+        for stars, delta in ((removed, -1), (added, 1)):
+            if stars in RATING_STARS:
+                changes[f'stars_{stars}'] = changes.get(f'stars_{stars}', 0) + delta
+        values = {column: getattr(RatingSummary, column) + delta for column, delta in changes.items() if delta}
+        statement = (update(RatingSummary).where(RatingSummary.recipe_id == recipe_id)
+                     .values(**values, version=RatingSummary.version + 1, pending=True)
+                     .execution_options(synchronize_session=False))
+        if db.session.execute(statement).rowcount:
+            return
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(RatingSummary).values(recipe_id=recipe_id, version=_version_seed(), pending=True,
+                                                            **changes))
+        except IntegrityError:
+            # Request song song vừa tạo dòng của recipe này
+            db.session.execute(statement)
+
+    @staticmethod
+    def get_pending(limit: int, after: str = '') -> list[RatingSummary]:
+        """Các tổng hợp chưa đẩy sang recipe-service, theo recipe_id (index ix_rating_summaries_pending)"""
+        return (RatingSummary.query.filter(RatingSummary.pending.is_(True), RatingSummary.recipe_id > after)
+                .order_by(RatingSummary.recipe_id).limit(limit).all())
+
+    @staticmethod
+    def mark_pushed(summaries: list[RatingSummary]):
+        """Bỏ pending của các tổng hợp đã đẩy, trừ dòng đã đổi (version mới) trong lúc đẩy"""
+        pushed = [(s.recipe_id, s.version) for s in summaries]
+        for chunk in _chunks(pushed):
+            db.session.execute(update(RatingSummary)
+                               .where(tuple_(RatingSummary.recipe_id, RatingSummary.version).in_(chunk))
+                               .values(pending=False).execution_options(synchronize_session=False))
+        db.session.commit()
+
+    @staticmethod
+    def rebuild_all():
+        """Tính lại mọi RatingSummary từ bảng ratings (một INSERT ... SELECT GROUP BY), tất cả đều pending"""
+        stars = [func.sum(case((Rating.rating == s, 1), else_=0)) for s in RATING_STARS]
+        version = max(_version_seed(), (db.session.query(func.max(RatingSummary.version)).scalar() or 0) + 1)
+        rows = (select(Rating.recipe_id, func.count(), func.coalesce(func.sum(Rating.rating), 0), *stars,
+                       literal(version), literal(True))
+                .group_by(Rating.recipe_id))
+        columns = ['recipe_id', 'ratings_count', 'ratings_sum', *(f'stars_{s}' for s in RATING_STARS),
+                   'version', 'pending']
+        db.session.execute(delete(RatingSummary))
+        db.session.execute(insert(RatingSummary).from_select(columns, rows))
         db.session.commit()
 
 
@@ -102,11 +468,121 @@ class RecipeRepository:
         return Recipe.query.filter_by(id=id).first()
 
     @staticmethod
-    def get_liked_recipes_of(user_id: str, page: int, limit_per_page: int) -> list[Recipe]:
-        recipes: list[Recipe] = Recipe.query.paginate(page=page, per_page=limit_per_page, error_out=False)
-        return [r for r in recipes if r.is_favorited_by(user_id)]
+    def get_by_ids(ids: list[str]) -> dict[str, Recipe]:
+        recipes: dict[str, Recipe] = {}
+        for chunk in _chunks(ids):
+            recipes.update((r.id, r) for r in Recipe.query.filter(Recipe.id.in_(chunk)))
+        return recipes
+
+    # Bản sao averageRating / ratingsCount ở bảng recipes của service này (danh sách yêu thích)
+    _set_ratings = (update(Recipe.__table__).where(Recipe.__table__.c.id == bindparam('recipe_id'))
+                    .values(average_ratings=bindparam('average_rating'), ratings_count=bindparam('count')))
+
+    @staticmethod
+    def update_ratings(summaries: list[RatingSummary]):
+        """Chép averageRating / ratingsCount từ RatingSummary vào các recipe (một executemany, chưa commit)"""
+        if summaries:
+            db.session.execute(RecipeRepository._set_ratings, [
+                {'recipe_id': s.recipe_id, 'average_rating': s.average_rating, 'count': s.ratings_count}
+                for s in summaries
+            ])
 
     @staticmethod
     def save(recipe: Recipe):
         db.session.add(recipe)
         db.session.commit()
+
+
+class FavoriteRepository:
+    # Còn recipe có favorited_user_ids dạng pickle chưa chuyển sang bảng favorites (migrations.py đặt False khi xong)
+    legacy_pending = True
+
+    @staticmethod
+    def favorite(user_id: str, recipe_id: str) -> bool:
+        """Thêm quan hệ và tăng favorites_count trong cùng transaction, False nếu đã yêu thích từ trước"""
+        FavoriteRepository.migrate_legacy_favorites([recipe_id])
+        if db.session.get(Favorite, (user_id, recipe_id)) is not None:
+            return False
+        db.session.add(Favorite(user_id, recipe_id, datetime.now()))
+        try:
+            db.session.flush()
+        except IntegrityError:
+            # Request song song đã thêm cùng quan hệ
+            db.session.rollback()
+            return False
+        FavoriteRepository._add_count(recipe_id, 1)
+        db.session.commit()
+        return True
+
+    @staticmethod
+    def unfavorite(user_id: str, recipe_id: str) -> bool:
+        """Xóa quan hệ và giảm favorites_count trong cùng transaction, False nếu chưa yêu thích"""
+        FavoriteRepository.migrate_legacy_favorites([recipe_id])
+        deleted = (Favorite.query.filter_by(user_id=user_id, recipe_id=recipe_id)
+                   .delete(synchronize_session=False))
+        if deleted:
+            FavoriteRepository._add_count(recipe_id, -1)
+        db.session.commit()
+        return deleted > 0
+
+    @staticmethod
+    def _add_count(recipe_id: str, delta: int):
+        (Recipe.query.filter_by(id=recipe_id)
+         .update({Recipe.favorites_count: Recipe.favorites_count + delta}, synchronize_session=False))
+
+    @staticmethod
+    def count_favorites(recipe_id: str) -> int:
+        FavoriteRepository.migrate_legacy_favorites([recipe_id])
+        recipe = db.session.get(Recipe, recipe_id)
+        if recipe is not None:
+            return recipe.favorites_count
+        return Favorite.query.filter_by(recipe_id=recipe_id).count()
+
+    @staticmethod
+    def get_favorites_of(user_id: str, limit: int, cursor: str | None = None) -> tuple[list[Favorite], bool]:
+        """
+        Trang yêu thích mới nhất trước, keyset theo (created_at, recipe_id) của phần tử cuối trang trước
+        (index ix_favorites_user_created, không skip). Trả về (favorites, còn trang sau)
+        """
+        query = Favorite.query.filter(Favorite.user_id == user_id)
+        if cursor:
+            created_at, recipe_id = decode_cursor(cursor)
+            query = query.filter(_keyset_after(Favorite.created_at, created_at, Favorite.recipe_id, recipe_id, lt))
+        # Lấy thêm 1 phần tử để biết còn trang sau không
+        favorites = query.order_by(Favorite.created_at.desc(), Favorite.recipe_id.desc()).limit(limit + 1).all()
+        return favorites[:limit], len(favorites) > limit
+
+    @staticmethod
+    def get_favorited_ids(user_id: str, recipe_ids: list[str]) -> set[str]:
+        """Các recipe trong recipe_ids mà user đã yêu thích: một query theo PK (user_id, recipe_id)"""
+        FavoriteRepository.migrate_legacy_favorites(recipe_ids)
+        favorited: set[str] = set()
+        for chunk in _chunks(list(dict.fromkeys(recipe_ids))):
+            favorited.update(row[0] for row in db.session.query(Favorite.recipe_id)
+                             .filter(Favorite.user_id == user_id, Favorite.recipe_id.in_(chunk)))
+        return favorited
+
+    @staticmethod
+    def migrate_legacy_favorites(recipe_ids: list[str]) -> int:
+        """
+        Chuyển favorited_user_ids (pickle) của các recipe chưa chuyển sang bảng favorites, trả về số quan hệ thêm mới
+        Gọi trước mọi thao tác đọc/ghi yêu thích của recipe để quan hệ cũ không bị mất hay sống lại sau unfavorite
+        """
+        if not FavoriteRepository.legacy_pending or not recipe_ids:
+            return 0
+        pending = [row[0] for chunk in _chunks(recipe_ids) for row in db.session.query(Recipe.id)
+                   .filter(Recipe.id.in_(chunk), Recipe.favorited_user_ids.isnot(None))]
+        return sum(_retry_on_conflict(FavoriteRepository._migrate_legacy_favorites, id) for id in pending)
+
+    @staticmethod
+    def _migrate_legacy_favorites(recipe_id: str) -> int:
+        recipe = db.session.get(Recipe, recipe_id, with_for_update=True)
+        if recipe is None or recipe.favorited_user_ids is None:
+            db.session.rollback()
+            return 0
+        legacy = [u for u in dict.fromkeys(recipe.get_legacy_favorited_user_ids()) if isinstance(u, str)]
+        new = _insert_missing_edges(Favorite, Favorite.recipe_id, recipe_id, Favorite.user_id, legacy)
+        FavoriteRepository._add_count(recipe_id, len(new))
+        recipe.favorited_user_ids = None
+        db.session.commit()
+        return len(new)
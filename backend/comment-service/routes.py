@@ -2,12 +2,28 @@ from flask import Blueprint, request, jsonify, g
 from datetime import datetime
 import pickle
 
-from helpers import make_random_string
+from config import Config
+from helpers import make_random_string, encode_cursor, is_internal_request, INTERNAL_TOKEN_HEADER
 from repositories import *
+from recipe_client import request_feed_rebuild
 
 
 bp = Blueprint('socials', __name__)
 
+# Số recipe / comment tối đa mỗi lần hỏi isFavorited / is_liked (một trang danh sách)
+MAX_STATUS_IDS = 100
+# Số phần tử tối đa một trang (limit ngoài [1, MAX_PAGE_LIMIT] bị kẹp lại)
+MAX_PAGE_LIMIT = 100
+
+
+@bp.before_request
+def __guard_internal_endpoints():
+    # /api/internal/*: chỉ các service khác (shared secret hoặc mạng nội bộ) được gọi
+    if request.path.startswith('/api/internal/') and not is_internal_request(
+            request.remote_addr, request.headers.get(INTERNAL_TOKEN_HEADER),
+            Config.INTERNAL_API_TOKEN, Config.INTERNAL_NETWORKS):
+        return jsonify({'message': 'Forbidden'}), 403
+
 
 def __get_current_user_id() -> str | None:
     return g.get('user_id')
@@ -18,15 +34,36 @@ def __get_current_user() -> User | None:
     return User.query.get(user_id) if user_id else None
 
 
+def __parse_limit(queries, default: int = 20) -> int:
+    return max(1, min(int(queries.get('limit', default)), MAX_PAGE_LIMIT))
+
+
 # comments service
+def __comments_to_dicts(comments: list[Comment]) -> list[dict]:
+    """is_liked theo user hiện tại cho cả trang: một query"""
+    current_user_id = __get_current_user_id()
+    liked = CommentLikeRepository.get_liked_ids(current_user_id, [c.id for c in comments]) if current_user_id else set()
+    return [c.to_dict(c.id in liked) for c in comments]
+
+
 @bp.route('/api/recipes/<recipe_id>/comments', methods=['GET'])
 def get_comments_of_recipe(recipe_id: str):
     queries = request.args
     page = int(queries.get('page', 1))
-    limit = int(queries.get('limit', 20))
+    limit = __parse_limit(queries)
     sort = queries.get('sort', 'newest')
-    comments = CommentRepository.get_comments_to_recipe(recipe_id, page, limit, sort)
-    return jsonify([c.to_dict() for c in comments]), 200
+    try:
+        # Có tham số cursor (kể cả rỗng = trang đầu): keyset pagination, trả về kèm nextCursor
+        if 'cursor' in queries:
+            comments, next_cursor = CommentRepository.get_comments_page(recipe_id, limit, sort, queries.get('cursor'))
+            return jsonify({
+                "data": __comments_to_dicts(comments),
+                "pagination": {"limit": limit, "nextCursor": next_cursor, "hasMore": next_cursor is not None}
+            }), 200
+        comments = CommentRepository.get_comments_to_recipe(recipe_id, page, limit, sort)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    return jsonify(__comments_to_dicts(comments)), 200
 
 
 @bp.route('/api/recipes/<recipe_id>/comments', methods=['POST'])
@@ -43,7 +80,7 @@ def post_comment_of_recipe(recipe_id: str):
     comment_id = make_random_string(16)
 
     comment = Comment(comment_id, recipe_id, content, author_id, images,
-                      0, False, now, now)
+                      0, now, now)
 
     CommentRepository.save(comment)
     return jsonify(comment.to_dict()), 200
@@ -69,55 +106,105 @@ def update_comment(comment_id: str):
 
     comment.updated_at = datetime.now()
     CommentRepository.save(comment)
-    return jsonify(comment.to_dict()), 200
+    return jsonify(__comments_to_dicts([comment])[0]), 200
 
 
 @bp.route('/api/comments/<comment_id>', methods=['DELETE'])
 def delete_comment(comment_id: str):
-    CommentRepository.delete(CommentRepository.get_by_id(comment_id))
+    comment = CommentRepository.get_by_id(comment_id)
+    if not comment:
+        return jsonify({'message': 'Comment not found'}), 404
+    CommentRepository.delete(comment)
     return jsonify(), 200
 
 
+@bp.route('/api/comments/liked', methods=['GET'])
+def get_liked_comments():
+    """Comment nào trong trang user hiện tại đã thích: ?commentIds=a,b,c -> {"a": true, "b": false, ...}"""
+    comment_ids = [i for i in request.args.get('commentIds', '').split(',') if i][:MAX_STATUS_IDS]
+    current_user_id = __get_current_user_id()
+    liked = CommentLikeRepository.get_liked_ids(current_user_id, comment_ids) if current_user_id else set()
+    return jsonify({i: i in liked for i in comment_ids}), 200
+
+
 @bp.route('/api/comments/<comment_id>/like', methods=['POST'])
 def like_comment(comment_id: str):
-    comment = CommentRepository.get_by_id(comment_id)
-    comment.is_liked = True
-    comment.likes_count += 1
-    CommentRepository.save(comment)
-    return jsonify({ "liked": True, "likesCount": comment.likes_count }), 200
+    current_user_id = __get_current_user_id()
+    if not current_user_id:
+        return jsonify({'message': 'Unauthorized'}), 401
+    if not CommentRepository.exists(comment_id):
+        return jsonify({'message': 'Comment not found'}), 404
+    CommentLikeRepository.like(comment_id, current_user_id)
+    return jsonify({ "liked": True, "likesCount": CommentLikeRepository.count_likes(comment_id) }), 200
 
 
 @bp.route('/api/comments/<comment_id>/like', methods=['DELETE'])
 def unlike_comment(comment_id: str):
-    comment = CommentRepository.get_by_id(comment_id)
-    comment.is_liked = False
-    comment.likes_count -= 1
-    CommentRepository.save(comment)
-    return jsonify({ "liked": False, "likesCount": comment.likes_count }), 200
+    current_user_id = __get_current_user_id()
+    if not current_user_id:
+        return jsonify({'message': 'Unauthorized'}), 401
+    if not CommentRepository.exists(comment_id):
+        return jsonify({'message': 'Comment not found'}), 404
+    CommentLikeRepository.unlike(comment_id, current_user_id)
+    return jsonify({ "liked": False, "likesCount": CommentLikeRepository.count_likes(comment_id) }), 200
 
 
 # ratings service
+def __parse_rating(body: dict) -> int:
+    """Điểm rating trong body, raise ValueError nếu không phải số nguyên 1..5"""
+    rating = body.get('rating')
+    if isinstance(rating, bool) or not isinstance(rating, int) or rating not in RATING_STARS:
+        raise ValueError("rating phải là số nguyên từ 1 đến 5")
+    return rating
+
+
 @bp.route('/api/recipes/<recipe_id>/ratings', methods=['GET'])
 def get_ratings_of_recipe(recipe_id: str):
-    ratings = RatingRepository.get_all_of_recipe_id(recipe_id)
+    queries = request.args
+    page = int(queries.get('page', 1))
+    limit = __parse_limit(queries)
+    try:
+        # Có tham số cursor (kể cả rỗng = trang đầu): keyset pagination, trả về kèm nextCursor
+        if 'cursor' in queries:
+            ratings, next_cursor = RatingRepository.get_ratings_page(recipe_id, limit, queries.get('cursor'))
+            return jsonify({
+                "data": [r.to_dict() for r in ratings],
+                "pagination": {"limit": limit, "nextCursor": next_cursor, "hasMore": next_cursor is not None}
+            }), 200
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    ratings = RatingRepository.get_ratings_of_recipe(recipe_id, page, limit)
     return jsonify([r.to_dict() for r in ratings]), 200
 
 
+@bp.route('/api/recipes/<recipe_id>/ratings/summary', methods=['GET'])
+def get_rating_summary_of_recipe(recipe_id: str):
+    """averageRating, ratingsCount và số rating theo từng mức sao: đọc một dòng RatingSummary"""
+    summary = RatingSummaryRepository.get(recipe_id) or RatingSummary.empty(recipe_id)
+    return jsonify(summary.to_dict()), 200
+
+
 @bp.route('/api/recipes/<recipe_id>/ratings', methods=['POST'])
 def post_ratings_of_recipe(recipe_id: str):
-    queries = request.args
     body = request.get_json()
-    rating: int = body['rating'] # TODO: Constrain down to [1, 5]!
+    try:
+        rating = __parse_rating(body)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
     # FE hiện chỉ gửi rating, nên review là optional
     review: str = body.get('review', '')
     # Lấy authorId từ JWT (nếu có) hoặc từ body
     author_id: str = g.get('user_id') or body.get('authorId') or body.get('author') or 'anonymous'
-    created_at: datetime = datetime.now()
-    # id sẽ là random string, recipe_id truyền riêng
-    rating_id = make_random_string(16)
-    result = Rating(rating_id, recipe_id, rating, review, author_id, created_at, created_at)
-    RatingRepository.save(result)
-    return jsonify(RatingRepository.get_by_author_id_and_recipe_id(author_id, recipe_id).to_dict()), 200
+    # Mỗi user một rating cho một recipe: đã có thì sửa (giống PUT ratings/me)
+    result = RatingRepository.get_by_author_id_and_recipe_id(author_id, recipe_id)
+    if result:
+        result = RatingRepository.update(result, rating, review)
+    if not result:
+        created_at: datetime = datetime.now()
+        # id sẽ là random string, recipe_id truyền riêng
+        result = Rating(make_random_string(16), recipe_id, rating, review, author_id, created_at, created_at)
+        RatingRepository.create(result)
+    return jsonify(result.to_dict()), 200
 
 
 @bp.route('/api/recipes/<recipe_id>/ratings/me', methods=['GET'])
@@ -132,26 +219,23 @@ def get_my_ratings_of_recipe(recipe_id: str):
 
 @bp.route('/api/recipes/<recipe_id>/ratings/me', methods=['PUT'])
 def put_my_ratings_of_recipe(recipe_id: str):
-    queries = request.args
     body = request.get_json()
-    rating: int = body['rating']  # TODO: Constrain down to [1, 5]!
+    try:
+        rating = __parse_rating(body)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
     # review optional
     review: str = body.get('review', '')
     author_id: str = g.get('user_id') or body.get('authorId') or body.get('author') or 'anonymous'
-    updated_at: datetime = datetime.now()
     result = RatingRepository.get_by_author_id_and_recipe_id(author_id, recipe_id)
+    if result:
+        result = RatingRepository.update(result, rating, review)
 
-    # Nếu chưa có rating trước đó, tạo mới luôn (giống POST)
+    # Nếu chưa có rating trước đó (hoặc vừa bị xóa), tạo mới luôn (giống POST)
     if not result:
-        rating_id = make_random_string(16)
         created_at: datetime = datetime.now()
-        result = Rating(rating_id, recipe_id, rating, review, author_id, created_at, updated_at)
-    else:
-        result.rating = rating
-        result.review = review
-        result.updated_at = updated_at
-
-    RatingRepository.save(result)
+        result = Rating(make_random_string(16), recipe_id, rating, review, author_id, created_at, created_at)
+        RatingRepository.create(result)
     return jsonify(result.to_dict()), 200
 
 
@@ -159,19 +243,33 @@ def put_my_ratings_of_recipe(recipe_id: str):
 def delete_my_ratings_of_recipe(recipe_id: str):
     author_id = g.get('user_id')
     rating = RatingRepository.get_by_author_id_and_recipe_id(author_id, recipe_id)
-    RatingRepository.delete(rating)
+    if not rating or not RatingRepository.delete(rating):
+        return jsonify({'message': 'Rating not found'}), 404
     return jsonify(), 200
 
 
 # favorites service
-@bp.route('/api/users/<user_id>/favorites', methods=['DELETE'])
+@bp.route('/api/users/<user_id>/favorites', methods=['GET'])
 def get_favorite_recipes_of_user(user_id: str):
     queries = request.args
-    body = request.get_json()
-    page: int = queries.get('page', 1)
-    limit: int = queries.get('limit', 20)
-    recipes = RecipeRepository.get_liked_recipes_of(user_id, page, limit)
-    return jsonify([r.to_dict_for(user_id) for r in recipes]), 200
+    limit = __parse_limit(queries)
+    try:
+        favorites, has_more = FavoriteRepository.get_favorites_of(user_id, limit, queries.get('cursor'))
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+
+    recipe_ids = [f.recipe_id for f in favorites]
+    recipes = RecipeRepository.get_by_ids(recipe_ids)
+    last = favorites[-1] if favorites else None
+    return jsonify({
+        "data": [recipes[i].to_dict_for(True) if i in recipes else {"id": i, "isFavorited": True}
+                 for i in recipe_ids],
+        "pagination": {
+            "limit": limit,
+            "nextCursor": encode_cursor(last.created_at, last.recipe_id) if has_more else None,
+            "hasMore": has_more
+        }
+    }), 200
 
 
 @bp.route('/api/favorites', methods=['GET'])
@@ -179,65 +277,113 @@ def get_favorite_recipes_of_me():
     return get_favorite_recipes_of_user(__get_current_user_id())
 
 
+@bp.route('/api/favorites/status', methods=['GET'])
+def get_favorite_status():
+    """isFavorited của user hiện tại cho một trang recipe: ?recipeIds=a,b,c -> {"a": true, "b": false, ...}"""
+    recipe_ids = [i for i in request.args.get('recipeIds', '').split(',') if i][:MAX_STATUS_IDS]
+    current_user_id = __get_current_user_id()
+    favorited = FavoriteRepository.get_favorited_ids(current_user_id, recipe_ids) if current_user_id else set()
+    return jsonify({i: i in favorited for i in recipe_ids}), 200
+
+
 @bp.route('/api/recipes/<recipe_id>/favorite', methods=['POST'])
 def favorite_recipe(recipe_id: str):
-    recipe = RecipeRepository.get_by_id(recipe_id)
-    recipe.set_as_favorite_of(__get_current_user_id())
-    RecipeRepository.save(recipe)
-    return jsonify(), 200
+    current_user_id = __get_current_user_id()
+    if not current_user_id:
+        return jsonify({'message': 'Unauthorized'}), 401
+    FavoriteRepository.favorite(current_user_id, recipe_id)
+    return jsonify({
+        "favorited": True,
+        "favoritesCount": FavoriteRepository.count_favorites(recipe_id)
+    }), 200
 
 
 @bp.route('/api/recipes/<recipe_id>/favorite', methods=['DELETE'])
 def unfavorite_recipe(recipe_id: str):
-    recipe = RecipeRepository.get_by_id(recipe_id)
-    recipe.unset_as_favorite_of(__get_current_user_id())
-    RecipeRepository.save(recipe)
-    return jsonify(), 200
+    current_user_id = __get_current_user_id()
+    if not current_user_id:
+        return jsonify({'message': 'Unauthorized'}), 401
+    FavoriteRepository.unfavorite(current_user_id, recipe_id)
+    return jsonify({
+        "favorited": False,
+        "favoritesCount": FavoriteRepository.count_favorites(recipe_id)
+    }), 200
 
 
 # follow service
+def __users_to_dicts(user_ids: list[str]) -> list[dict]:
+    """Giữ thứ tự của user_ids; user chưa có hồ sơ ở service này chỉ có user_id"""
+    users = UserRepository.get_by_ids(user_ids)
+    return [users[i].to_dict() if i in users else {"user_id": i} for i in user_ids]
+
+
 @bp.route('/api/users/<user_id>/followers', methods=['GET'])
 def get_followers_of_user(user_id: str):
     queries = request.args
-    page: int = queries.get('page', 1)
-    limit: int = queries.get('limit', 20)
-    result: list[User] = UserRepository.get_followers_of(user_id, page, limit)
-    return jsonify([u.to_dict() for u in result]), 200
+    page = max(1, int(queries.get('page', 1)))
+    limit = __parse_limit(queries)
+    follower_ids = FollowRepository.get_follower_ids(user_id, page, limit)
+    return jsonify(__users_to_dicts(follower_ids)), 200
 
 
-@bp.route('/api/users/<user_id>/followers', methods=['GET'])
+@bp.route('/api/users/<user_id>/following', methods=['GET'])
 def get_followings_of_user(user_id: str):
     queries = request.args
-    page: int = queries.get('page', 1)
-    limit: int = queries.get('limit', 20)
-    result: list[User] = UserRepository.get_users_following(user_id, page, limit)
-    return jsonify([u.to_dict() for u in result]), 200
+    page = max(1, int(queries.get('page', 1)))
+    limit = __parse_limit(queries)
+    following_ids = FollowRepository.get_following_ids(user_id, page, limit)
+    return jsonify(__users_to_dicts(following_ids)), 200
 
 
 @bp.route('/api/users/<user_id>/follow', methods=['POST'])
 def follow_user(user_id: str):
     current_user_id = __get_current_user_id()
-    user = UserRepository.get_by_id(current_user_id)
-    user.accept_follow_by(user_id)
-    UserRepository.save(user)
+    if not current_user_id:
+        return jsonify({'message': 'Unauthorized'}), 401
+    if current_user_id == user_id:
+        return jsonify({'message': 'Cannot follow yourself'}), 400
+
+    # Người đang đăng nhập theo dõi user_id
+    if FollowRepository.follow(current_user_id, user_id):
+        request_feed_rebuild(current_user_id)
 
     return jsonify({
         "following": True,
-        "followersCount": user.get_followers_count() + 1
+        "followersCount": FollowRepository.count_followers(user_id)
     }), 200
 
 
 @bp.route('/api/users/<user_id>/follow', methods=['DELETE'])
 def unfollow_user(user_id: str):
     current_user_id = __get_current_user_id()
-    user = UserRepository.get_by_id(user_id)
-    user.accept_unfollow_by(current_user_id)
-    UserRepository.save(user)
+    if not current_user_id:
+        return jsonify({'message': 'Unauthorized'}), 401
+
+    if FollowRepository.unfollow(current_user_id, user_id):
+        request_feed_rebuild(current_user_id)
 
     return jsonify({
         "following": False,
-        "followersCount": user.get_followers_count() - 1
+        "followersCount": FollowRepository.count_followers(user_id)
     }), 200
 
+
+# internal: id follower / following cho feed của recipe-service
+@bp.route('/api/internal/users/<user_id>/follower-ids', methods=['GET'])
+def get_follower_ids_of_user(user_id: str):
+    return jsonify(FollowRepository.get_follower_ids(user_id)), 200
+
+
+@bp.route('/api/internal/users/<user_id>/followers-count', methods=['GET'])
+def get_followers_count_of_user(user_id: str):
+    # Bộ đếm followers_count, để recipe-service chọn push/pull trước khi lấy danh sách id
+    return jsonify({"followersCount": FollowRepository.count_followers(user_id)}), 200
+
+
+@bp.route('/api/internal/users/<user_id>/following-ids', methods=['GET'])
+def get_following_ids_of_user(user_id: str):
+    return jsonify(FollowRepository.get_following_ids(user_id)), 200
+
+
 # notification service
 
@@ -0,0 +1,303 @@
+"""
+Prometheus-style metrics for the Flask services
+
+Same file is copied into every service; edit the api-gateway copy and run
+`python backend/sync_metrics.py` to update the others. Usage in app.py:
+
+    from utils.metrics import init_metrics, instrument_pymongo
+    instrument_pymongo()                    # before the MongoClient is created
+    init_metrics(app, 'recipe-service')     # request metrics + GET /metrics
+
+Exposed metrics:
+    http_requests_total{service,method,route,status}
+    http_request_duration_seconds{service,method,route,status}   (histogram)
+    http_requests_in_flight{service}
+    db_query_duration_seconds{service,db,operation}              (histogram)
+    db_query_errors_total{service,db,operation}
+"""
+import bisect
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import Response, g, request
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# MongoDB commands that are driver housekeeping, not application queries
+_IGNORED_MONGO_COMMANDS = {
+    'hello', 'ismaster', 'isMaster', 'ping', 'buildInfo', 'endSessions',
+    'saslStart', 'saslContinue', 'getnonce', 'authenticate'
+}
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type_name = ''
+
+    def __init__(self, name: str, documentation: str, label_names=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(name, '') for name in self.label_names)
+
+    def render(self):
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} {self.type_name}'
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield from self._render_sample(key, value)
+
+    def _render_sample(self, key, value):
+        yield f'{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}'
+
+
+class Counter(_Metric):
+    type_name = 'counter'
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    type_name = 'gauge'
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    type_name = 'histogram'
+
+    def __init__(self, name: str, documentation: str, label_names=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [per-bucket counts (+Inf last), sum, count]
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][bisect.bisect_left(self.buckets, value)] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _render_sample(self, key, state):
+        counts, total, count = state
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += bucket_count
+            le = f'le="{_format_value(bound)}"'
+            yield f'{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}'
+        yield f'{self.name}_sum{_format_labels(self.label_names, key)} {_format_value(total)}'
+        yield f'{self.name}_count{_format_labels(self.label_names, key)} {count}'
+
+
+class Registry:
+    """All metrics of the process, rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector) -> None:
+        """Callable run before each scrape, e.g. to copy pool or cache state into gauges"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            collector()
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    'http_requests_total', 'HTTP requests handled', ('service', 'method', 'route', 'status')
+))
+HTTP_LATENCY = REGISTRY.register(Histogram(
+    'http_request_duration_seconds', 'HTTP request latency', ('service', 'method', 'route', 'status')
+))
+HTTP_IN_FLIGHT = REGISTRY.register(Gauge(
+    'http_requests_in_flight', 'HTTP requests being handled', ('service',)
+))
+DB_LATENCY = REGISTRY.register(Histogram(
+    'db_query_duration_seconds', 'Database call latency', ('service', 'db', 'operation')
+))
+DB_ERRORS = REGISTRY.register(Counter(
+    'db_query_errors_total', 'Failed database calls', ('service', 'db', 'operation')
+))
+
+_service_name = 'unknown'
+_instrumented = set()
+
+
+def init_metrics(app, service_name: str, path: str = '/metrics') -> None:
+    """Record request metrics of a Flask app and serve them on `path`"""
+    global _service_name
+    _service_name = service_name
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_started = time.perf_counter()
+        g._metrics_in_flight = True
+        HTTP_IN_FLIGHT.inc(service=service_name)
+
+    @app.after_request
+    def _record_request(response):
+        started = g.pop('_metrics_started', None)
+        if started is None or request.path == path:
+            return response
+        # Route template (e.g. /recipes/<recipeId>) keeps label cardinality bounded
+        route = getattr(g, 'metrics_route', None) or (request.url_rule.rule if request.url_rule else 'unmatched')
+        labels = dict(service=service_name, method=request.method, route=route, status=str(response.status_code))
+        HTTP_REQUESTS.inc(**labels)
+        HTTP_LATENCY.observe(time.perf_counter() - started, **labels)
+        return response
+
+    @app.teardown_request
+    def _finish_request(exception=None):
+        # Skipped when an earlier before_request handler answered first
+        if g.pop('_metrics_in_flight', False):
+            HTTP_IN_FLIGHT.dec(service=service_name)
+
+    def metrics_endpoint():
+        return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+    app.add_url_rule(path, 'metrics', metrics_endpoint, methods=['GET'])
+
+
+@contextmanager
+def track_db(db: str, operation: str):
+    """Time a database call by hand: `with track_db('neo4j', 'find_by_id'): ...`"""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        DB_ERRORS.inc(service=_service_name, db=db, operation=operation)
+        raise
+    finally:
+        DB_LATENCY.observe(time.perf_counter() - started, service=_service_name, db=db, operation=operation)
+
+
+def instrument_sqlalchemy() -> None:
+    """Time every SQL statement of every SQLAlchemy engine, labelled by verb (SELECT, INSERT, ...)"""
+    if 'sqlalchemy' in _instrumented:
+        return
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    def operation_of(statement) -> str:
+        return statement.lstrip().split(None, 1)[0].upper() if statement.strip() else 'UNKNOWN'
+
+    @event.listens_for(Engine, 'before_cursor_execute')
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('_metrics_started', []).append(time.perf_counter())
+
+    @event.listens_for(Engine, 'after_cursor_execute')
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info['_metrics_started'].pop()
+        DB_LATENCY.observe(
+            time.perf_counter() - started, service=_service_name, db='sql', operation=operation_of(statement)
+        )
+
+    @event.listens_for(Engine, 'handle_error')
+    def _error(context):
+        timers = context.connection.info.get('_metrics_started') if context.connection is not None else None
+        if timers:
+            timers.pop()
+        DB_ERRORS.inc(service=_service_name, db='sql', operation=operation_of(context.statement or ''))
+
+    _instrumented.add('sqlalchemy')
+
+
+def instrument_pymongo() -> None:
+    """
+    Time every MongoDB command (find, insert, update, aggregate, ...)
+    Must run before the MongoClient is created (mongoengine.connect, PyMongo.init_app, MongoClient())
+    """
+    if 'pymongo' in _instrumented:
+        return
+    from pymongo import monitoring
+
+    class _CommandTimer(monitoring.CommandListener):
+        def started(self, event):
+            pass
+
+        def succeeded(self, event):
+            if event.command_name not in _IGNORED_MONGO_COMMANDS:
+                DB_LATENCY.observe(
+                    event.duration_micros / 1e6, service=_service_name, db='mongodb', operation=event.command_name
+                )
+
+        def failed(self, event):
+            if event.command_name not in _IGNORED_MONGO_COMMANDS:
+                DB_ERRORS.inc(service=_service_name, db='mongodb', operation=event.command_name)
+                DB_LATENCY.observe(
+                    event.duration_micros / 1e6, service=_service_name, db='mongodb', operation=event.command_name
+                )
+
+    monitoring.register(_CommandTimer())
+    _instrumented.add('pymongo')
+
+
+def instrument_neo4j() -> None:
+    """Time Neo4j session work (execute_read, execute_write, run)"""
+    if 'neo4j' in _instrumented:
+        return
+    from neo4j import Session
+
+    def timed(method, operation):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            with track_db('neo4j', operation):
+                return method(*args, **kwargs)
+        return wrapper
+
+    for name, operation in (('execute_read', 'read'), ('execute_write', 'write'), ('run', 'run')):
+        if hasattr(Session, name):
+            setattr(Session, name, timed(getattr(Session, name), operation))
+
+    _instrumented.add('neo4j')
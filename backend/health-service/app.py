@@ -8,6 +8,9 @@ from exceptions.exceptions import AppError, ErrorCode
 # Load env
 load_dotenv()
 
+from utils.metrics import init_metrics, instrument_pymongo
+# Phải gọi trước khi import routes (MongoClient được tạo khi import model)
+instrument_pymongo()
 from routes.health_routes import health_bp
 
 # Config Logging
@@ -16,6 +19,7 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 CORS(app)
+init_metrics(app, 'health-service')
 
 # App Config
 app.config['UPLOAD_FOLDER'] = os.getenv('UPLOAD_FOLDER', './uploads')
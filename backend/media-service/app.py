@@ -3,6 +3,7 @@ from config import Config
 from extensions import mongo
 from routes.file_routes import file_bp
 from exceptions.error_handler import register_error_handlers
+from utils.metrics import init_metrics, instrument_pymongo
 
 
 def create_app():
@@ -15,9 +16,13 @@ def create_app():
     # Load configuration
     app.config.from_object(Config)
     
-    # Initialize MongoDB
+    # Initialize MongoDB (command timing must be registered before the client is created)
+    instrument_pymongo()
     mongo.init_app(app)
     
+    # Request and DB metrics on GET /metrics
+    init_metrics(app, 'media-service')
+    
     # Register error handlers
     register_error_handlers(app)
     
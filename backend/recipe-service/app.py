@@ -1,14 +1,24 @@
-from flask import Flask, jsonify
+from flask import Flask, jsonify, request
 from flask_cors import CORS
 from mongoengine import connect
 from dotenv import load_dotenv
 import os
 from routes.recipe_routes import recipe_bp
+from controllers import recipe_controller
+from utils.metrics import init_metrics, instrument_pymongo, REGISTRY, Gauge
+from utils.indexes import verify_indexes
+from models.recipe_model import Recipe
+from models.feed_model import FeedItem
+from utils import feed
 
 load_dotenv()
 app = Flask(__name__)
 CORS(app)
 
+# Metrics: request latency + thời gian query MongoDB, xem tại GET /metrics
+instrument_pymongo()
+init_metrics(app, 'recipe-service')
+
 # Kết nối MongoDB
 try:
     mongo_uri = os.getenv('MONGO_URI')
@@ -31,17 +41,70 @@ try:
                 authentication_source=os.getenv('MONGO_AUTH_SOURCE', 'admin')
             )
     print("✅ MongoDB Connected (Recipe DB)")
+    verify_indexes(Recipe)
+    verify_indexes(FeedItem)
+    recipe_controller.trending.start()
+    recipe_controller.search.start()
 except Exception as e:
     print(f"❌ MongoDB Connection Failed: {e}")
 
 # Đăng ký Blueprint
 app.register_blueprint(recipe_bp, url_prefix='/recipes')
 
-from controllers import recipe_controller
+# Bộ đếm view write-behind trên /metrics (view chưa ghi = số view mất nếu crash)
+VIEWS_PENDING = REGISTRY.register(Gauge('recipe_views_pending', 'Views buffered in memory, not yet flushed'))
+VIEWS_FLUSHED = REGISTRY.register(Gauge('recipe_views_flushed', 'Views written to MongoDB by bulk flushes'))
+
+def refresh_view_metrics():
+    stats = recipe_controller.view_counter.stats()
+    VIEWS_PENDING.set(stats['pending'])
+    VIEWS_FLUSHED.set(stats['flushedViews'])
+
+REGISTRY.add_collector(refresh_view_metrics)
+
 @app.route('/users/<userId>/recipes', methods=['GET'])
 def user_recipes(userId):
     return recipe_controller.get_recipes_by_user(userId)
 
+@app.route('/search/recipes', methods=['GET'])
+def search_recipes():
+    return recipe_controller.search_recipes()
+
+@app.route('/search/suggestions', methods=['GET'])
+def search_suggestions():
+    return recipe_controller.get_suggestions()
+
+@app.route('/trending/recipes', methods=['GET'])
+def trending_recipes():
+    return recipe_controller.get_trending()
+
+# Nội bộ (không qua gateway): comment-service gọi sau khi user follow/unfollow
+@app.route('/internal/feed/<userId>/rebuild', methods=['POST'])
+def rebuild_feed(userId):
+    state = feed.rebuild(userId)
+    if state is None:
+        return jsonify({"code": 503, "message": "Follow service unavailable"}), 503
+    return jsonify({"followingCount": state.followingCount, "pullAuthors": len(state.pullAuthors)}), 200
+
+# Nội bộ (không qua gateway): comment-service đẩy averageRating/ratingsCount theo lô
+@app.route('/internal/recipes/ratings', methods=['POST'])
+def update_recipe_ratings():
+    return recipe_controller.update_ratings()
+
+# Nội bộ (không qua gateway): user-service gọi khi tạo/sửa/xóa profile
+@app.route('/internal/suggestions/users', methods=['POST'])
+def update_user_suggestions():
+    user = request.get_json(silent=True) or {}
+    if not user.get('id'):
+        return jsonify({"code": 400, "message": "Missing user id"}), 400
+    recipe_controller.suggestions.update_user(user)
+    return jsonify({"message": "Updated"}), 200
+
+@app.route('/internal/suggestions/users/<userId>', methods=['DELETE'])
+def remove_user_suggestions(userId):
+    recipe_controller.suggestions.remove_user(userId)
+    return jsonify({"message": "Deleted"}), 200
+
 @app.route('/health', methods=['GET'])
 def health_check():
     return jsonify({"status": "Recipe Service Running", "port": os.getenv('PORT')}), 200
@@ -0,0 +1,107 @@
+"""
+Benchmark: độ trễ truy vấn của search index (utils/search_index.py) trên corpus tổng hợp
+
+Sinh N recipe giả (mặc định 1.000.000) với title/mô tả/nguyên liệu/tag tiếng Việt có dấu,
+phân bố từ kiểu Zipf (vài từ rất phổ biến, nhiều từ hiếm), nạp thẳng vào SearchIndex
+(không cần MongoDB), rồi đo thời gian từng loại truy vấn.
+
+Run:
+    python bench_search.py
+    python bench_search.py --docs 200000 --repeat 50
+"""
+import argparse
+import random
+import resource
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from utils.search_index import SearchIndex
+
+DISHES = ['phở', 'bún', 'cơm', 'bánh', 'canh', 'lẩu', 'gỏi', 'chè', 'xôi', 'cháo', 'mì', 'miến', 'nem', 'chả']
+PROTEINS = ['bò', 'gà', 'heo', 'tôm', 'cá', 'mực', 'cua', 'vịt', 'đậu hũ', 'trứng', 'sườn', 'ốc', 'nấm']
+STYLES = ['chua', 'cay', 'kho', 'nướng', 'chiên', 'hấp', 'xào', 'luộc', 'rim', 'sốt cà chua', 'tỏi', 'sả ớt']
+REGIONS = ['Hà Nội', 'Huế', 'Sài Gòn', 'miền Tây', 'Hội An', 'Nam Định', 'Quảng Nam', 'Đà Lạt']
+INGREDIENTS = [
+    'hành lá', 'tỏi', 'ớt', 'gừng', 'sả', 'nước mắm', 'đường', 'muối', 'tiêu', 'chanh', 'rau mùi',
+    'cà chua', 'dứa', 'me', 'hành tím', 'dầu ăn', 'bột ngọt', 'rau răm', 'giá đỗ', 'húng quế'
+]
+TAGS = ['món chính', 'ăn sáng', 'món chay', 'healthy', 'đặc sản', 'nhanh gọn', 'món nhậu', 'tráng miệng']
+FILLER = [f'từ{i}' for i in range(20000)]   # từ hiếm, đuôi dài của phân bố Zipf
+
+
+def zipf_choice(rng, items, s=1.1):
+    """Chọn phần tử theo phân bố Zipf (phần tử đầu phổ biến hơn)"""
+    index = int(len(items) * (rng.random() ** (1 + s * 2)))
+    return items[min(index, len(items) - 1)]
+
+
+def make_recipe(rng, i, start):
+    title = f"{zipf_choice(rng, DISHES)} {zipf_choice(rng, PROTEINS)} {zipf_choice(rng, STYLES)}"
+    if rng.random() < 0.3:
+        title += f" {zipf_choice(rng, REGIONS)}"
+    description = ' '.join(zipf_choice(rng, FILLER) for _ in range(12))
+    return {
+        '_id': ObjectId(),
+        'title': title,
+        'description': description,
+        'ingredients': [{'name': zipf_choice(rng, INGREDIENTS)} for _ in range(rng.randint(4, 10))],
+        'tags': rng.sample(TAGS, rng.randint(1, 3)),
+        'category_id': f'cat-{rng.randint(0, 19)}',
+        'difficulty': rng.choice(('easy', 'medium', 'hard')),
+        'cookingTime': rng.choice((10, 20, 30, 45, 60, 90)),
+        'averageRating': round(rng.uniform(1, 5), 1),
+        'viewsCount': rng.randint(0, 100000),
+        'favoritesCount': rng.randint(0, 5000),
+        'createdAt': start + timedelta(seconds=i),
+    }
+
+
+QUERIES = [
+    ('1 từ phổ biến', 'phở', {}),
+    ('2 từ', 'phở bò', {}),
+    ('3 từ không dấu', 'bun bo hue', {}),
+    ('cụm từ + lọc', 'cá kho', {'difficulty': 'easy', 'cookingTime': '30_60'}),
+    ('nguyên liệu + tag', 'sả ớt', {'tags': ['món nhậu']}),
+    ('từ hiếm', 'từ19999', {}),
+    ('không có kết quả AND', 'phở từ19998 xyz', {}),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--docs', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    start = datetime.utcnow() - timedelta(days=365)
+    index = SearchIndex()
+
+    started = time.perf_counter()
+    for i in range(args.docs):
+        index.add(make_recipe(rng, i, start))
+    build_seconds = time.perf_counter() - started
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"Indexed {args.docs} recipes in {build_seconds:.1f}s ({args.docs / build_seconds:.0f} docs/s), "
+          f"max RSS {rss_mb:.0f} MB, {index.stats()}")
+
+    print(f"\n{'query':<24} {'facets':<7} {'hits':>9} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    for name, query, filters in QUERIES:
+        for with_facets in (False, True):
+            samples = []
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                result = index.search(query, filters, limit=20, with_facets=with_facets)
+                samples.append((time.perf_counter() - t0) * 1000)
+            samples.sort()
+            p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+            print(f"{name:<24} {str(with_facets):<7} {result.total:>9} {statistics.median(samples):>9.2f} "
+                  f"{p95:>9.2f} {samples[-1]:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
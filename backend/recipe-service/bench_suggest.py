@@ -0,0 +1,93 @@
+"""
+Benchmark: độ trễ gợi ý (GET /search/suggestions) của SuggestIndex (utils/suggest_index.py)
+
+Dùng cùng generator recipe với bench_search.py, title được thêm đuôi ngẫu nhiên để có nhiều title khác
+nhau, cộng thêm N user giả. Nạp thẳng vào index (không cần MongoDB), đo thời gian gợi ý cho từng độ dài
+prefix và thời gian cập nhật một recipe.
+
+Run:
+    python bench_suggest.py
+    python bench_suggest.py --docs 200000 --users 20000 --repeat 200
+"""
+import argparse
+import gc
+import random
+import resource
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from bench_search import make_recipe, zipf_choice, FILLER
+from utils.suggest import recipe_contributions, user_contributions
+from utils.suggest_index import SuggestIndex
+
+QUERIES = ['p', 'ph', 'pho', 'pho b', 'pho bo ', 'bun bo h', 'c', 'ca k', 'mon', 'tu1', 'tu1999', 'nguyen', 'xyz']
+
+
+def percentile(samples, q):
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--docs', type=int, default=1000000)
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    start = datetime.utcnow() - timedelta(days=365)
+    index = SuggestIndex()
+    recipes = []
+
+    started = time.perf_counter()
+    with index.bulk_load():
+        for i in range(args.docs):
+            row = make_recipe(rng, i, start)
+            row['title'] += f" {zipf_choice(rng, FILLER)}"
+            index.update(f"recipe:{row['_id']}", recipe_contributions(row))
+            if i % 1000 == 0:
+                recipes.append(row)
+        for i in range(args.users):
+            user = {'id': f'user-{i}', 'username': f'user_{i}', 'fullName': f'Nguyễn Văn {zipf_choice(rng, FILLER)}',
+                    'followersCount': rng.randint(0, 10000)}
+            index.update(f"user:{user['id']}", user_contributions(user))
+    build_seconds = time.perf_counter() - started
+    # Như RecipeSearch.build (utils/search.py)
+    gc.collect()
+    gc.freeze()
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"Loaded {args.docs} recipes + {args.users} users in {build_seconds:.1f}s, max RSS {rss_mb:.0f} MB, "
+          f"{index.stats()}")
+
+    print(f"\n{'query':<12} {'cold ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}  top")
+    for query in QUERIES:
+        t0 = time.perf_counter()
+        result = index.suggest(query, 10)
+        cold = (time.perf_counter() - t0) * 1000
+        samples = []
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            index.suggest(query, 10)
+            samples.append((time.perf_counter() - t0) * 1000)
+        samples.sort()
+        top = result[0][1] if result else '-'
+        print(f"{query!r:<12} {cold:>9.2f} {statistics.median(samples):>9.2f} {percentile(samples, 0.95):>9.2f} "
+              f"{samples[-1]:>9.2f}  {top}")
+
+    # Cập nhật từng recipe (sửa recipe, view/favorite thay đổi) rồi gợi ý ngay (cache prefix ngắn bị xóa)
+    samples = []
+    for row in recipes[:args.repeat]:
+        row['favoritesCount'] += rng.randint(1, 1000)
+        t0 = time.perf_counter()
+        index.update(f"recipe:{row['_id']}", recipe_contributions(row))
+        index.suggest(row['title'][:1], 10)
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    print(f"\nupdate + suggest: p50 {statistics.median(samples):.2f} ms, p95 {percentile(samples, 0.95):.2f} ms, "
+          f"max {samples[-1]:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
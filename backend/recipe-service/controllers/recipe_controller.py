@@ -1,9 +1,25 @@
-from flask import request, jsonify, g
-from models.recipe_model import Recipe, Ingredient, Instruction, NutritionInfo
+from flask import request, jsonify, g, Response, stream_with_context
+from models.recipe_model import Recipe, Ingredient, Instruction, NutritionInfo, SUMMARY_FIELDS
 from exceptions.exceptions import ErrorCode
-from datetime import datetime, timedelta
+from utils.gateway_cache import purge_gateway_cache
+from utils.pagination import paginate, InvalidCursor
+from utils.count_cache import CountCache
+from utils.view_counter import ViewCounter
+from utils.trending import TrendingLeaderboard
+from utils.search import RecipeSearch
+from utils.suggest import Suggestions, KINDS as SUGGESTION_KINDS
+from utils import user_client
+from utils.recipe_io import build_recipe, import_lines, export_lines, RecipeDataError
+from utils.jwt_service import is_admin
+from utils import feed
+from datetime import datetime
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import UpdateOne
 import mongoengine
 import logging
+import json
+import math
 
 logger = logging.getLogger(__name__)
 
@@ -11,43 +27,56 @@ def _handle_error(e, code=500):
     logger.error(f"Error: {str(e)}") # Log lỗi ra để dễ debug
     return jsonify({"code": code, "message": str(e)}), code
 
+def _invalid_cursor(e):
+    return jsonify({"code": ErrorCode.INVALID_CURSOR.code, "message": str(e)}), 400
+
+# Tổng số công thức theo bộ lọc cho totalItems, cộng/trừ khi tạo/xóa thay vì count() mỗi request
+recipe_counts = CountCache(fields=('category_id', 'difficulty', 'author_id'))
+
+# View được cộng trong bộ nhớ và ghi xuống MongoDB theo lô (utils/view_counter.py)
+view_counter = ViewCounter(Recipe._get_collection)
+
+# Bảng xếp hạng trending tính sẵn theo day/week/month (utils/trending.py)
+trending = TrendingLeaderboard(
+    Recipe._get_collection, lambda: Recipe._get_db()['trending_recipes'], SUMMARY_FIELDS
+)
+
+# Full-text search và gợi ý trong bộ nhớ (utils/search.py, utils/suggest.py), cập nhật khi tạo/sửa/xóa
+suggestions = Suggestions(user_client.iter_usernames)
+search = RecipeSearch(Recipe._get_collection, suggestions)
+
+def _count_recipes(**filters):
+    if not filters:
+        # Không lọc: lấy từ metadata của collection, không phải quét index
+        return recipe_counts.get(filters, lambda: Recipe._get_collection().estimated_document_count())
+    return recipe_counts.get(filters, lambda: Recipe.objects(**filters).count())
+
 # ... (giữ nguyên get_recipes) ...
 
 # --- 1. Lấy danh sách (GET /recipes) ---
 def get_recipes():
+    if request.args.get('q'):
+        # ?q= (vd: ai-service) -> tìm kiếm full-text
+        return search_recipes()
     try:
         categoryId = request.args.get('categoryId')
         sort = request.args.get('sort', 'newest')
         difficulty = request.args.get('difficulty')
-        page = int(request.args.get('page', 1))
-        limit = int(request.args.get('limit', 10))
 
-        query = Recipe.objects()
-        if categoryId: query = query.filter(category_id=categoryId)
-        if difficulty: query = query.filter(difficulty=difficulty)
+        filters = {}
+        if categoryId: filters['category_id'] = categoryId
+        if difficulty: filters['difficulty'] = difficulty
+        query = Recipe.summary_rows(Recipe.objects(**filters))
 
-        # Sắp xếp
-        if sort == 'newest': query = query.order_by('-createdAt')
-        elif sort == 'oldest': query = query.order_by('createdAt')
-        elif sort == 'most_viewed': query = query.order_by('-viewsCount')
-        elif sort == 'most_liked': query = query.order_by('-favoritesCount')
-        
-        total_items = query.count()
-        total_pages = (total_items + limit - 1) // limit
-        skip = (page - 1) * limit
-        if skip < 0: skip = 0
-        
-        recipes = query.skip(skip).limit(limit)
+        # Sắp xếp + phân trang (offset page/limit hoặc keyset ?cursor=)
+        recipes, pagination = paginate(query, request.args, sort, count=lambda: _count_recipes(**filters))
 
         return jsonify({
-            "data": [r.to_json_summary() for r in recipes],
-            "pagination": {
-                "page": page,
-                "limit": limit,
-                "totalItems": total_items,
-                "totalPages": total_pages
-            }
+            "data": [Recipe.summary_from_row(r) for r in recipes],
+            "pagination": pagination
         }), 200
+    except InvalidCursor as e:
+        return _invalid_cursor(e)
     except Exception as e:
         return _handle_error(e)
 
@@ -69,71 +98,24 @@ def create_recipe():
                 "message": "No data provided"
             }), 400
         
-        # Validate các trường bắt buộc cấp 1
-        required_fields = ['title', 'ingredients', 'instructions']
-        missing = [field for field in required_fields if field not in data]
-        if missing:
-            return jsonify({
-                "code": ErrorCode.MISSING_FIELDS.code, 
-                "message": f"Thiếu thông tin bắt buộc: {', '.join(missing)}"
-            }), 400
-
-        # Parse Ingredients (Xử lý an toàn)
-        ingredients_objs = []
-        for i in data.get('ingredients', []):
-            if isinstance(i, dict) and 'name' in i and 'amount' in i:
-                ingredients_objs.append(Ingredient(
-                    name=i['name'], 
-                    amount=i['amount'], 
-                    note=i.get('note', '')
-                ))
-        
-        # Parse Instructions (Xử lý an toàn)
-        instructions_objs = []
-        for idx, s in enumerate(data.get('instructions', [])):
-            if isinstance(s, dict) and 'description' in s:
-                instructions_objs.append(Instruction(
-                    step=s.get('step', idx + 1), 
-                    description=s['description'], 
-                    image=s.get('image', ''),
-                    duration=s.get('duration', 0)
-                ))
-
-        # Parse Nutrition (Xử lý an toàn)
-        nutri_data = data.get('nutritionInfo', {})
-        if not isinstance(nutri_data, dict): nutri_data = {}
-        
-        nutrition_obj = NutritionInfo(
-            calories=nutri_data.get('calories', 0),
-            protein=nutri_data.get('protein', 0),
-            carbs=nutri_data.get('carbs', 0),
-            fat=nutri_data.get('fat', 0),
-            fiber=nutri_data.get('fiber', 0)
-        )
-
-        new_recipe = Recipe(
-            title=data['title'],
-            description=data.get('description', ''),
-            thumbnail=data.get('thumbnail', ''),
-            author_id=g.user_id,
-            category_id=data.get('categoryId', ''),
-            difficulty=data.get('difficulty', 'medium'),
-            cookingTime=data.get('cookingTime', 0),
-            servings=data.get('servings', 1),
-            ingredients=ingredients_objs,
-            instructions=instructions_objs,
-            images=data.get('images', []) if isinstance(data.get('images'), list) else [],
-            tags=data.get('tags', []) if isinstance(data.get('tags'), list) else [],
-            tips=data.get('tips', []) if isinstance(data.get('tips'), list) else [],
-            nutritionInfo=nutrition_obj
-        )
+        try:
+            new_recipe = build_recipe(data, g.user_id)
+        except RecipeDataError as e:
+            return jsonify({"code": e.code, "message": str(e)}), 400
         
         new_recipe.save()
+        recipe_counts.adjust(recipe_counts.snapshot(new_recipe), 1)
+        search.index_recipe(new_recipe)
+        feed.fan_out_async(new_recipe)
+        purge_gateway_cache(prefixes=TRENDING_CACHE_PREFIXES)
         return jsonify(new_recipe.to_json_detail()), 200
 
     except Exception as e:
         return _handle_error(e)
 
+# Các response GET được api-gateway cache lại
+TRENDING_CACHE_PREFIXES = ['/trending/recipes', '/recipes/trending/recipes']
+
 # --- 3. Xem chi tiết (GET /recipes/{id}) ---
 def get_recipe_detail(recipeId):
     try:
@@ -154,6 +136,7 @@ def update_recipe(recipeId):
         if recipe.author_id != g.user_id:
             return jsonify({"code": ErrorCode.UNAUTHORIZED.code, "message": ErrorCode.UNAUTHORIZED.message}), 403
 
+        counted_before = recipe_counts.snapshot(recipe)
         data = request.json
         
         # Cập nhật các trường đơn giản nếu có trong request
@@ -186,6 +169,9 @@ def update_recipe(recipeId):
             
         recipe.updatedAt = datetime.utcnow()
         recipe.save()
+        recipe_counts.move(counted_before, recipe_counts.snapshot(recipe))
+        search.index_recipe(recipe)
+        purge_gateway_cache(paths=[f"/recipes/{recipeId}"], prefixes=TRENDING_CACHE_PREFIXES)
         return jsonify(recipe.to_json_detail()), 200
     except Exception as e:
         return _handle_error(e)
@@ -201,6 +187,12 @@ def delete_recipe(recipeId):
             return jsonify({"code": ErrorCode.UNAUTHORIZED.code, "message": ErrorCode.UNAUTHORIZED.message}), 403
             
         recipe.delete()
+        view_counter.forget(recipeId)
+        feed.remove_recipe(recipe.id)
+        search.remove_recipe(recipe.id)
+        trending.remove_recipe(recipe.id)
+        recipe_counts.adjust(recipe_counts.snapshot(recipe), -1)
+        purge_gateway_cache(paths=[f"/recipes/{recipeId}"], prefixes=TRENDING_CACHE_PREFIXES)
         return jsonify({"message": "Deleted"}), 200
     except Exception as e:
         return _handle_error(e)
@@ -208,30 +200,32 @@ def delete_recipe(recipeId):
 # --- 6. Tăng view (POST /recipes/{id}/view) ---
 def increment_view(recipeId):
     try:
-        recipe = Recipe.objects(id=recipeId).first()
-        if not recipe:
+        # Số view xấp xỉ, view được ghi xuống MongoDB sau tối đa VIEW_FLUSH_INTERVAL giây
+        views = view_counter.add(recipeId)
+        if views is None:
             return jsonify({"code": 404, "message": "Not Found"}), 404
-        
-        recipe.update(inc__viewsCount=1)
-        recipe.reload()
-        return jsonify({"views": recipe.viewsCount}), 200
+        return jsonify({"views": views}), 200
     except Exception as e:
         return _handle_error(e)
 
 # --- 7. Feed (GET /feed) ---
 def get_feed():
     try:
-        page = int(request.args.get('page', 1))
-        limit = int(request.args.get('limit', 10))
-        
-        query = Recipe.objects().order_by('-createdAt')
-        total = query.count()
-        recipes = query.skip((page-1)*limit).limit(limit)
+        state = feed.get_state(g.user_id)
+        if state is not None and state.followingCount > 0:
+            # Feed cá nhân: timeline (fan-out) + tác giả pull, luôn phân trang bằng cursor
+            recipes, pagination = feed.read(g.user_id, state.pullAuthors, request.args)
+        else:
+            # Chưa follow ai (hoặc follow service lỗi): công thức mới nhất của mọi người
+            recipes, pagination = paginate(Recipe.summary_rows(Recipe.objects()), request.args, 'newest', count=_count_recipes)
+            pagination.pop('totalPages', None)
         
         return jsonify({
-            "data": [r.to_json_summary() for r in recipes],
-            "pagination": {"page": page, "limit": limit, "totalItems": total}
+            "data": [Recipe.summary_from_row(r) for r in recipes],
+            "pagination": pagination
         }), 200
+    except InvalidCursor as e:
+        return _invalid_cursor(e)
     except Exception as e:
         return _handle_error(e)
 
@@ -240,55 +234,190 @@ def get_trending():
     try:
         limit = int(request.args.get('limit', 10))
         period = request.args.get('period', 'week')
-        
-        now = datetime.utcnow()
-        if period == 'day': start_date = now - timedelta(days=1)
-        elif period == 'month': start_date = now - timedelta(days=30)
-        else: start_date = now - timedelta(weeks=1)
-        
-        recipes = Recipe.objects(createdAt__gte=start_date).order_by('-viewsCount').limit(limit)
-        return jsonify({"data": [r.to_json_summary() for r in recipes]}), 200
+
+        # Đọc từ bảng xếp hạng đã tính sẵn, được tính lại mỗi TRENDING_REFRESH_SECONDS
+        recipes = trending.top(period, limit)
+        return jsonify({"data": [Recipe.summary_from_row(r) for r in recipes]}), 200
     except Exception as e:
         return _handle_error(e)
 
 # --- 9. Lấy công thức của User (GET /users/{userId}/recipes) ---
 def get_recipes_by_user(userId):
     try:
-        # Get query parameters
-        page = int(request.args.get('page', 1))
-        limit = int(request.args.get('limit', 10))
         sort = request.args.get('sort', 'newest')
         
         # Query recipes by author_id
-        query = Recipe.objects(author_id=userId)
-        
-        # Sort
-        if sort == 'newest':
-            query = query.order_by('-createdAt')
-        elif sort == 'oldest':
-            query = query.order_by('createdAt')
-        elif sort == 'most_viewed':
-            query = query.order_by('-viewsCount')
-        elif sort == 'most_liked':
-            query = query.order_by('-favoritesCount')
+        query = Recipe.summary_rows(Recipe.objects(author_id=userId))
         
-        # Pagination
-        total_items = query.count()
-        total_pages = (total_items + limit - 1) // limit
-        skip = (page - 1) * limit
-        if skip < 0:
-            skip = 0
-        
-        recipes = query.skip(skip).limit(limit)
+        # Sort + pagination (offset page/limit hoặc keyset ?cursor=)
+        recipes, pagination = paginate(query, request.args, sort, count=lambda: _count_recipes(author_id=userId))
         
         return jsonify({
-            "data": [r.to_json_summary() for r in recipes],
+            "data": [Recipe.summary_from_row(r) for r in recipes],
+            "pagination": pagination
+        }), 200
+    except InvalidCursor as e:
+        return _invalid_cursor(e)
+    except Exception as e:
+        return _handle_error(e)
+
+# --- 10. Tìm kiếm (GET /search/recipes) ---
+SEARCH_MAX_LIMIT = 100
+
+def search_recipes():
+    try:
+        q = (request.args.get('q') or '').strip()
+        if not q:
+            return jsonify({"code": ErrorCode.MISSING_FIELDS.code, "message": "Thiếu từ khóa tìm kiếm: q"}), 400
+        if not search.ready:
+            error = ErrorCode.SEARCH_NOT_READY
+            return jsonify({"code": error.code, "message": error.message}), error.http_status.value
+
+        # ?tags=a&tags=b hoặc ?tags=a,b
+        tags = [tag.strip() for value in request.args.getlist('tags') for tag in value.split(',') if tag.strip()]
+        filters = {
+            'categoryId': request.args.get('categoryId'),
+            'difficulty': request.args.get('difficulty'),
+            'tags': tags,
+            'cookingTime': request.args.get('cookingTime'),
+            'minRating': request.args.get('minRating'),
+        }
+        filters = {key: value for key, value in filters.items() if value}
+        if 'minRating' in filters:
+            # So sánh dạng số thực (3.5 = từ 3.5 sao), inf/nan -> 400
+            filters['minRating'] = float(filters['minRating'])
+            if not math.isfinite(filters['minRating']):
+                raise ValueError("minRating không hợp lệ")
+        sort = request.args.get('sort', 'relevance')
+        page = max(1, int(request.args.get('page', 1)))
+        limit = max(1, min(int(request.args.get('limit', 10)), SEARCH_MAX_LIMIT))
+
+        result = search.search(q, filters, sort, page, limit)
+
+        # Chỉ lấy summary của recipe trong trang, giữ thứ tự xếp hạng
+        ids = [recipe_id for recipe_id, _ in result.hits]
+        rows = {str(r['_id']): r for r in Recipe.summary_rows(Recipe.objects(id__in=ids))}
+        data = []
+        for recipe_id, score in result.hits:
+            row = rows.get(recipe_id)
+            if row is None:
+                # Đã bị xóa ở instance khác, chưa được rebuild
+                search.remove_recipe(recipe_id)
+                continue
+            data.append({**Recipe.summary_from_row(row), "score": score})
+
+        return jsonify({
+            "data": data,
             "pagination": {
                 "page": page,
                 "limit": limit,
-                "totalItems": total_items,
-                "totalPages": total_pages
-            }
+                "totalItems": result.total,
+                "totalPages": (result.total + limit - 1) // limit
+            },
+            "filters": {"q": q, "sort": sort, **filters},
+            "facets": result.facets
+        }), 200
+    except ValueError as e:
+        return _handle_error(e, 400)
+    except Exception as e:
+        return _handle_error(e)
+
+# --- 11. Gợi ý tìm kiếm (GET /search/suggestions) ---
+SUGGESTIONS_MAX_LIMIT = 50
+
+def get_suggestions():
+    try:
+        q = request.args.get('q') or ''
+        if not q.strip():
+            return jsonify({"code": ErrorCode.MISSING_FIELDS.code, "message": "Thiếu từ khóa: q"}), 400
+        if not search.ready:
+            error = ErrorCode.SEARCH_NOT_READY
+            return jsonify({"code": error.code, "message": error.message}), error.http_status.value
+
+        limit = max(1, min(int(request.args.get('limit', 10)), SUGGESTIONS_MAX_LIMIT))
+        # ?types=recipe,tag,user (mặc định: tất cả)
+        kinds = {kind for kind in (request.args.get('types') or '').split(',') if kind in SUGGESTION_KINDS}
+
+        items = suggestions.suggest(q, limit, kinds)
+        return jsonify({
+            "suggestions": [text for _, text, _ in items],
+            "items": [{"type": kind, "text": text} for kind, text, _ in items]
         }), 200
+    except ValueError as e:
+        return _handle_error(e, 400)
     except Exception as e:
-        return _handle_error(e)
\ No newline at end of file
+        return _handle_error(e)
+
+# --- 12. Import hàng loạt (POST /recipes/import, body NDJSON) ---
+def import_recipes():
+    # Admin + ?keepIdentity=true: giữ id, authorId, createdAt, bộ đếm (dữ liệu từ /recipes/export)
+    # Còn lại: mỗi dòng được tạo như POST /recipes, tác giả là user hiện tại
+    keep_identity = is_admin() and request.args.get('keepIdentity', 'false').lower() == 'true'
+    user_id = g.user_id
+    lines = request.stream
+
+    def generate():
+        inserted = None      # None: không biết (lỗi giữa chừng)
+        try:
+            for event in import_lines(lines, user_id, keep_identity):
+                inserted = event.get('summary', {}).get('inserted', inserted)
+                yield json.dumps(event, ensure_ascii=False) + '\n'
+        except Exception as e:
+            logger.error(f"Error importing recipes: {str(e)}")
+            yield json.dumps({"error": str(e)}, ensure_ascii=False) + '\n'
+        finally:
+            if inserted != 0:
+                # Search index/gợi ý nhận recipe mới ở lần sync tiếp theo (updatedAt = lúc import),
+                # không fan-out vào feed
+                recipe_counts.clear()
+                purge_gateway_cache(prefixes=TRENDING_CACHE_PREFIXES)
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+# --- 13. Export (GET /recipes/export, NDJSON) ---
+def export_recipes():
+    filters = {}
+    if not is_admin():
+        # User thường chỉ export công thức của mình
+        filters['author_id'] = g.user_id
+    elif request.args.get('authorId'):
+        filters['author_id'] = request.args.get('authorId')
+    if request.args.get('categoryId'):
+        filters['category_id'] = request.args.get('categoryId')
+
+    return Response(
+        stream_with_context(export_lines(**filters)),
+        mimetype='application/x-ndjson',
+        headers={'Content-Disposition': 'attachment; filename=recipes.ndjson'}
+    )
+
+# --- 14. Rating từ comment-service (POST /internal/recipes/ratings) ---
+def update_ratings():
+    """
+    averageRating/ratingsCount của nhiều recipe (comment-service đẩy theo lô) trong một bulk_write
+    Mỗi phần tử có version tăng dần: bản cũ hơn bản đã ghi (đẩy lại, đến muộn) được bỏ qua
+    Search index/trending đọc giá trị mới ở lần rebuild tiếp theo (như viewsCount)
+    """
+    items = (request.get_json(silent=True) or {}).get('ratings')
+    if not isinstance(items, list):
+        return jsonify({"code": ErrorCode.INVALID_DATA.code, "message": "Missing ratings"}), 400
+    try:
+        operations, paths = [], []
+        for item in items:
+            try:
+                oid, version = ObjectId(item['recipeId']), int(item['version'])
+                values = {'averageRating': float(item['averageRating']), 'ratingsCount': int(item['ratingsCount'])}
+            except (InvalidId, KeyError, TypeError, ValueError):
+                continue
+            operations.append(UpdateOne(
+                {'_id': oid, '$or': [{'ratingsVersion': {'$lt': version}}, {'ratingsVersion': None}]},
+                {'$set': {**values, 'ratingsVersion': version}}
+            ))
+            paths.append(f"/recipes/{oid}")
+        if not operations:
+            return jsonify({"updated": 0}), 200
+        result = Recipe._get_collection().bulk_write(operations, ordered=False)
+        purge_gateway_cache(paths=paths)
+        return jsonify({"updated": result.modified_count}), 200
+    except Exception as e:
+        return _handle_error(e)
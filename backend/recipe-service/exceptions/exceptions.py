@@ -8,12 +8,16 @@ class HttpStatus(Enum):
     FORBIDDEN = 403
     NOT_FOUND = 404
     INTERNAL_SERVER_ERROR = 500
+    SERVICE_UNAVAILABLE = 503
 
 class ErrorCode(Enum):
     UNAUTHENTICATED = (1002, "Vui lòng đăng nhập để tiếp tục", HttpStatus.UNAUTHORIZED)
     UNAUTHORIZED = (1003, "Bạn không có quyền thực hiện thao tác này", HttpStatus.FORBIDDEN)
     RECIPE_NOT_FOUND = (2001, "Không tìm thấy công thức", HttpStatus.NOT_FOUND)
     MISSING_FIELDS = (2003, "Thiếu thông tin bắt buộc", HttpStatus.BAD_REQUEST)
+    INVALID_CURSOR = (2004, "Cursor phân trang không hợp lệ", HttpStatus.BAD_REQUEST)
+    INVALID_DATA = (2006, "Dữ liệu không hợp lệ", HttpStatus.BAD_REQUEST)
+    SEARCH_NOT_READY = (2005, "Chỉ mục tìm kiếm đang được xây dựng, vui lòng thử lại sau", HttpStatus.SERVICE_UNAVAILABLE)
     INTERNAL_ERROR = (5000, "Lỗi hệ thống", HttpStatus.INTERNAL_SERVER_ERROR)
     
     def __init__(self, code, message, http_status):
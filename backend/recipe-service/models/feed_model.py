@@ -0,0 +1,47 @@
+import mongoengine as db
+import os
+from datetime import datetime
+
+# Số ngày giữ một recipe trong timeline (TTL index, MongoDB tự xóa)
+FEED_RETENTION_DAYS = int(os.getenv('FEED_RETENTION_DAYS', 30))
+
+
+class FeedItem(db.Document):
+    """Một recipe trong timeline của một user (fan-out-on-write)"""
+    user_id = db.StringField(required=True)       # Người đọc feed
+    recipe_id = db.ObjectIdField(required=True)
+    author_id = db.StringField(required=True)
+    createdAt = db.DateTimeField(required=True)   # createdAt của recipe, dùng để sort
+
+    meta = {
+        'collection': 'feed_items',
+        'indexes': [
+            # Đọc timeline: user_id + keyset (createdAt, recipe_id); unique để fan-out chạy lại không bị trùng
+            {'fields': ['user_id', '-createdAt', '-recipe_id'], 'name': 'timeline', 'unique': True},
+            # Xóa recipe khỏi mọi timeline
+            {'fields': ['recipe_id'], 'name': 'recipe_id'},
+            {'fields': ['createdAt'], 'name': 'retention', 'expireAfterSeconds': FEED_RETENTION_DAYS * 86400},
+        ],
+        'auto_create_index': False
+    }
+
+
+class FeedState(db.Document):
+    """Trạng thái timeline của một user"""
+    user_id = db.StringField(primary_key=True)
+    # Tác giả có quá nhiều follower nên không fan-out: recipe của họ được đọc trực tiếp (pull) khi xem feed
+    pullAuthors = db.ListField(db.StringField())
+    followingCount = db.IntField(default=0)
+    builtAt = db.DateTimeField(default=datetime.utcnow)
+
+    meta = {'collection': 'feed_states', 'auto_create_index': False}
+
+
+class FeedAuthor(db.Document):
+    """Cách phân phối recipe của một tác giả: fan-out (push) hoặc pull"""
+    author_id = db.StringField(primary_key=True)
+    fanout = db.BooleanField(default=True)
+    followersCount = db.IntField(default=0)
+    updatedAt = db.DateTimeField(default=datetime.utcnow)
+
+    meta = {'collection': 'feed_authors', 'auto_create_index': False}
@@ -21,6 +21,32 @@ class NutritionInfo(db.EmbeddedDocument):
     fat = db.FloatField(default=0.0)
     fiber = db.FloatField(default=0.0)
 
+# --- Indexes ---
+
+# Sort của các API danh sách (utils/pagination.SORT_FIELDS), luôn kèm _id để keyset pagination ổn định.
+# Index (-field, -_id) cũng phục vụ sort tăng dần (oldest) bằng cách duyệt ngược.
+LIST_SORT_KEYS = [('-createdAt', '-id'), ('-viewsCount', '-id'), ('-favoritesCount', '-id')]
+
+# Các bộ lọc bằng (equality) đứng trước field sort: /recipes?categoryId=&difficulty=, /users/{id}/recipes
+LIST_FILTER_PREFIXES = [(), ('category_id',), ('difficulty',), ('category_id', 'difficulty'), ('author_id',)]
+
+# (createdAt, _id) cũng phục vụ bước $match createdAt của job tính trending (utils/trending.py)
+RECIPE_INDEXES = [
+    {'fields': list(prefix + sort), 'name': '_'.join(f.lstrip('-') for f in prefix + sort)}
+    for prefix in LIST_FILTER_PREFIXES for sort in LIST_SORT_KEYS
+] + [
+    # Search index đọc lại các recipe vừa cập nhật (utils/search.py)
+    {'fields': ['updatedAt'], 'name': 'updatedAt'},
+]
+
+# Field dùng trong to_json_summary: các API danh sách chỉ đọc những field này từ MongoDB
+# (không kéo ingredients, instructions, images, tips, nutritionInfo)
+SUMMARY_FIELDS = (
+    'title', 'description', 'thumbnail', 'author_id', 'category_id', 'difficulty', 'cookingTime', 'servings',
+    'averageRating', 'ratingsCount', 'viewsCount', 'favoritesCount', 'commentsCount', 'tags',
+    'createdAt', 'updatedAt'
+)
+
 # --- Main Document ---
 
 class Recipe(db.Document):
@@ -52,6 +78,8 @@ class Recipe(db.Document):
     viewsCount = db.IntField(default=0)     # Đổi views -> viewsCount
     favoritesCount = db.IntField(default=0)
     commentsCount = db.IntField(default=0)
+    # Version tổng hợp rating của comment-service đã ghi (bỏ qua bản cũ hơn đến muộn)
+    ratingsVersion = db.IntField()
     
     # Timestamps
     createdAt = db.DateTimeField(default=datetime.utcnow)
@@ -59,29 +87,51 @@ class Recipe(db.Document):
 
     meta = {
         'collection': 'recipes',
-        'ordering': ['-createdAt']
+        'ordering': ['-createdAt'],
+        'indexes': RECIPE_INDEXES,
+        # Index được tạo và kiểm tra khi khởi động (utils/indexes.py), không phải ở query đầu tiên
+        'auto_create_index': False
     }
 
     # Helper chuyển đổi JSON (Khớp schema Recipe trong OpenAPI)
     def to_json_summary(self):
+        row = {field: getattr(self, field) for field in SUMMARY_FIELDS}
+        row['_id'] = self.id
+        return Recipe.summary_from_row(row)
+
+    @staticmethod
+    def summary_rows(query):
+        """QuerySet chỉ lấy SUMMARY_FIELDS và trả về dict thô (as_pymongo), bỏ qua việc dựng Document"""
+        return query.only(*SUMMARY_FIELDS).as_pymongo()
+
+    @staticmethod
+    def summary_from_row(row):
+        """JSON summary từ một dict thô của summary_rows (field thiếu thì lấy default của model)"""
+        def value(field):
+            if row.get(field) is not None:
+                return row[field]
+            default = Recipe._fields[field].default
+            return default() if callable(default) else default
+
+        created_at, updated_at = value('createdAt'), value('updatedAt')
         return {
-            "id": str(self.id),
-            "title": self.title,
-            "description": self.description,
-            "thumbnail": self.thumbnail,
-            "author": {"id": self.author_id}, # Frontend sẽ fetch chi tiết User sau
-            "category": {"id": self.category_id}, # Frontend fetch Category sau
-            "difficulty": self.difficulty,
-            "cookingTime": self.cookingTime,
-            "servings": self.servings,
-            "averageRating": self.averageRating,
-            "ratingsCount": self.ratingsCount,
-            "viewsCount": self.viewsCount,
-            "favoritesCount": self.favoritesCount,
-            "commentsCount": self.commentsCount,
-            "tags": self.tags,
-            "createdAt": self.createdAt.isoformat(),
-            "updatedAt": self.updatedAt.isoformat(),
+            "id": str(row['_id']),
+            "title": value('title'),
+            "description": value('description'),
+            "thumbnail": value('thumbnail'),
+            "author": {"id": value('author_id')}, # Frontend sẽ fetch chi tiết User sau
+            "category": {"id": value('category_id')}, # Frontend fetch Category sau
+            "difficulty": value('difficulty'),
+            "cookingTime": value('cookingTime'),
+            "servings": value('servings'),
+            "averageRating": value('averageRating'),
+            "ratingsCount": value('ratingsCount'),
+            "viewsCount": value('viewsCount'),
+            "favoritesCount": value('favoritesCount'),
+            "commentsCount": value('commentsCount'),
+            "tags": value('tags'),
+            "createdAt": created_at.isoformat() if created_at else None,
+            "updatedAt": updated_at.isoformat() if updated_at else None,
             "isFavorited": False # Logic check favorite sẽ làm sau hoặc ở service khác
         }
 
@@ -14,4 +14,6 @@ recipe_bp.route('/trending/recipes', methods=['GET'])(recipe_controller.get_tren
 recipe_bp.route('', methods=['POST'])(jwt_required(recipe_controller.create_recipe))
 recipe_bp.route('/<recipeId>', methods=['PUT'])(jwt_required(recipe_controller.update_recipe))
 recipe_bp.route('/<recipeId>', methods=['DELETE'])(jwt_required(recipe_controller.delete_recipe))
-recipe_bp.route('/feed', methods=['GET'])(jwt_required(recipe_controller.get_feed))
\ No newline at end of file
+recipe_bp.route('/feed', methods=['GET'])(jwt_required(recipe_controller.get_feed))
+recipe_bp.route('/import', methods=['POST'])(jwt_required(recipe_controller.import_recipes))
+recipe_bp.route('/export', methods=['GET'])(jwt_required(recipe_controller.export_recipes))
\ No newline at end of file
@@ -0,0 +1,75 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Số giây một count được dùng lại trước khi đếm lại từ MongoDB (sửa sai lệch do instance khác ghi)
+COUNT_CACHE_TTL = int(os.getenv('COUNT_CACHE_TTL', 300))
+COUNT_CACHE_MAX_ENTRIES = int(os.getenv('COUNT_CACHE_MAX_ENTRIES', 10000))
+
+
+class CountCache:
+    """
+    Cache tổng số document theo từng bộ lọc bằng (vd: {category_id, difficulty})
+
+    - get(): trả về count đã cache, hết hạn (TTL) hoặc chưa có thì đếm lại
+    - adjust(): khi tạo/xóa document, cộng/trừ trực tiếp vào mọi count có bộ lọc khớp
+      thay vì xóa cache, nên listing không phải count lại sau mỗi lần ghi
+    """
+
+    def __init__(self, fields, ttl=COUNT_CACHE_TTL, max_entries=COUNT_CACHE_MAX_ENTRIES):
+        self.fields = tuple(fields)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> [count, expires_at]
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(filters):
+        return tuple(sorted(filters.items()))
+
+    def snapshot(self, document):
+        """Giá trị các field dùng làm bộ lọc của một document (gọi trước khi sửa để adjust đúng)"""
+        return {field: getattr(document, field, None) for field in self.fields}
+
+    def get(self, filters, compute):
+        key = self._key(filters)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        count = compute()
+        with self._lock:
+            self._entries[key] = [count, now + self.ttl]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return count
+
+    def adjust(self, values, delta):
+        """Cộng `delta` vào mọi count có bộ lọc khớp với `values` (snapshot của document)"""
+        with self._lock:
+            for key, entry in self._entries.items():
+                if all(values.get(field) == value for field, value in key):
+                    entry[0] = max(0, entry[0] + delta)
+
+    def move(self, before, after):
+        """Document đổi giá trị field lọc (vd: đổi category): chuyển count từ bộ lọc cũ sang mới"""
+        if before != after:
+            self.adjust(before, -1)
+            self.adjust(after, 1)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
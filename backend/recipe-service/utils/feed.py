@@ -0,0 +1,190 @@
+"""
+Feed cá nhân (GET /recipes/feed) theo quan hệ follow
+
+- Fan-out-on-write: khi tạo recipe, thêm một FeedItem vào timeline của từng follower
+- Tác giả có hơn FEED_FANOUT_MAX_FOLLOWERS follower thì không fan-out; follower của họ lưu tác giả
+  trong FeedState.pullAuthors và recipe được đọc trực tiếp rồi merge khi xem feed
+- Chế độ push/pull được chọn theo bộ đếm follower (không phải tải danh sách id) mỗi lần tác giả đăng recipe;
+  tác giả pull chỉ quay lại push khi còn dưới FEED_FANOUT_RESUME_FOLLOWERS follower (tránh đổi qua lại quanh ngưỡng)
+- Timeline được dựng lại (backfill) khi user xem feed lần đầu, khi follow/unfollow
+  (comment-service gọi POST /internal/feed/<userId>/rebuild) hoặc sau FEED_REBUILD_SECONDS
+"""
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+
+from pymongo.errors import BulkWriteError
+
+from models.feed_model import FeedItem, FeedState, FeedAuthor, FEED_RETENTION_DAYS
+from models.recipe_model import Recipe
+from utils import follow_client
+from utils.pagination import MAX_LIMIT, encode_cursor, decode_cursor, keyset_filter, order_by_args
+
+logger = logging.getLogger(__name__)
+
+FEED_FANOUT_MAX_FOLLOWERS = int(os.getenv('FEED_FANOUT_MAX_FOLLOWERS', 5000))
+FEED_FANOUT_RESUME_FOLLOWERS = int(os.getenv('FEED_FANOUT_RESUME_FOLLOWERS', FEED_FANOUT_MAX_FOLLOWERS * 4 // 5))
+FEED_BACKFILL_SIZE = int(os.getenv('FEED_BACKFILL_SIZE', 500))
+FEED_REBUILD_SECONDS = int(os.getenv('FEED_REBUILD_SECONDS', 86400))
+FANOUT_BATCH_SIZE = 1000
+
+SORT = 'newest'
+
+
+def _insert_items(items):
+    """insert_many theo lô, bỏ qua item đã có (unique timeline index)"""
+    collection = FeedItem._get_collection()
+    for start in range(0, len(items), FANOUT_BATCH_SIZE):
+        try:
+            collection.insert_many(items[start:start + FANOUT_BATCH_SIZE], ordered=False)
+        except BulkWriteError as e:
+            if any(error.get('code') != 11000 for error in e.details.get('writeErrors', [])):
+                raise
+
+
+def _should_fan_out(author, followers_count):
+    """Push khi dưới ngưỡng; tác giả đang pull chỉ quay lại push khi xuống dưới FEED_FANOUT_RESUME_FOLLOWERS"""
+    if author is not None and not author.fanout:
+        return followers_count < FEED_FANOUT_RESUME_FOLLOWERS
+    return followers_count <= FEED_FANOUT_MAX_FOLLOWERS
+
+
+def fan_out(recipe_id, author_id, created_at):
+    """Đẩy recipe mới vào timeline của các follower của tác giả"""
+    followers_count = follow_client.get_followers_count(author_id)
+    if followers_count is None:
+        # Follow service lỗi: follower sẽ thấy recipe khi timeline được dựng lại
+        return 0
+
+    author = FeedAuthor.objects(author_id=author_id).first()
+    was_pull = author is not None and not author.fanout
+    now = datetime.utcnow()
+    if not _should_fan_out(author, followers_count):
+        if not was_pull:
+            followers = follow_client.get_follower_ids(author_id)
+            if followers is None:
+                return 0
+            FeedState._get_collection().update_many(
+                {'_id': {'$in': followers}}, {'$addToSet': {'pullAuthors': author_id}}
+            )
+            logger.info(f"Author {author_id} has {followers_count} followers, switched to pull")
+        FeedAuthor(author_id=author_id, fanout=False, followersCount=followers_count, updatedAt=now).save()
+        return 0
+
+    followers = follow_client.get_follower_ids(author_id)
+    if followers is None:
+        return 0
+
+    FeedAuthor(author_id=author_id, fanout=True, followersCount=len(followers), updatedAt=now).save()
+    if was_pull:
+        # Recipe cũ của tác giả không có trong timeline: bỏ khỏi pullAuthors và dựng lại timeline khi xem feed
+        FeedState._get_collection().update_many(
+            {'_id': {'$in': followers}, 'pullAuthors': author_id},
+            {'$pull': {'pullAuthors': author_id}, '$set': {'builtAt': datetime.min}}
+        )
+        logger.info(f"Author {author_id} has {followers_count} followers, switched back to push")
+    _insert_items([
+        {'user_id': follower_id, 'recipe_id': recipe_id, 'author_id': author_id, 'createdAt': created_at}
+        for follower_id in followers
+    ])
+    return len(followers)
+
+
+def fan_out_async(recipe):
+    """Fan-out trên thread riêng để không làm chậm POST /recipes"""
+    def run():
+        try:
+            fan_out(recipe.id, recipe.author_id, recipe.createdAt)
+        except Exception as e:
+            logger.error(f"Error fanning out recipe {recipe.id}: {str(e)}")
+
+    threading.Thread(target=run, name='feed-fan-out', daemon=True).start()
+
+
+def remove_recipe(recipe_id):
+    FeedItem._get_collection().delete_many({'recipe_id': recipe_id})
+
+
+def rebuild(user_id):
+    """Dựng lại timeline từ danh sách đang follow, trả về FeedState (None nếu follow service lỗi)"""
+    following = follow_client.get_following_ids(user_id)
+    if following is None:
+        return None
+
+    pull_authors = [
+        author['_id'] for author in
+        FeedAuthor._get_collection().find({'_id': {'$in': following}, 'fanout': False}, {'_id': 1})
+    ]
+    push_authors = sorted(set(following) - set(pull_authors))
+
+    since = datetime.utcnow() - timedelta(days=FEED_RETENTION_DAYS)
+    recent = Recipe._get_collection().find(
+        {'author_id': {'$in': push_authors}, 'createdAt': {'$gte': since}},
+        {'author_id': 1, 'createdAt': 1}
+    ).sort([('createdAt', -1), ('_id', -1)]).limit(FEED_BACKFILL_SIZE) if push_authors else []
+
+    FeedItem._get_collection().delete_many({'user_id': user_id})
+    _insert_items([
+        {'user_id': user_id, 'recipe_id': row['_id'], 'author_id': row['author_id'], 'createdAt': row['createdAt']}
+        for row in recent
+    ])
+
+    state = FeedState(user_id=user_id, pullAuthors=pull_authors, followingCount=len(following),
+                      builtAt=datetime.utcnow())
+    state.save()
+    return state
+
+
+def get_state(user_id):
+    """FeedState của user, dựng timeline nếu chưa có hoặc đã quá FEED_REBUILD_SECONDS"""
+    state = FeedState.objects(user_id=user_id).first()
+    if state is None or state.builtAt < datetime.utcnow() - timedelta(seconds=FEED_REBUILD_SECONDS):
+        state = rebuild(user_id) or state
+    return state
+
+
+def read(user_id, pull_authors, args, default_limit=10):
+    """
+    Một trang feed: merge timeline (push) và recipe của các tác giả pull theo (createdAt, _id)
+    Mỗi nguồn chỉ đọc limit + 1 phần tử nên thời gian không phụ thuộc số người đang follow
+    Trả về (danh sách summary row, dict pagination)
+    """
+    limit = max(1, min(int(args.get('limit', default_limit)), MAX_LIMIT))
+    cursor = args.get('cursor')
+    position = decode_cursor(cursor, SORT) if cursor else None
+
+    timeline_filter = {'user_id': user_id}
+    if position:
+        timeline_filter.update(keyset_filter(SORT, *position, id_field='recipe_id'))
+    timeline = [
+        (row['createdAt'], row['recipe_id']) for row in
+        FeedItem._get_collection().find(timeline_filter, {'createdAt': 1, 'recipe_id': 1})
+        .sort([('createdAt', -1), ('recipe_id', -1)]).limit(limit + 1)
+    ]
+
+    pulled = {}
+    if pull_authors:
+        query = Recipe.summary_rows(Recipe.objects(author_id__in=pull_authors)).order_by(*order_by_args(SORT))
+        if position:
+            query = query.filter(__raw__=keyset_filter(SORT, *position))
+        pulled = {row['_id']: row for row in query.limit(limit + 1)}
+
+    merged = sorted(
+        set(timeline) | {(row['createdAt'], recipe_id) for recipe_id, row in pulled.items()}, reverse=True
+    )
+    has_more = len(merged) > limit
+    page = merged[:limit]
+
+    missing = [recipe_id for _, recipe_id in page if recipe_id not in pulled]
+    rows = dict(pulled)
+    if missing:
+        rows.update({row['_id']: row for row in Recipe.summary_rows(Recipe.objects(id__in=missing))})
+
+    items = [rows[recipe_id] for _, recipe_id in page if recipe_id in rows]
+    last = page[-1] if page else None
+    return items, {
+        "limit": limit,
+        "nextCursor": encode_cursor(SORT, *last) if has_more else None,
+        "hasMore": has_more
+    }
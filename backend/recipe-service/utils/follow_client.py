@@ -0,0 +1,50 @@
+import requests
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Quan hệ follow nằm ở comment-service (/api/users/...)
+FOLLOW_SERVICE_URL = os.getenv('FOLLOW_SERVICE_URL', 'http://localhost:8085/api')
+FOLLOW_SERVICE_TIMEOUT = float(os.getenv('FOLLOW_SERVICE_TIMEOUT', 5))
+# Shared secret của /api/internal/* ở comment-service (cùng INTERNAL_API_TOKEN với api-gateway)
+INTERNAL_API_TOKEN = os.getenv('INTERNAL_API_TOKEN', '')
+
+
+def _get(path):
+    return requests.get(
+        f"{FOLLOW_SERVICE_URL}{path}",
+        headers={'X-Internal-Token': INTERNAL_API_TOKEN} if INTERNAL_API_TOKEN else None,
+        timeout=FOLLOW_SERVICE_TIMEOUT
+    )
+
+
+def _get_ids(path):
+    try:
+        response = _get(path)
+        response.raise_for_status()
+        return [str(user_id) for user_id in response.json()]
+    except (requests.RequestException, ValueError) as e:
+        logger.warning(f"Error calling follow service {path}: {str(e)}")
+        return None
+
+
+def get_follower_ids(user_id):
+    """Id các user đang follow `user_id`, None nếu follow service lỗi"""
+    return _get_ids(f"/internal/users/{user_id}/follower-ids")
+
+
+def get_following_ids(user_id):
+    """Id các user mà `user_id` đang follow, None nếu follow service lỗi"""
+    return _get_ids(f"/internal/users/{user_id}/following-ids")
+
+
+def get_followers_count(user_id):
+    """Số follower của `user_id` (bộ đếm của follow service), None nếu follow service lỗi"""
+    try:
+        response = _get(f"/internal/users/{user_id}/followers-count")
+        response.raise_for_status()
+        return int(response.json()['followersCount'])
+    except (requests.RequestException, ValueError, KeyError, TypeError) as e:
+        logger.warning(f"Error calling follow service followers-count: {str(e)}")
+        return None
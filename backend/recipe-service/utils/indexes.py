@@ -0,0 +1,41 @@
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Tạo index còn thiếu khi khởi động (tắt nếu index được quản lý bằng migration riêng)
+AUTO_CREATE_INDEXES = os.getenv('AUTO_CREATE_INDEXES', 'True').lower() == 'true'
+# Dừng service nếu vẫn thiếu index (tránh chạy với collection scan trên production)
+REQUIRE_INDEXES = os.getenv('REQUIRE_INDEXES', 'False').lower() == 'true'
+
+
+def _normalize(key):
+    """[(field, direction), ...] -> tuple so sánh được (direction có thể là 1 hoặc 1.0)"""
+    return tuple((field, int(direction)) for field, direction in key)
+
+
+def missing_indexes(document_cls):
+    """Các index khai báo trong meta nhưng chưa có trên collection"""
+    existing = document_cls._get_collection().index_information()
+    existing_keys = {_normalize(info['key']) for info in existing.values()}
+    return [spec for spec in document_cls.list_indexes() if _normalize(spec) not in existing_keys]
+
+
+def verify_indexes(document_cls):
+    """
+    Kiểm tra index của một Document khi khởi động
+    Tạo index còn thiếu (AUTO_CREATE_INDEXES), log lỗi nếu vẫn thiếu, raise nếu REQUIRE_INDEXES
+    """
+    if AUTO_CREATE_INDEXES:
+        document_cls.ensure_indexes()
+
+    missing = missing_indexes(document_cls)
+    if not missing:
+        logger.info(f"✅ Indexes OK ({document_cls.__name__}: {len(document_cls.list_indexes())})")
+        return True
+
+    for spec in missing:
+        logger.error(f"❌ Missing index on {document_cls._get_collection_name()}: {spec}")
+    if REQUIRE_INDEXES:
+        raise RuntimeError(f"{len(missing)} index(es) missing on {document_cls._get_collection_name()}")
+    return False
@@ -11,6 +11,7 @@ logger = logging.getLogger(__name__)
 # Nên đặt trong file .env: SKIP_AUTH=True
 SKIP_AUTH = os.getenv('SKIP_AUTH', 'False').lower() == 'true'
 MOCK_USER_ID = "dev_user_id_123" # User ID giả lập để test
+MOCK_SCOPES = {"ROLE_ADMIN"}
 
 def decode_jwt(token):
     # ... (giữ nguyên logic cũ) ...
@@ -29,6 +30,7 @@ def jwt_required(f):
         # [MỚI] Logic bỏ qua Auth nếu đang Dev
         if SKIP_AUTH:
             g.user_id = MOCK_USER_ID
+            g.scopes = MOCK_SCOPES
             logger.warning(f"⚠️ SKIP AUTH MODE: Logged in as {g.user_id}")
             return f(*args, **kwargs)
 
@@ -41,6 +43,7 @@ def jwt_required(f):
         try:
             decoded = decode_jwt(auth_header)
             g.user_id = decoded.get('sub')
+            g.scopes = set((decoded.get('scope') or '').split())
             logger.info(f"Authenticated user: {g.user_id}")
         except Exception:
             error_code = ErrorCode.UNAUTHENTICATED
@@ -48,4 +51,8 @@ def jwt_required(f):
         
         return f(*args, **kwargs)
     
-    return decorated_function
\ No newline at end of file
+    return decorated_function
+
+def is_admin():
+    """User của request hiện tại có ROLE_ADMIN (scope trong JWT của authentication-service)"""
+    return 'ROLE_ADMIN' in g.get('scopes', ())
@@ -0,0 +1,116 @@
+import base64
+import json
+from datetime import datetime
+from bson import ObjectId
+from bson.errors import InvalidId
+
+# sort param -> (field, direction); _id is always the tie-breaker in the same direction
+SORT_FIELDS = {
+    'newest': ('createdAt', -1),
+    'oldest': ('createdAt', 1),
+    'most_viewed': ('viewsCount', -1),
+    'most_liked': ('favoritesCount', -1),
+}
+DEFAULT_SORT = 'newest'
+# Số phần tử tối đa một trang (limit ngoài [1, MAX_LIMIT] bị kẹp lại)
+MAX_LIMIT = 100
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def resolve_sort(sort):
+    """Tên sort không hợp lệ thì dùng mặc định (newest)"""
+    return sort if sort in SORT_FIELDS else DEFAULT_SORT
+
+
+def order_by_args(sort):
+    """Thứ tự sắp xếp ổn định: field sort + _id (cho cả offset và cursor)"""
+    field, direction = SORT_FIELDS[resolve_sort(sort)]
+    prefix = '-' if direction < 0 else ''
+    return (f'{prefix}{field}', f'{prefix}id')
+
+
+def encode_cursor(sort, value, object_id):
+    """Cursor opaque = base64(sort, giá trị field sort, _id) của phần tử cuối trang"""
+    if isinstance(value, datetime):
+        value = {'$date': value.isoformat()}
+    payload = json.dumps({'s': sort, 'v': value, 'id': str(object_id)}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, sort):
+    """Trả về (value, ObjectId), raise InvalidCursor nếu cursor sai hoặc không cùng kiểu sort"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value = payload['v']
+        if isinstance(value, dict):
+            value = datetime.fromisoformat(value['$date'])
+        object_id = ObjectId(payload['id'])
+    except (ValueError, KeyError, TypeError, InvalidId) as e:
+        raise InvalidCursor("Cursor không hợp lệ") from e
+    if payload.get('s') != sort:
+        raise InvalidCursor("Cursor không khớp với kiểu sắp xếp")
+    return value, object_id
+
+
+def keyset_filter(sort, value, object_id, id_field='_id'):
+    """Điều kiện 'sau phần tử cuối trang trước' theo (field, _id) - dùng được index, không phải skip"""
+    field, direction = SORT_FIELDS[sort]
+    op = '$lt' if direction < 0 else '$gt'
+    return {'$or': [
+        {field: {op: value}},
+        {field: value, id_field: {op: object_id}},
+    ]}
+
+
+def _position(item, field):
+    """(giá trị sort, _id) của một phần tử: Document hoặc dict thô (as_pymongo)"""
+    if isinstance(item, dict):
+        return item.get(field), item['_id']
+    return item[field], item.id
+
+
+def paginate(query, args, sort, default_limit=10, with_total=True, count=None):
+    """
+    Phân trang một QuerySet theo request args
+
+    - Có tham số `cursor` (kể cả rỗng = trang đầu): keyset pagination, trả về nextCursor/hasMore
+    - Không có: offset (page/limit) như cũ, kèm nextCursor để client chuyển sang cursor
+    - totalItems/totalPages lấy từ `count()` (vd: count đã cache) nếu có, không thì query.count();
+      client gửi ?withTotal=false để bỏ hẳn bước đếm
+    Trả về (danh sách document, dict pagination)
+    """
+    sort = resolve_sort(sort)
+    field, _ = SORT_FIELDS[sort]
+    limit = max(1, min(int(args.get('limit', default_limit)), MAX_LIMIT))
+    query = query.order_by(*order_by_args(sort))
+
+    if 'cursor' in args:
+        cursor = args.get('cursor')
+        if cursor:
+            value, object_id = decode_cursor(cursor, sort)
+            query = query.filter(__raw__=keyset_filter(sort, value, object_id))
+        # Lấy thêm 1 phần tử để biết còn trang sau không
+        items = list(query.limit(limit + 1))
+        has_more = len(items) > limit
+        items = items[:limit]
+        last = items[-1] if items else None
+        return items, {
+            "limit": limit,
+            "nextCursor": encode_cursor(sort, *_position(last, field)) if has_more else None,
+            "hasMore": has_more
+        }
+
+    page = int(args.get('page', 1))
+    skip = max(0, (page - 1) * limit)
+    items = list(query.skip(skip).limit(limit))
+    pagination = {"page": page, "limit": limit}
+    if with_total and str(args.get('withTotal', 'true')).lower() != 'false':
+        total_items = count() if count else query.count()
+        pagination.update({"totalItems": total_items, "totalPages": (total_items + limit - 1) // limit})
+    last = items[-1] if items else None
+    pagination["nextCursor"] = encode_cursor(sort, *_position(last, field)) if len(items) == limit else None
+    return items, pagination
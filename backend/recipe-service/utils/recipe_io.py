@@ -0,0 +1,245 @@
+"""
+Import/export recipe hàng loạt dạng NDJSON (mỗi dòng một JSON object)
+
+- parse_recipe()/build_recipe(): đọc JSON với cùng quy tắc của POST /recipes (create_recipe dùng lại hàm này)
+- import_lines(): đọc từng dòng, validate theo field của model, insert_many không thứ tự (ordered=False) theo lô IMPORT_BATCH_SIZE,
+  trả về lỗi theo số dòng thay vì dừng cả lô
+- export_lines(): đọc raw row theo _id, mỗi recipe một dòng đúng định dạng mà import đọc được
+
+Dùng bởi POST /recipes/import, GET /recipes/export và CLI bulk_recipes.py
+"""
+import json
+import os
+from datetime import datetime
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from mongoengine import ValidationError, EmbeddedDocumentField, ListField
+from pymongo.errors import BulkWriteError
+
+from exceptions.exceptions import ErrorCode
+from models.recipe_model import Recipe, Ingredient, Instruction, NutritionInfo
+
+IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', 1000))
+EXPORT_BATCH_SIZE = 1000
+
+REQUIRED_FIELDS = ['title', 'ingredients', 'instructions']
+NUTRITION_FIELDS = ('calories', 'protein', 'carbs', 'fat', 'fiber')
+# Giữ nguyên khi import có keep_identity (chuyển dữ liệu giữa các môi trường)
+COUNTER_FIELDS = ('averageRating', 'ratingsCount', 'viewsCount', 'favoritesCount', 'commentsCount')
+
+
+class RecipeDataError(ValueError):
+    def __init__(self, error_code, message=None):
+        super().__init__(message or error_code.message)
+        self.code = error_code.code
+
+
+def _list_field(data, field):
+    value = data.get(field, [])
+    return value if isinstance(value, list) else []
+
+
+def parse_recipe(data, author_id, keep_identity=False):
+    """
+    Giá trị các field của Recipe (embedded document là dict) từ JSON body của POST /recipes,
+    raise RecipeDataError nếu thiếu field bắt buộc
+
+    keep_identity: lấy cả id, authorId, createdAt và các bộ đếm từ data (dữ liệu export)
+    """
+    if not data or not isinstance(data, dict):
+        raise RecipeDataError(ErrorCode.INVALID_DATA, "No data provided")
+
+    # Validate các trường bắt buộc cấp 1
+    missing = [field for field in REQUIRED_FIELDS if field not in data]
+    if missing:
+        raise RecipeDataError(ErrorCode.MISSING_FIELDS, f"Thiếu thông tin bắt buộc: {', '.join(missing)}")
+
+    # Parse Ingredients (Xử lý an toàn)
+    ingredients = [
+        {'name': i['name'], 'amount': i['amount'], 'note': i.get('note', '')}
+        for i in _list_field(data, 'ingredients')
+        if isinstance(i, dict) and 'name' in i and 'amount' in i
+    ]
+
+    # Parse Instructions (Xử lý an toàn)
+    instructions = [
+        {'step': s.get('step', idx + 1), 'description': s['description'], 'image': s.get('image', ''),
+         'duration': s.get('duration', 0)}
+        for idx, s in enumerate(_list_field(data, 'instructions'))
+        if isinstance(s, dict) and 'description' in s
+    ]
+
+    # Parse Nutrition (Xử lý an toàn)
+    nutri_data = data.get('nutritionInfo', {})
+    if not isinstance(nutri_data, dict): nutri_data = {}
+
+    values = {
+        'title': data['title'],
+        'description': data.get('description', ''),
+        'thumbnail': data.get('thumbnail', ''),
+        'author_id': author_id,
+        'category_id': data.get('categoryId', ''),
+        'difficulty': data.get('difficulty', 'medium'),
+        'cookingTime': data.get('cookingTime', 0),
+        'servings': data.get('servings', 1),
+        'ingredients': ingredients,
+        'instructions': instructions,
+        'images': _list_field(data, 'images'),
+        'tags': _list_field(data, 'tags'),
+        'tips': _list_field(data, 'tips'),
+        'nutritionInfo': {field: nutri_data.get(field, 0) for field in NUTRITION_FIELDS},
+    }
+
+    if keep_identity:
+        try:
+            if data.get('id'):
+                values['id'] = ObjectId(data['id'])
+            if data.get('createdAt'):
+                values['createdAt'] = datetime.fromisoformat(data['createdAt'])
+        except (InvalidId, TypeError, ValueError) as e:
+            raise RecipeDataError(ErrorCode.INVALID_DATA, str(e))
+        if data.get('authorId'):
+            values['author_id'] = data['authorId']
+        for field in COUNTER_FIELDS:
+            if field in data:
+                values[field] = data[field]
+    return values
+
+
+def build_recipe(data, author_id, keep_identity=False):
+    """Recipe (chưa lưu) từ JSON body của POST /recipes, xem parse_recipe"""
+    values = parse_recipe(data, author_id, keep_identity)
+    values['ingredients'] = [Ingredient(**i) for i in values['ingredients']]
+    values['instructions'] = [Instruction(**s) for s in values['instructions']]
+    values['nutritionInfo'] = NutritionInfo(**values['nutritionInfo'])
+    return Recipe(**values)
+
+
+def _to_mongo(document_cls, values):
+    """
+    Document MongoDB từ dict giá trị, validate bằng chính các field của model (kiểu, choices, required)
+    Giống Document(**values).validate() + to_mongo() nhưng không dựng Document (nhanh hơn nhiều lần khi import)
+    """
+    document = {}
+    for name, field in document_cls._fields.items():
+        value = values.get(name)
+        if value is None and field.default is not None:
+            value = field.default() if callable(field.default) else field.default
+        if value is None:
+            if field.required:
+                raise ValidationError(f"Field is required: {document_cls.__name__}.{name}")
+            continue
+        if isinstance(field, EmbeddedDocumentField):
+            value = _to_mongo(field.document_type, value)
+        elif isinstance(field, ListField) and isinstance(field.field, EmbeddedDocumentField):
+            value = [_to_mongo(field.field.document_type, item) for item in value]
+        else:
+            # _validate = validate() + choices/validation của field (như Document.validate)
+            field._validate(value)
+            value = field.to_mongo(value)
+        document[field.db_field] = value
+    return document
+
+
+# --- Import ---
+
+def _insert_batch(collection, batch):
+    """insert_many(ordered=False) một lô [(số dòng, document)], trả về (số đã insert, [(số dòng, lỗi)])"""
+    if not batch:
+        return 0, []
+    try:
+        collection.insert_many([doc for _, doc in batch], ordered=False)
+        return len(batch), []
+    except BulkWriteError as e:
+        write_errors = e.details.get('writeErrors', [])
+        failures = [(batch[error['index']][0], error.get('errmsg', 'Write error')) for error in write_errors]
+        return e.details.get('nInserted', len(batch) - len(write_errors)), failures
+
+
+def import_lines(lines, author_id, keep_identity=False, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Import recipe từ các dòng NDJSON (str hoặc bytes), dòng trống được bỏ qua
+
+    Yield {"line", "error"} cho từng dòng lỗi (ngay khi lô của dòng đó được ghi),
+    cuối cùng yield {"summary": {"lines", "inserted", "failed"}}
+    """
+    collection = Recipe._get_collection()
+    now = datetime.utcnow()
+    batch = []
+    total = inserted = failed = 0
+
+    def flush():
+        nonlocal inserted, failed
+        count, failures = _insert_batch(collection, batch)
+        batch.clear()
+        inserted += count
+        failed += len(failures)
+        return failures
+
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        total += 1
+        try:
+            values = parse_recipe(json.loads(line), author_id, keep_identity)
+            # updatedAt = lúc import để search index của mọi instance đọc lại (utils/search.py)
+            values['updatedAt'] = now
+            document = _to_mongo(Recipe, values)
+        except (ValueError, ValidationError) as e:
+            failed += 1
+            yield {"line": number, "error": str(e)}
+            continue
+        batch.append((number, document))
+        if len(batch) >= batch_size:
+            for line_number, error in flush():
+                yield {"line": line_number, "error": error}
+
+    for line_number, error in flush():
+        yield {"line": line_number, "error": error}
+    yield {"summary": {"lines": total, "inserted": inserted, "failed": failed}}
+
+
+# --- Export ---
+
+def _isoformat(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def export_row(row):
+    """Một raw row (as_pymongo) -> dict theo định dạng import (body của POST /recipes + id, authorId, ...)"""
+    nutrition = row.get('nutritionInfo') or {}
+    return {
+        "id": str(row['_id']),
+        "authorId": row.get('author_id'),
+        "title": row.get('title'),
+        "description": row.get('description', ''),
+        "thumbnail": row.get('thumbnail', ''),
+        "categoryId": row.get('category_id', ''),
+        "difficulty": row.get('difficulty', 'medium'),
+        "cookingTime": row.get('cookingTime', 0),
+        "servings": row.get('servings', 1),
+        "ingredients": [
+            {"name": i.get('name'), "amount": i.get('amount'), "note": i.get('note', '')}
+            for i in row.get('ingredients') or []
+        ],
+        "instructions": [
+            {"step": s.get('step'), "description": s.get('description'), "image": s.get('image', ''),
+             "duration": s.get('duration', 0)}
+            for s in row.get('instructions') or []
+        ],
+        "images": row.get('images') or [],
+        "tags": row.get('tags') or [],
+        "tips": row.get('tips') or [],
+        "nutritionInfo": {field: nutrition.get(field, 0) for field in NUTRITION_FIELDS},
+        **{field: row.get(field, 0) for field in COUNTER_FIELDS},
+        "createdAt": _isoformat(row.get('createdAt')),
+        "updatedAt": _isoformat(row.get('updatedAt')),
+    }
+
+
+def export_lines(**filters):
+    """Mỗi recipe khớp filters (vd author_id, category_id) thành một dòng NDJSON, theo thứ tự _id"""
+    rows = Recipe.objects(**filters).order_by('id').as_pymongo().batch_size(EXPORT_BATCH_SIZE)
+    for row in rows:
+        yield json.dumps(export_row(row), ensure_ascii=False) + '\n'
@@ -0,0 +1,166 @@
+"""
+Tìm kiếm công thức (GET /search/recipes) trên SearchIndex trong bộ nhớ (utils/search_index.py)
+
+- Khi khởi động: đọc toàn bộ recipe (chỉ các field cần cho tìm kiếm) vào index, trong lúc đó
+  /search/recipes trả 503
+- Instance nào tạo/sửa/xóa recipe thì cập nhật index của mình ngay (index_recipe/remove_recipe)
+- Thay đổi từ instance khác: mỗi SEARCH_SYNC_SECONDS đọc lại các recipe có updatedAt mới hơn mốc lần trước;
+  recipe trong khoảng đọc lại (SYNC_OVERLAP) có updatedAt không đổi so với lần index trước thì bỏ qua
+- Mỗi SEARCH_REBUILD_SECONDS dựng lại toàn bộ index (recipe bị xóa ở instance khác, viewsCount/favoritesCount
+  dùng cho sort); recipe đã xóa nhưng còn trong index bị controller bỏ qua khi đọc
+- Index gợi ý (utils/suggest.py) được cập nhật cùng lúc, từ cùng các recipe đã đọc
+"""
+import gc
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from models.recipe_model import SUMMARY_FIELDS
+from utils.search_index import SearchIndex
+from utils.suggest_index import SuggestIndex
+
+logger = logging.getLogger(__name__)
+
+SEARCH_SYNC_SECONDS = int(os.getenv('SEARCH_SYNC_SECONDS', 30))
+SEARCH_REBUILD_SECONDS = int(os.getenv('SEARCH_REBUILD_SECONDS', 3600))
+# Đọc lại cả các recipe cập nhật ngay trước mốc (clock lệch giữa các instance, ghi chậm)
+SYNC_OVERLAP = timedelta(seconds=60)
+BATCH_SIZE = 5000
+
+# Field đọc từ MongoDB để index: field summary (lọc, sort) + tên nguyên liệu
+SEARCH_FIELDS = SUMMARY_FIELDS + ('ingredients.name',)
+
+
+class RecipeSearch:
+    def __init__(self, get_recipes, suggestions, sync_seconds=SEARCH_SYNC_SECONDS,
+                 rebuild_seconds=SEARCH_REBUILD_SECONDS):
+        self._get_recipes = get_recipes
+        self.suggestions = suggestions
+        self.sync_seconds = sync_seconds
+        self.rebuild_seconds = rebuild_seconds
+        self.index = SearchIndex()
+        self.ready = False
+        self._watermark = None
+        self._recent = {}              # recipe id -> updatedAt đã index, của các recipe trong khoảng SYNC_OVERLAP
+        self._built_at = 0.0
+        self._frozen = False
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _projection(self):
+        return {field: 1 for field in SEARCH_FIELDS}
+
+    def _load(self, query, sinks, recent, since):
+        """
+        Đưa các recipe khớp query vào từng sink, trả về (số recipe, updatedAt lớn nhất)
+        recent: recipe id -> updatedAt đã index; recipe có updatedAt không đổi được bỏ qua,
+        recipe có updatedAt >= since được ghi lại vào recent
+        """
+        count, latest = 0, None
+        cursor = self._get_recipes().find(query, self._projection(), batch_size=BATCH_SIZE)
+        for row in cursor:
+            updated_at = row.get('updatedAt')
+            if updated_at:
+                recipe_id = str(row['_id'])
+                if recent.get(recipe_id) == updated_at:
+                    continue
+                if updated_at >= since:
+                    recent[recipe_id] = updated_at
+                if latest is None or updated_at > latest:
+                    latest = updated_at
+            for sink in sinks:
+                sink(row)
+            count += 1
+        return count, latest
+
+    def build(self):
+        """Dựng index mới từ toàn bộ collection rồi thay index đang dùng"""
+        started, started_at = time.monotonic(), datetime.utcnow()
+        index = SearchIndex()
+        suggest_index = SuggestIndex()
+        self.suggestions.refresh_users()
+        recent = {}
+        with suggest_index.bulk_load():
+            count, _ = self._load(
+                {}, (index.add, lambda row: self.suggestions.add_recipe(row, suggest_index)),
+                recent, started_at - SYNC_OVERLAP
+            )
+        with self._lock:
+            # Recipe ghi trong lúc build được sync() lần sau đọc lại
+            self._watermark = started_at
+            self._recent = recent
+            self.index = index
+            self.suggestions.replace(suggest_index)
+            self.ready = True
+            self._built_at = time.monotonic()
+        if not self._frozen:
+            # Chỉ một lần, sau lần build đầu khi khởi động: hàng triệu object sống lâu của index không bị GC quét lại
+            # mỗi lần thu gom (gây khựng hàng trăm ms). gc.freeze() áp dụng cho cả process và object đã freeze không
+            # bao giờ được GC thu hồi nên không gọi lại ở các lần rebuild (index cũ được giải phóng theo reference count)
+            gc.collect()
+            gc.freeze()
+            self._frozen = True
+        logger.info(f"Search index built: {count} recipes in {time.monotonic() - started:.1f}s")
+        return count
+
+    def sync(self):
+        """Đọc lại các recipe có updatedAt >= mốc lần trước - SYNC_OVERLAP"""
+        if self._watermark is None:
+            return self.build()
+        since = self._watermark - SYNC_OVERLAP
+        count, latest = self._load(
+            {'updatedAt': {'$gte': since}}, (self.index.add, self.suggestions.add_recipe), self._recent, since
+        )
+        with self._lock:
+            if latest is not None and latest > self._watermark:
+                self._watermark = latest
+                # Recipe ra khỏi khoảng đọc lại thì không cần nhớ nữa
+                since = self._watermark - SYNC_OVERLAP
+                self._recent = {recipe_id: updated_at for recipe_id, updated_at in self._recent.items()
+                                if updated_at >= since}
+        return count
+
+    def search(self, query, filters=None, sort='relevance', page=1, limit=10, with_facets=True):
+        return self.index.search(query, filters, sort, page, limit, with_facets)
+
+    def index_recipe(self, recipe):
+        """Cập nhật index ngay sau khi tạo/sửa recipe (Document)"""
+        if not self.ready:
+            return
+        row = {field: getattr(recipe, field) for field in SUMMARY_FIELDS}
+        row['_id'] = recipe.id
+        row['ingredients'] = [{'name': ingredient.name} for ingredient in recipe.ingredients or []]
+        self.index.add(row)
+        self.suggestions.add_recipe(row)
+        updated_at = recipe.updatedAt
+        if updated_at:
+            # MongoDB lưu datetime đến mili giây: sync() đọc lại đúng giá trị này thì bỏ qua
+            self._recent[str(recipe.id)] = updated_at.replace(microsecond=updated_at.microsecond // 1000 * 1000)
+
+    def remove_recipe(self, recipe_id):
+        self.index.remove(recipe_id)
+        self.suggestions.remove_recipe(recipe_id)
+
+    def stats(self):
+        return {'ready': self.ready, **self.index.stats(), 'suggestions': self.suggestions.stats()}
+
+    def start(self):
+        """Build index ở thread nền rồi sync định kỳ (gọi nhiều lần cũng chỉ tạo một thread)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='search-sync', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                if not self.ready or time.monotonic() - self._built_at >= self.rebuild_seconds:
+                    self.build()
+                else:
+                    self.sync()
+            except Exception as e:
+                logger.error(f"Error syncing search index: {str(e)}")
+            time.sleep(self.sync_seconds)
@@ -0,0 +1,396 @@
+import heapq
+import math
+import threading
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from itertools import chain, repeat
+from operator import add
+
+from utils.text import tokenize, fold
+
+# Trọng số của từng field khi tính tần suất từ (title quan trọng nhất)
+FIELD_WEIGHTS = {'title': 3.0, 'tags': 2.0, 'ingredients': 1.5, 'description': 1.0}
+# Cặp từ liền nhau trong title ("pho bo"): cộng điểm cho kết quả đúng cụm từ, không bắt buộc khớp
+BIGRAM_WEIGHT = 2.0
+# Tham số BM25
+K1 = 1.2
+B = 0.75
+
+# cookingTime (phút) -> bucket, khớp enum của openapi /search/recipes
+COOKING_TIME_BUCKETS = (('under_15', 0, 15), ('15_30', 15, 30), ('30_60', 30, 60), ('over_60', 60, None))
+SORTS = ('relevance', 'newest', 'most_viewed', 'most_liked', 'highest_rated')
+FACET_TAGS_LIMIT = 20
+
+# Kết quả lớn (từ rất phổ biến):
+# - chỉ chấm điểm các document nằm trong "champion list" (CHAMPION_SIZE document có impact cao nhất)
+#   của từng từ thay vì toàn bộ kết quả; với truy vấn một từ kết quả vẫn chính xác
+# - facet được đếm trên mẫu FACET_SAMPLE_SIZE document rồi nhân lại (facets.sampled = true)
+# totalItems luôn chính xác
+SCORE_LIMIT = 20000
+CHAMPION_SIZE = 2000
+FACET_SAMPLE_SIZE = 20000
+
+# Bộ lọc cũng được index như term (tiền tố \x00 không thể xuất hiện trong từ của văn bản),
+# nên lọc = giao posting list như một từ khóa
+_CATEGORY, _DIFFICULTY, _TAG, _COOKING, _RATING = '\x00c:', '\x00d:', '\x00t:', '\x00k:', '\x00r:'
+
+
+def cooking_time_bucket(minutes):
+    if minutes is None or minutes < 0:
+        return None
+    for name, low, high in COOKING_TIME_BUCKETS:
+        if minutes >= low and (high is None or minutes < high):
+            return name
+    return None
+
+
+def _bigrams(tokens):
+    return [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+def document_terms(row):
+    """Tần suất có trọng số của từng term trong một recipe (summary row có thêm ingredients)"""
+    terms = Counter()
+    title = tokenize(row.get('title'))
+    for term in title:
+        terms[term] += FIELD_WEIGHTS['title']
+    for term in _bigrams(title):
+        terms[term] += BIGRAM_WEIGHT
+    for term in tokenize(row.get('description')):
+        terms[term] += FIELD_WEIGHTS['description']
+    for tag in row.get('tags') or []:
+        for term in tokenize(tag):
+            terms[term] += FIELD_WEIGHTS['tags']
+    for ingredient in row.get('ingredients') or []:
+        name = ingredient.get('name') if isinstance(ingredient, dict) else None
+        for term in tokenize(name):
+            terms[term] += FIELD_WEIGHTS['ingredients']
+    return terms
+
+
+class SearchResult:
+    def __init__(self, total, hits, facets):
+        self.total = total
+        self.hits = hits        # [(recipe_id, score)] của trang được yêu cầu
+        self.facets = facets
+
+
+class SearchIndex:
+    """
+    Inverted index trong bộ nhớ cho recipe: term -> posting list (docid tăng dần, impact BM25)
+
+    - Mỗi recipe có một docid nội bộ tăng dần; sửa recipe = xóa (tombstone) + thêm docid mới,
+      nên posting list luôn được sắp xếp. Tombstone được dọn (compact) khi chiếm hơn 1/4 số document
+    - idf chỉ đếm document còn sống: mỗi term giữ số tombstone trong posting list của nó
+    - Impact = phần tf/độ dài của BM25, tính khi index (độ dài trung bình tại thời điểm đó);
+      điểm khi tìm = Σ idf(term) * impact
+    - Giao/hợp posting list, đếm facet và chọn top-k dùng set/dict/map/Counter để chạy ở tốc độ C
+    - Thuộc tính dùng để facet/sort được giữ trong các mảng song song theo docid
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._postings = {}            # term -> (array('I') docids, array('f') impacts)
+        self._ids = []                 # docid -> recipe id (None nếu đã xóa)
+        self._docid_of = {}            # recipe id -> docid
+        self._deleted = set()          # docid đã xóa (tombstone)
+        self._term_ids = {}            # term văn bản -> id
+        self._doc_terms = []           # docid -> array('I') id các term văn bản của document
+        self._dead = Counter()         # term id -> số tombstone trong posting list của term
+        self._lengths = array('f')
+        self._category = []
+        self._difficulty = []
+        self._tags = []                # docid -> tuple tag đã fold
+        self._tag_labels = {}          # tag đã fold -> tag hiển thị
+        self._cooking = []             # docid -> bucket cookingTime
+        self._rating = array('f')
+        self._created = array('d')
+        self._views = array('q')
+        self._favorites = array('q')
+        self._total_length = 0.0
+        self._champions = {}           # term -> (độ dài posting khi tính, [(impact, docid)] giảm dần)
+
+    def __len__(self):
+        return len(self._docid_of)
+
+    # --- Cập nhật ---
+
+    def add(self, row):
+        """Thêm hoặc thay thế một recipe (row: dict có _id, title, description, tags, ingredients, ...)"""
+        recipe_id = str(row['_id'])
+        terms = document_terms(row)
+        length = sum(terms.values())
+        tags = tuple(dict.fromkeys(fold(tag).strip() for tag in row.get('tags') or [] if tag))
+        category = row.get('category_id') or None
+        difficulty = row.get('difficulty') or None
+        cooking = row.get('cookingTime')
+        bucket = cooking_time_bucket(cooking if isinstance(cooking, (int, float)) else None)
+        rating = float(row.get('averageRating') or 0)
+        created_at = row.get('createdAt')
+
+        with self._lock:
+            self._remove(recipe_id)
+            self._maybe_compact()
+            docid = len(self._ids)
+            self._ids.append(recipe_id)
+            self._docid_of[recipe_id] = docid
+            self._lengths.append(length)
+            self._category.append(category)
+            self._difficulty.append(difficulty)
+            self._tags.append(tags)
+            for tag in row.get('tags') or []:
+                if tag:
+                    self._tag_labels.setdefault(fold(tag).strip(), tag)
+            self._cooking.append(bucket)
+            self._rating.append(rating)
+            self._created.append(created_at.timestamp() if created_at else 0.0)
+            self._views.append(int(row.get('viewsCount') or 0))
+            self._favorites.append(int(row.get('favoritesCount') or 0))
+            self._total_length += length
+
+            avg_length = self._total_length / len(self._docid_of)
+            norm = K1 * (1 - B + B * length / avg_length)
+            term_ids = self._term_ids
+            for term, weight in terms.items():
+                self._append(term, docid, weight * (K1 + 1) / (weight + norm))
+            self._doc_terms.append(array('I', (term_ids.setdefault(term, len(term_ids)) for term in terms)))
+
+            filter_terms = [_TAG + tag for tag in tags]
+            if category:
+                filter_terms.append(_CATEGORY + category)
+            if difficulty:
+                filter_terms.append(_DIFFICULTY + difficulty)
+            if bucket:
+                filter_terms.append(_COOKING + bucket)
+            filter_terms.extend(f"{_RATING}{stars}" for stars in range(1, int(rating) + 1))
+            for term in filter_terms:
+                self._append(term, docid, 0.0)
+
+    def _append(self, term, docid, impact):
+        posting = self._postings.get(term)
+        if posting is None:
+            posting = self._postings[term] = (array('I'), array('f'))
+        posting[0].append(docid)
+        posting[1].append(impact)
+
+    def remove(self, recipe_id):
+        with self._lock:
+            self._remove(str(recipe_id))
+            self._maybe_compact()
+
+    def _maybe_compact(self):
+        if len(self._deleted) > max(1000, len(self._docid_of) // 4):
+            self._compact()
+
+    def _remove(self, recipe_id):
+        docid = self._docid_of.pop(recipe_id, None)
+        if docid is None:
+            return
+        self._ids[docid] = None
+        self._deleted.add(docid)
+        self._dead.update(self._doc_terms[docid])
+        self._total_length -= self._lengths[docid]
+
+    def _compact(self):
+        """Bỏ tombstone, đánh lại docid theo đúng thứ tự cũ nên posting list vẫn được sắp xếp"""
+        keep = [docid for docid, recipe_id in enumerate(self._ids) if recipe_id is not None]
+        remap = {docid: new_docid for new_docid, docid in enumerate(keep)}
+
+        postings = {}
+        for term, (docids, impacts) in self._postings.items():
+            pairs = [(remap[d], i) for d, i in zip(docids, impacts) if d in remap]
+            if pairs:
+                postings[term] = (array('I', (d for d, _ in pairs)), array('f', (i for _, i in pairs)))
+
+        self._postings = postings
+        self._ids = [self._ids[d] for d in keep]
+        self._docid_of = {recipe_id: docid for docid, recipe_id in enumerate(self._ids)}
+        self._deleted = set()
+        self._doc_terms = [self._doc_terms[d] for d in keep]
+        self._dead = Counter()
+        self._lengths = array('f', (self._lengths[d] for d in keep))
+        self._category = [self._category[d] for d in keep]
+        self._difficulty = [self._difficulty[d] for d in keep]
+        self._tags = [self._tags[d] for d in keep]
+        self._cooking = [self._cooking[d] for d in keep]
+        self._rating = array('f', (self._rating[d] for d in keep))
+        self._created = array('d', (self._created[d] for d in keep))
+        self._views = array('q', (self._views[d] for d in keep))
+        self._favorites = array('q', (self._favorites[d] for d in keep))
+        self._champions = {}
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+    # --- Tìm kiếm ---
+
+    @staticmethod
+    def filter_terms(filters):
+        """Term tương ứng với bộ lọc {categoryId, difficulty, tags, cookingTime, minRating}"""
+        terms = []
+        if filters.get('categoryId'):
+            terms.append(_CATEGORY + filters['categoryId'])
+        if filters.get('difficulty'):
+            terms.append(_DIFFICULTY + filters['difficulty'])
+        for tag in filters.get('tags') or []:
+            terms.append(_TAG + fold(tag).strip())
+        if filters.get('cookingTime'):
+            terms.append(_COOKING + filters['cookingTime'])
+        if filters.get('minRating'):
+            # Term theo phần nguyên; phần lẻ (vd 3.5) được lọc thêm trên averageRating trong _candidates
+            terms.append(f"{_RATING}{max(1, min(5, math.floor(float(filters['minRating']))))}")
+        return terms
+
+    def _idf(self, term, docids):
+        live = len(self._docid_of)
+        df = len(docids) - self._dead[self._term_ids[term]]
+        return math.log(1 + (live - df + 0.5) / (df + 0.5))
+
+    def _candidates(self, text_terms, filter_terms, require_all, min_rating=0.0):
+        """Danh sách docid khớp (None nếu không có), đã bỏ tombstone; min_rating lẻ được so trực tiếp với averageRating"""
+        filters = [self._postings.get(term) for term in filter_terms]
+        texts = [self._postings[term] for term in text_terms if term in self._postings]
+        if any(p is None for p in filters) or not texts or (require_all and len(texts) < len(text_terms)):
+            return None
+
+        if require_all:
+            lists = sorted((p[0] for p in texts + filters), key=len)
+            if len(lists) == 1 and not self._deleted:
+                # Một từ, không lọc: chính posting list
+                return lists[0]
+            candidates = set(lists[0])
+            for docids in lists[1:]:
+                candidates.intersection_update(docids)
+        else:
+            candidates = set(chain.from_iterable(p[0] for p in texts))
+            for docids in sorted((p[0] for p in filters), key=len):
+                candidates.intersection_update(docids)
+        candidates.difference_update(self._deleted)
+        if min_rating % 1:
+            # averageRating lưu dạng float32: chừa sai số làm tròn
+            rating = self._rating
+            candidates = {docid for docid in candidates if rating[docid] >= min_rating - 1e-6}
+        return candidates
+
+    def _champion_docids(self, term):
+        """CHAMPION_SIZE docid có impact cao nhất của một term, cập nhật dần khi posting list dài thêm"""
+        docids, impacts = self._postings[term]
+        cached = self._champions.get(term)
+        if cached is None:
+            start, best = 0, []
+        elif cached[0] == len(docids):
+            return [docid for _, docid in cached[1]]
+        else:
+            start, best = cached
+        tail = zip(impacts[start:], docids[start:])
+        best = heapq.nlargest(CHAMPION_SIZE, chain(best, tail))
+        self._champions[term] = (len(docids), best)
+        return [docid for _, docid in best]
+
+    def _term_scores(self, candidates, term, exact):
+        """idf * impact của một term cho từng candidate (0 nếu candidate không chứa term)"""
+        docids, impacts = self._postings[term]
+        idf = self._idf(term, docids)
+        if candidates is docids:
+            return map(idf.__mul__, impacts)
+        if len(candidates) * 16 < len(docids):
+            # Ít candidate so với posting list: tra bằng bisect
+            scores = []
+            for docid in candidates:
+                i = bisect_left(docids, docid)
+                scores.append(idf * impacts[i] if i < len(docids) and docids[i] == docid else 0.0)
+            return scores
+        lookup = dict(zip(docids, impacts))
+        values = map(lookup.__getitem__, candidates) if exact else map(lookup.get, candidates, repeat(0.0))
+        return map(idf.__mul__, values)
+
+    def _facets(self, candidates):
+        step = -(-len(candidates) // FACET_SAMPLE_SIZE) if len(candidates) > FACET_SAMPLE_SIZE else 1
+        sample = candidates[::step]
+
+        def counts(counter, limit=None):
+            counter.pop(None, None)
+            return [{"value": k, "count": v * step} for k, v in counter.most_common(limit)]
+
+        tags = Counter(chain.from_iterable(map(self._tags.__getitem__, sample)))
+        return {
+            "categoryId": counts(Counter(map(self._category.__getitem__, sample))),
+            "difficulty": counts(Counter(map(self._difficulty.__getitem__, sample))),
+            "cookingTime": counts(Counter(map(self._cooking.__getitem__, sample))),
+            "tags": [
+                {**item, "value": self._tag_labels.get(item["value"], item["value"])}
+                for item in counts(tags, FACET_TAGS_LIMIT)
+            ],
+            "sampled": step > 1,
+        }
+
+    def _top(self, candidates, scores, sort, count):
+        """Vị trí (trong candidates) của `count` phần tử đầu theo kiểu sort"""
+        positions = range(len(candidates))
+        attribute = {
+            'newest': self._created, 'most_viewed': self._views,
+            'most_liked': self._favorites, 'highest_rated': self._rating,
+        }.get(sort)
+        if attribute is None:
+            return heapq.nlargest(count, positions, key=scores.__getitem__)
+        return heapq.nlargest(count, positions, key=lambda i: (attribute[candidates[i]], scores[i]))
+
+    def search(self, query, filters=None, sort='relevance', page=1, limit=10, with_facets=True):
+        """
+        Tìm recipe khớp tất cả từ của query (không có kết quả thì khớp bất kỳ từ nào)
+        Facet được đếm trên toàn bộ kết quả sau khi lọc (lấy mẫu nếu kết quả rất lớn)
+        """
+        tokens = tokenize(query)
+        terms = list(dict.fromkeys(tokens))
+        filter_terms = self.filter_terms(filters or {})
+        min_rating = float((filters or {}).get('minRating') or 0)
+
+        with self._lock:
+            require_all = True
+            candidates = self._candidates(terms, filter_terms, True, min_rating) if terms else None
+            if not candidates and len(terms) > 1:
+                require_all = False
+                candidates = self._candidates(terms, filter_terms, False, min_rating)
+            if not candidates:
+                return SearchResult(0, [], self._facets([]) if with_facets else None)
+
+            sort = sort if sort in SORTS else 'relevance'
+            skip = max(0, page - 1) * limit
+            matched = candidates if isinstance(candidates, array) else list(candidates)
+
+            # Nhiều kết quả: chỉ chấm điểm document thuộc champion list của các từ
+            scored = matched
+            if sort == 'relevance' and len(matched) > SCORE_LIMIT:
+                known = [term for term in terms if term in self._postings]
+                if isinstance(candidates, array):
+                    pool = self._champion_docids(known[0])
+                else:
+                    pool = list(candidates.intersection(chain.from_iterable(map(self._champion_docids, known))))
+                if len(pool) >= skip + limit:
+                    scored = pool
+
+            scores = None
+            for term in terms:
+                if term not in self._postings:
+                    continue
+                term_scores = self._term_scores(scored, term, exact=require_all)
+                scores = list(term_scores) if scores is None else list(map(add, scores, term_scores))
+            if len(tokens) > 1:
+                for bigram in dict.fromkeys(_bigrams(tokens)):
+                    if bigram in self._postings:
+                        scores = list(map(add, scores, self._term_scores(scored, bigram, exact=False)))
+
+            top = self._top(scored, scores, sort, skip + limit)[skip:]
+            ids = self._ids
+            hits = [(ids[scored[i]], round(scores[i], 4)) for i in top]
+            facets = self._facets(matched) if with_facets else None
+            return SearchResult(len(matched), hits, facets)
+
+    def stats(self):
+        with self._lock:
+            return {"documents": len(self._docid_of), "terms": len(self._postings), "tombstones": len(self._deleted)}
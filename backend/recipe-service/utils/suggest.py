@@ -0,0 +1,96 @@
+"""
+Gợi ý tìm kiếm (GET /search/suggestions) trên SuggestIndex trong bộ nhớ (utils/suggest_index.py)
+
+Nguồn gợi ý và độ phổ biến:
+- Title recipe: 1 + favoritesCount + ratingsCount + viewsCount / 100 (các recipe trùng title được cộng dồn)
+- Tag: số recipe có tag đó
+- Username và tên hiển thị của user: 1 + followersCount
+
+Recipe được cập nhật cùng search index (utils/search.py: build, sync, tạo/sửa/xóa). User được nạp từ
+user-service mỗi lần dựng lại index và cập nhật ngay khi user-service báo thay đổi
+(POST /internal/suggestions/users).
+"""
+import logging
+import threading
+
+import requests
+
+from utils.suggest_index import SuggestIndex
+
+logger = logging.getLogger(__name__)
+
+KINDS = ('recipe', 'tag', 'user')
+
+
+def recipe_weight(row):
+    return 1 + (row.get('favoritesCount') or 0) + (row.get('ratingsCount') or 0) + (row.get('viewsCount') or 0) / 100
+
+
+def recipe_contributions(row):
+    contributions = [('recipe', row.get('title') or '', recipe_weight(row))]
+    contributions.extend(('tag', tag, 1) for tag in row.get('tags') or [] if tag)
+    return contributions
+
+
+def user_contributions(user):
+    weight = 1 + (user.get('followersCount') or 0)
+    return [('user', user.get('username') or '', weight), ('user', user.get('fullName') or '', weight)]
+
+
+class Suggestions:
+    def __init__(self, iter_users):
+        self._iter_users = iter_users
+        self.index = SuggestIndex()
+        self._users = {}          # user id -> contributions, giữ lại để nạp vào index mới khi dựng lại
+        self._lock = threading.Lock()
+
+    def add_recipe(self, row, index=None):
+        (index if index is not None else self.index).update(f"recipe:{row['_id']}", recipe_contributions(row))
+
+    def remove_recipe(self, recipe_id):
+        self.index.remove(f"recipe:{recipe_id}")
+
+    def update_user(self, user):
+        contributions = user_contributions(user)
+        with self._lock:
+            self._users[str(user['id'])] = contributions
+        self.index.update(f"user:{user['id']}", contributions)
+
+    def remove_user(self, user_id):
+        with self._lock:
+            self._users.pop(str(user_id), None)
+        self.index.remove(f"user:{user_id}")
+
+    def refresh_users(self):
+        """Nạp lại toàn bộ user từ user-service, lỗi thì giữ danh sách cũ"""
+        try:
+            users = {str(user['id']): user_contributions(user) for user in self._iter_users()}
+        except (requests.RequestException, ValueError, KeyError) as e:
+            logger.warning(f"Error loading users for suggestions: {str(e)}")
+            return None
+        with self._lock:
+            self._users = users
+        return len(users)
+
+    def replace(self, index):
+        """Dùng index mới (đã nạp recipe trong bulk_load), thêm user vào rồi thay index đang dùng"""
+        with self._lock:
+            users = dict(self._users)
+        with index.bulk_load():
+            for user_id, contributions in users.items():
+                index.update(f"user:{user_id}", contributions)
+        self.index = index
+        # User thay đổi trong lúc dựng index
+        with self._lock:
+            current = dict(self._users)
+        for user_id, contributions in current.items():
+            if users.get(user_id) != contributions:
+                index.update(f"user:{user_id}", contributions)
+        for user_id in users.keys() - current.keys():
+            index.remove(f"user:{user_id}")
+
+    def suggest(self, query, limit=10, kinds=None):
+        return self.index.suggest(query, limit, kinds)
+
+    def stats(self):
+        return self.index.stats()
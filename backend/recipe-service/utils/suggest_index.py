@@ -0,0 +1,260 @@
+import heapq
+import threading
+from array import array
+from bisect import bisect_left, insort
+from contextlib import contextmanager
+
+from utils.text import fold, tokenize
+
+# Prefix khớp nhiều từ (từ CACHE_MIN_WORDS trở lên, vd "p", "tu1"): giữ sẵn top CACHE_SIZE gợi ý của prefix,
+# xóa khi một entry có từ bắt đầu bằng prefix đó thay đổi
+CACHE_MIN_WORDS = 32
+CACHE_SIZE = 50
+# Lấy thêm ứng viên rồi xếp lại (gợi ý bắt đầu đúng bằng chuỗi đang gõ được ưu tiên)
+OVERFETCH = 3
+
+
+class SuggestIndex:
+    """
+    Index gợi ý (autocomplete) trong bộ nhớ
+
+    - Mỗi gợi ý (entry) là một (kind, text) đã fold, vd ('recipe', 'pho bo'), có trọng số (độ phổ biến)
+    - Nguồn (source, vd recipe:<id>) góp trọng số vào các entry; entry trùng text được gộp và cộng trọng số,
+      entry không còn nguồn nào thì bị xóa
+    - Từ điển các từ được sắp xếp để tìm khoảng prefix bằng bisect, mỗi từ có danh sách entry
+      đã sắp theo trọng số giảm dần nên top-k chỉ cần đọc phần đầu danh sách
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._entry_of = {}       # (kind, folded text) -> eid
+        self._kind = []
+        self._text = []
+        self._key = []            # eid -> text đã fold
+        self._words = []          # eid -> tuple các từ của entry
+        self._weight = []
+        self._refs = []           # eid -> số nguồn đang góp
+        self._free = []           # eid đã xóa, dùng lại
+        self._sources = {}        # source -> [(eid, weight)]
+        self._vocab = []          # các từ, đã sắp xếp
+        self._postings = {}       # từ -> array eid theo (-weight, eid)
+        self._cache = {}          # prefix -> [eid]
+        self._bulk = False
+
+    def __len__(self):
+        return len(self._entry_of)
+
+    def _order(self, eid):
+        return -self._weight[eid], eid
+
+    # --- Cập nhật ---
+
+    def update(self, source, contributions):
+        """
+        Thay toàn bộ đóng góp của một nguồn: contributions = [(kind, text, weight)]
+        update(source, []) để xóa nguồn
+        """
+        totals = {}
+        labels = {}
+        for kind, text, weight in contributions:
+            key = (kind, ' '.join(tokenize(text)))
+            if not key[1] or weight <= 0:
+                continue
+            totals[key] = totals.get(key, 0) + weight
+            labels.setdefault(key, text.strip())
+
+        with self._lock:
+            previous = self._sources.pop(source, ())
+            for eid, weight in previous:
+                self._refs[eid] -= 1
+                self._add_weight(eid, -weight)
+            current = []
+            for key, weight in totals.items():
+                eid = self._entry_of.get(key)
+                if eid is None:
+                    eid = self._create(key, labels[key])
+                self._refs[eid] += 1
+                self._add_weight(eid, weight)
+                current.append((eid, weight))
+            if current:
+                self._sources[source] = current
+            for eid, _ in previous:
+                if self._refs[eid] == 0 and self._kind[eid] is not None:
+                    self._delete(eid)
+
+    def remove(self, source):
+        self.update(source, [])
+
+    def _create(self, key, label):
+        kind, folded = key
+        words = tuple(dict.fromkeys(folded.split()))
+        if self._free:
+            eid = self._free.pop()
+            self._kind[eid], self._text[eid], self._key[eid], self._words[eid] = kind, label, folded, words
+            self._weight[eid], self._refs[eid] = 0.0, 0
+        else:
+            eid = len(self._kind)
+            self._kind.append(kind)
+            self._text.append(label)
+            self._key.append(folded)
+            self._words.append(words)
+            self._weight.append(0.0)
+            self._refs.append(0)
+        self._entry_of[key] = eid
+        for word in words:
+            posting = self._postings.get(word)
+            if posting is None:
+                posting = self._postings[word] = array('I')
+                insort(self._vocab, word)
+            if self._bulk:
+                posting.append(eid)
+            else:
+                insort(posting, eid, key=self._order)
+        self._invalidate(words)
+        return eid
+
+    def _delete(self, eid):
+        words = self._words[eid]
+        for word in words:
+            posting = self._postings[word]
+            if self._bulk:
+                posting.remove(eid)
+            else:
+                del posting[bisect_left(posting, self._order(eid), key=self._order)]
+            if not posting:
+                del self._postings[word]
+                del self._vocab[bisect_left(self._vocab, word)]
+        del self._entry_of[(self._kind[eid], self._key[eid])]
+        self._kind[eid] = self._text[eid] = self._key[eid] = None
+        self._words[eid] = ()
+        self._free.append(eid)
+        self._invalidate(words)
+
+    def _add_weight(self, eid, delta):
+        if not delta:
+            return
+        if self._bulk:
+            self._weight[eid] += delta
+            return
+        # Đổi trọng số = lấy entry ra khỏi danh sách của từng từ rồi chèn lại đúng vị trí mới
+        postings = [self._postings[word] for word in self._words[eid]]
+        for posting in postings:
+            del posting[bisect_left(posting, self._order(eid), key=self._order)]
+        self._weight[eid] += delta
+        for posting in postings:
+            insort(posting, eid, key=self._order)
+        self._invalidate(self._words[eid])
+
+    def _invalidate(self, words):
+        if self._bulk:
+            return
+        if not self._cache:
+            return
+        for word in words:
+            for length in range(1, len(word) + 1):
+                self._cache.pop(word[:length], None)
+
+    @contextmanager
+    def bulk_load(self):
+        """Nạp nhiều nguồn một lúc: danh sách của các từ chỉ được sắp xếp một lần ở cuối"""
+        with self._lock:
+            self._bulk = True
+            try:
+                yield self
+            finally:
+                self._bulk = False
+                for word, posting in self._postings.items():
+                    self._postings[word] = array('I', sorted(posting, key=self._order))
+                self._cache.clear()
+
+    # --- Gợi ý ---
+
+    def _prefix_words(self, prefix):
+        start = bisect_left(self._vocab, prefix)
+        end = bisect_left(self._vocab, prefix + '\uffff', start)
+        return self._vocab[start:end]
+
+    def _is_wide(self, prefix):
+        start = bisect_left(self._vocab, prefix)
+        end = start + CACHE_MIN_WORDS
+        return end <= len(self._vocab) and self._vocab[end - 1].startswith(prefix)
+
+    def _stream(self, complete, prefix):
+        """eid ứng viên theo trọng số giảm dần (có thể chưa khớp hết điều kiện)"""
+        if complete:
+            postings = [self._postings.get(word) for word in complete]
+            if not all(postings):
+                return iter(())
+            return iter(min(postings, key=len))
+        words = self._prefix_words(prefix)
+        if len(words) == 1:
+            return iter(self._postings[words[0]])
+        return self._merge([self._postings[word] for word in words])
+
+    def _merge(self, postings):
+        """Gộp các danh sách đã sắp theo (-weight, eid): heap chỉ chứa phần tử đầu của mỗi danh sách"""
+        weight = self._weight
+        heap = [(-weight[posting[0]], posting[0], i, 0) for i, posting in enumerate(postings)]
+        heapq.heapify(heap)
+        while heap:
+            _, eid, i, position = heap[0]
+            yield eid
+            position += 1
+            posting = postings[i]
+            if position < len(posting):
+                heapq.heapreplace(heap, (-weight[posting[position]], posting[position], i, position))
+            else:
+                heapq.heappop(heap)
+
+    def _matches(self, complete, prefix, kinds, limit):
+        seen = set()
+        found = []
+        for eid in self._stream(complete, prefix):
+            if eid in seen:
+                continue
+            seen.add(eid)
+            if kinds and self._kind[eid] not in kinds:
+                continue
+            words = self._words[eid]
+            if complete and not complete.issubset(words):
+                continue
+            if prefix and complete and not any(word.startswith(prefix) for word in words):
+                continue
+            found.append(eid)
+            if len(found) >= limit:
+                break
+        return found
+
+    def suggest(self, query, limit=10, kinds=None):
+        """
+        Tối đa `limit` gợi ý cho chuỗi đang gõ: các từ đã gõ xong phải khớp đúng, từ cuối là prefix
+        (trừ khi chuỗi kết thúc bằng khoảng trắng). Trả về [(kind, text, weight)]
+        """
+        folded = fold(query)
+        tokens = tokenize(query)
+        if not tokens or limit <= 0:
+            return []
+        if folded[-1:].isalnum():
+            complete, prefix = set(tokens[:-1]), tokens[-1]
+        else:
+            complete, prefix = set(tokens), None
+        wanted = limit * OVERFETCH
+
+        with self._lock:
+            found = self._cache.get(prefix) if not complete and not kinds and wanted <= CACHE_SIZE else None
+            if found is not None:
+                found = found[:wanted]
+            elif not complete and not kinds and wanted <= CACHE_SIZE and self._is_wide(prefix):
+                found = self._cache[prefix] = self._matches(complete, prefix, kinds, CACHE_SIZE)
+                found = found[:wanted]
+            else:
+                found = self._matches(complete, prefix, kinds, wanted)
+
+            # Gợi ý bắt đầu bằng đúng chuỗi đang gõ lên trước, sau đó theo độ phổ biến
+            typed = ' '.join(tokens)
+            found.sort(key=lambda eid: (not self._key[eid].startswith(typed), -self._weight[eid], eid))
+            return [(self._kind[eid], self._text[eid], self._weight[eid]) for eid in found[:limit]]
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entry_of), "words": len(self._vocab), "sources": len(self._sources)}
@@ -0,0 +1,39 @@
+import re
+import unicodedata
+
+_TOKEN_RE = re.compile(r'[^\W_]+', re.UNICODE)
+
+
+def _build_fold_table():
+    """Bảng chữ có dấu -> không dấu cho str.translate (Latin + Latin Extended Additional của tiếng Việt)"""
+    table = {ord('đ'): 'd', ord('Đ'): 'd'}
+    for code in list(range(0x00C0, 0x0250)) + list(range(0x1E00, 0x1F00)):
+        char = chr(code)
+        base = ''.join(c for c in unicodedata.normalize('NFD', char) if unicodedata.category(c) != 'Mn')
+        if base and base != char:
+            table[code] = base.lower()
+    return table
+
+
+_FOLD_TABLE = _build_fold_table()
+
+
+def fold(text):
+    """
+    Chuẩn hóa để tìm kiếm: chữ thường, bỏ dấu tiếng Việt (phở -> pho, Đậu -> dau)
+    """
+    if not text:
+        return ''
+    if not unicodedata.is_normalized('NFC', text):
+        # Dấu nhập dạng tổ hợp (e + dấu sắc riêng): gộp lại trước khi tra bảng
+        text = unicodedata.normalize('NFC', text)
+    text = text.lower().translate(_FOLD_TABLE)
+    if text.isascii():
+        return text
+    # Ký tự còn dấu ngoài bảng (hiếm)
+    return ''.join(ch for ch in unicodedata.normalize('NFD', text) if unicodedata.category(ch) != 'Mn')
+
+
+def tokenize(text):
+    """Danh sách từ đã fold, theo thứ tự xuất hiện"""
+    return _TOKEN_RE.findall(fold(text))
@@ -0,0 +1,131 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+# Số giây giữa hai lần tính lại bảng xếp hạng
+TRENDING_REFRESH_SECONDS = int(os.getenv('TRENDING_REFRESH_SECONDS', 300))
+# Số recipe giữ lại cho mỗi period (limit tối đa của GET /trending/recipes)
+TRENDING_SIZE = int(os.getenv('TRENDING_SIZE', 100))
+
+# period -> (cửa sổ thời gian, half-life của điểm theo tuổi recipe)
+PERIODS = {
+    'day': (timedelta(days=1), timedelta(hours=6)),
+    'week': (timedelta(weeks=1), timedelta(days=2)),
+    'month': (timedelta(days=30), timedelta(days=7)),
+}
+DEFAULT_PERIOD = 'week'
+
+# Trọng số của từng tương tác, mỗi chỉ số lấy log để một chỉ số lớn không lấn át các chỉ số khác
+WEIGHTS = {'viewsCount': 1.0, 'favoritesCount': 3.0, 'ratingsCount': 2.0, 'commentsCount': 2.0}
+
+
+def _log1p(field):
+    return {'$ln': {'$add': [{'$ifNull': [f'${field}', 0]}, 1]}}
+
+
+def score_expression(now, half_life):
+    """
+    score = (Σ weight * ln(1 + count)) * 0.5 ^ (tuổi recipe / half_life)
+    Điểm rating được nhân thêm averageRating / 5
+    """
+    interaction = {'$add': [
+        {'$multiply': [WEIGHTS['viewsCount'], _log1p('viewsCount')]},
+        {'$multiply': [WEIGHTS['favoritesCount'], _log1p('favoritesCount')]},
+        {'$multiply': [
+            WEIGHTS['ratingsCount'], _log1p('ratingsCount'),
+            {'$divide': [{'$ifNull': ['$averageRating', 0]}, 5]}
+        ]},
+        {'$multiply': [WEIGHTS['commentsCount'], _log1p('commentsCount')]},
+    ]}
+    age_ms = {'$subtract': [now, '$createdAt']}
+    decay = {'$pow': [0.5, {'$divide': [age_ms, half_life.total_seconds() * 1000]}]}
+    return {'$multiply': [interaction, decay]}
+
+
+class TrendingLeaderboard:
+    """
+    Bảng xếp hạng trending tính sẵn cho từng period, lưu trong collection `trending_recipes`
+    (một document mỗi period: {_id: period, computedAt, items: [summary row + score]})
+
+    - refresh(): một aggregation tính điểm trên MongoDB, giữ TRENDING_SIZE recipe cao nhất
+    - Thread nền tính lại mỗi refresh_seconds; instance nào thấy bảng còn mới thì bỏ qua
+    - top(): đọc `limit` phần tử đầu bằng $slice, không quét collection recipes
+    - remove_recipe(): gỡ recipe vừa bị xóa khỏi các bảng ngay lập tức
+    """
+
+    def __init__(self, get_recipes, get_board, fields, refresh_seconds=TRENDING_REFRESH_SECONDS,
+                 size=TRENDING_SIZE):
+        self._get_recipes = get_recipes
+        self._get_board = get_board
+        self.fields = tuple(fields)
+        self.refresh_seconds = refresh_seconds
+        self.size = size
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def resolve_period(period):
+        return period if period in PERIODS else DEFAULT_PERIOD
+
+    def refresh(self, period, now=None):
+        """Tính lại bảng xếp hạng của một period, trả về số recipe trong bảng"""
+        now = now or datetime.utcnow()
+        window, half_life = PERIODS[period]
+        pipeline = [
+            {'$match': {'createdAt': {'$gte': now - window}}},
+            {'$project': {**{field: 1 for field in self.fields}, 'score': score_expression(now, half_life)}},
+            {'$sort': {'score': -1, '_id': -1}},
+            {'$limit': self.size},
+        ]
+        items = list(self._get_recipes().aggregate(pipeline))
+        self._get_board().replace_one(
+            {'_id': period}, {'_id': period, 'computedAt': now, 'items': items}, upsert=True
+        )
+        return len(items)
+
+    def refresh_all(self, force=False):
+        """Tính lại các period đã cũ hơn refresh_seconds (force: tính lại tất cả)"""
+        stale_before = datetime.utcnow() - timedelta(seconds=self.refresh_seconds)
+        fresh = set() if force else {
+            board['_id'] for board in self._get_board().find({'computedAt': {'$gt': stale_before}}, {'_id': 1})
+        }
+        for period in PERIODS:
+            if period in fresh:
+                continue
+            try:
+                count = self.refresh(period)
+                logger.info(f"Trending {period} refreshed: {count} recipes")
+            except Exception as e:
+                logger.error(f"Error refreshing trending {period}: {str(e)}")
+
+    def top(self, period, limit):
+        """`limit` recipe đầu bảng (summary row kèm score), tính ngay nếu bảng chưa có"""
+        period = self.resolve_period(period)
+        limit = max(0, min(limit, self.size))
+        board = self._get_board().find_one({'_id': period}, {'items': {'$slice': limit}})
+        if board is None:
+            self.refresh(period)
+            board = self._get_board().find_one({'_id': period}, {'items': {'$slice': limit}})
+        self.start()
+        return board['items'] if board else []
+
+    def remove_recipe(self, recipe_id):
+        """Bỏ recipe đã xóa khỏi bảng của mọi period, không đợi lần refresh tiếp theo"""
+        self._get_board().update_many({}, {'$pull': {'items': {'_id': recipe_id}}})
+
+    def start(self):
+        """Chạy thread nền tính lại bảng xếp hạng (gọi nhiều lần cũng chỉ tạo một thread)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='trending-refresh', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self.refresh_all()
+            time.sleep(self.refresh_seconds)
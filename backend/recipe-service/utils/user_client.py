@@ -0,0 +1,30 @@
+import requests
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Profile user nằm ở user-service (/users/...)
+USER_SERVICE_URL = os.getenv('USER_SERVICE_URL', 'http://localhost:8081/users')
+USER_SERVICE_TIMEOUT = float(os.getenv('USER_SERVICE_TIMEOUT', 10))
+USERNAMES_PAGE_SIZE = 1000
+
+
+def iter_usernames():
+    """
+    Tất cả user {id, username, fullName, followersCount} theo từng trang (GET /users/internal/usernames)
+    Raise requests.RequestException nếu user-service lỗi
+    """
+    after = ''
+    while True:
+        response = requests.get(
+            f"{USER_SERVICE_URL}/internal/usernames",
+            params={'after': after, 'limit': USERNAMES_PAGE_SIZE},
+            timeout=USER_SERVICE_TIMEOUT
+        )
+        response.raise_for_status()
+        users = response.json()
+        yield from users
+        if len(users) < USERNAMES_PAGE_SIZE:
+            return
+        after = users[-1]['id']
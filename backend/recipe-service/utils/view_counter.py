@@ -0,0 +1,188 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+# Ghi view xuống MongoDB mỗi VIEW_FLUSH_INTERVAL giây (<= 0: ghi ngay từng view)
+VIEW_FLUSH_INTERVAL = float(os.getenv('VIEW_FLUSH_INTERVAL', 5))
+# Số view tối đa nằm trong bộ nhớ chưa ghi = số view tối đa bị mất nếu process crash
+VIEW_MAX_PENDING = int(os.getenv('VIEW_MAX_PENDING', 1000))
+# MongoDB lỗi: view chưa ghi được giữ qua tối đa VIEW_MAX_FAILED_FLUSHES lần flush lỗi liên tiếp rồi bị bỏ
+VIEW_MAX_FAILED_FLUSHES = int(os.getenv('VIEW_MAX_FAILED_FLUSHES', 12))
+# Số giây trước khi đọc lại viewsCount từ MongoDB (view của các instance khác)
+VIEW_COUNT_TTL = float(os.getenv('VIEW_COUNT_TTL', 60))
+VIEW_COUNT_MAX_ENTRIES = int(os.getenv('VIEW_COUNT_MAX_ENTRIES', 100000))
+
+
+class ViewCounter:
+    """
+    Bộ đếm view kiểu write-behind
+
+    - add(): cộng view vào bộ nhớ và trả về số view xấp xỉ, không ghi/đọc lại MongoDB
+      (chỉ đọc viewsCount một lần khi gặp recipe lần đầu hoặc quá VIEW_COUNT_TTL)
+    - Thread nền gom các view theo recipe và ghi bằng một bulk_write $inc mỗi flush_interval
+    - Flush ngay khi số view chưa ghi đạt max_pending, và khi process thoát (atexit)
+    - Flush lỗi: chỉ giữ lại các thao tác chưa được ghi; trong lúc còn lỗi chỉ thread nền flush (request không
+      phải chờ MongoDB), sau mỗi max_failures lần lỗi liên tiếp các view đang giữ bị bỏ
+    """
+
+    def __init__(self, get_collection, field='viewsCount', flush_interval=VIEW_FLUSH_INTERVAL,
+                 max_pending=VIEW_MAX_PENDING, count_ttl=VIEW_COUNT_TTL, max_entries=VIEW_COUNT_MAX_ENTRIES,
+                 max_failures=VIEW_MAX_FAILED_FLUSHES):
+        self._get_collection = get_collection
+        self.field = field
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.count_ttl = count_ttl
+        self.max_entries = max_entries
+        self.max_failures = max(1, max_failures)
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = {}               # ObjectId -> số view chưa ghi
+        self._pending_total = 0
+        self._known = OrderedDict()      # ObjectId -> [số view xấp xỉ, thời điểm đọc từ MongoDB]
+        self._thread = None
+        self._failures = 0               # số lần flush lỗi liên tiếp
+        self.flushes = 0
+        self.flushed_views = 0
+        self.flush_errors = 0
+        self.dropped_views = 0
+
+    def add(self, recipe_id):
+        """Ghi nhận một view, trả về số view xấp xỉ hoặc None nếu recipe không tồn tại"""
+        try:
+            oid = ObjectId(recipe_id)
+        except (InvalidId, TypeError):
+            return None
+
+        with self._lock:
+            known = self._known.get(oid)
+            fresh = known is not None and time.monotonic() - known[1] < self.count_ttl
+        if not fresh and not self._load(oid):
+            return None
+
+        with self._lock:
+            self._pending[oid] = self._pending.get(oid, 0) + 1
+            self._pending_total += 1
+            entry = self._known.get(oid)
+            if entry is None:
+                # Vừa bị đẩy khỏi LRU bởi thread khác: lần sau sẽ đọc lại
+                entry = [0, 0.0]
+            entry[0] += 1
+            views = entry[0]
+            should_flush = self._pending_total >= self.max_pending or self.flush_interval <= 0
+
+        if should_flush and not self._failures:
+            self.flush()
+        else:
+            self._ensure_thread()
+        return views
+
+    def _load(self, oid):
+        """Đọc viewsCount từ MongoDB (cộng các view chưa ghi), False nếu không có recipe"""
+        doc = self._get_collection().find_one({'_id': oid}, {self.field: 1})
+        if doc is None:
+            return False
+        with self._lock:
+            self._known[oid] = [doc.get(self.field, 0) + self._pending.get(oid, 0), time.monotonic()]
+            self._known.move_to_end(oid)
+            while len(self._known) > self.max_entries:
+                self._known.popitem(last=False)
+        return True
+
+    def forget(self, recipe_id):
+        """Bỏ các view chưa ghi của một recipe (vd: recipe vừa bị xóa)"""
+        try:
+            oid = ObjectId(recipe_id)
+        except (InvalidId, TypeError):
+            return
+        with self._lock:
+            self._pending_total -= self._pending.pop(oid, 0)
+            self._known.pop(oid, None)
+
+    def flush(self):
+        """Ghi tất cả view đang chờ bằng một bulk_write, trả về số view đã ghi"""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                self._pending_total = 0
+            if not pending:
+                return 0
+
+            oids = list(pending)
+            operations = [UpdateOne({'_id': oid}, {'$inc': {self.field: pending[oid]}}) for oid in oids]
+            try:
+                self._get_collection().bulk_write(operations, ordered=False)
+            except BulkWriteError as e:
+                # ordered=False: các thao tác không nằm trong writeErrors đã được ghi
+                failed = {oids[error['index']] for error in e.details.get('writeErrors', [])}
+                flushed = self._flushed({oid: count for oid, count in pending.items() if oid not in failed})
+                if failed:
+                    self._requeue({oid: pending[oid] for oid in failed}, e)
+                return flushed
+            except Exception as e:
+                self._requeue(pending, e)
+                return 0
+            return self._flushed(pending)
+
+    def _flushed(self, written):
+        self._failures = 0
+        flushed = sum(written.values())
+        self.flushes += 1
+        self.flushed_views += flushed
+        return flushed
+
+    def _requeue(self, pending, error):
+        """Giữ lại các view chưa ghi để thử ở lần flush sau, bỏ đi sau mỗi max_failures lần lỗi liên tiếp"""
+        self._failures += 1
+        self.flush_errors += 1
+        views = sum(pending.values())
+        if self._failures % self.max_failures == 0:
+            self.dropped_views += views
+            logger.error(f"Dropped {views} views of {len(pending)} recipes after {self._failures} failed flushes: "
+                         f"{str(error)}")
+            return
+        with self._lock:
+            for oid, count in pending.items():
+                self._pending[oid] = self._pending.get(oid, 0) + count
+            self._pending_total += views
+        logger.error(f"Error flushing {len(pending)} view counters: {str(error)}")
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            if self._thread is None:
+                atexit.register(self.flush)
+            # Tạo thread khi có view đầu tiên (sau khi gunicorn fork worker)
+            self._thread = threading.Thread(target=self._run, name='view-counter-flush', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            # flush_interval <= 0 (ghi ngay từng view): thread chỉ thử lại các lần flush lỗi
+            time.sleep(self.flush_interval if self.flush_interval > 0 else 1)
+            self.flush()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "pending": self._pending_total,
+                "pendingRecipes": len(self._pending),
+                "flushes": self.flushes,
+                "flushedViews": self.flushed_views,
+                "flushErrors": self.flush_errors,
+                "droppedViews": self.dropped_views
+            }
@@ -0,0 +1,59 @@
+"""
+Keep the per-service copies of utils/metrics.py identical
+
+Every service is built from its own directory (see the Dockerfile in each
+README), so the module cannot be imported from a shared path at runtime.
+api-gateway/utils/metrics.py is the source of truth; edit it and run:
+
+    python sync_metrics.py            # copy it into every other service
+    python sync_metrics.py --check    # exit 1 if any copy has drifted
+"""
+import argparse
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE = os.path.join(BACKEND_DIR, 'api-gateway', 'utils', 'metrics.py')
+SERVICES = [
+    'ai-service',
+    'authentication-service',
+    'category-service',
+    'comment-service',
+    'health-service',
+    'media-service',
+    'recipe-service',
+    'tag-service',
+    'user-service',
+]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--check', action='store_true', help='only report copies that differ')
+    args = parser.parse_args()
+
+    with open(SOURCE, 'rb') as f:
+        source = f.read()
+
+    drifted = []
+    for service in SERVICES:
+        target = os.path.join(BACKEND_DIR, service, 'utils', 'metrics.py')
+        try:
+            with open(target, 'rb') as f:
+                current = f.read()
+        except FileNotFoundError:
+            current = None
+        if current == source:
+            continue
+        drifted.append(service)
+        if not args.check:
+            with open(target, 'wb') as f:
+                f.write(source)
+
+    for service in drifted:
+        print(f"{'drifted' if args.check else 'updated'}: {service}/utils/metrics.py")
+    return 1 if args.check and drifted else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,6 +4,7 @@ from config import config
 from extensions import init_extensions
 from routes import tag_bp
 from exceptions import register_error_handlers
+from utils import init_metrics, instrument_pymongo
 
 
 def create_app(config_name=None):
@@ -20,9 +21,13 @@ def create_app(config_name=None):
     app.config.from_object(config[config_name])
     config[config_name].init_app(app)
     
-    # Initialize extensions
+    # Initialize extensions (command timing must be registered before the MongoDB client is created)
+    instrument_pymongo()
     init_extensions(app)
     
+    # Request and DB metrics on GET /metrics
+    init_metrics(app, 'tag-service')
+    
     # Register blueprints (routes)
     app.register_blueprint(tag_bp)
     
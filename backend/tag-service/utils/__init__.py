@@ -1,3 +1,4 @@
 from .jwt_service import decode_jwt, verify_token
+from .metrics import init_metrics, instrument_pymongo
 
-__all__ = ['decode_jwt', 'verify_token']
+__all__ = ['decode_jwt', 'verify_token', 'init_metrics', 'instrument_pymongo']
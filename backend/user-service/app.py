@@ -5,6 +5,7 @@ from extensions import init_neo4j, close_neo4j
 from routes.profile_routes import profile_bp
 from routes.internal_routes import internal_bp
 from exceptions.error_handler import register_error_handlers
+from utils.metrics import init_metrics, instrument_neo4j
 import logging
 
 # Configure logging
@@ -29,7 +30,8 @@ def create_app(config_class=Config):
         }
     })
     
-    # Initialize Neo4j driver
+    # Initialize Neo4j driver (sessions are timed for /metrics)
+    instrument_neo4j()
     init_neo4j(
         uri=config_class.NEO4J_URI,
         username=config_class.NEO4J_USERNAME,
@@ -40,6 +42,9 @@ def create_app(config_class=Config):
     # Register error handlers
     register_error_handlers(app)
     
+    # Request and DB metrics on GET /metrics
+    init_metrics(app, 'user-service')
+    
     # Register blueprints
     app.register_blueprint(profile_bp)
     app.register_blueprint(internal_bp)
@@ -0,0 +1,34 @@
+import requests
+from config import Config
+from models.models import UserProfile
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class RecipeClient:
+    """HTTP Client for Recipe Service internal endpoints"""
+    
+    def __init__(self):
+        self.base_url = Config.RECIPE_SERVICE_URL
+        self.timeout = Config.RECIPE_SERVICE_TIMEOUT
+    
+    def notify_profile_changed(self, user_profile: UserProfile) -> None:
+        """
+        Update the search suggestions (username, full name) of recipe-service
+        Best effort: recipe-service also reloads all usernames periodically
+        """
+        try:
+            response = requests.post(
+                f"{self.base_url}/internal/suggestions/users",
+                json={
+                    'id': user_profile.id,
+                    'username': user_profile.username,
+                    'fullName': user_profile.full_name,
+                    'followersCount': user_profile.followers_count
+                },
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Error notifying recipe service of profile {user_profile.id}: {str(e)}")
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 from extensions import get_neo4j_driver
 from models.models import UserProfile
 import logging
@@ -94,6 +94,27 @@ class UserProfileRepository:
             return UserProfile.from_neo4j_node(record['u'])
         return None
     
+    def find_usernames(self, after: str = '', limit: int = 1000) -> List[dict]:
+        """
+        Page of {id, username, fullName, followersCount} ordered by id, starting after `after`
+        Used by recipe-service to build its search suggestions
+        """
+        with self._get_driver().session() as session:
+            return session.execute_read(self._find_usernames, after, limit)
+    
+    @staticmethod
+    def _find_usernames(tx, after: str, limit: int):
+        """Transaction function to page through usernames"""
+        query = """
+        MATCH (u:`user-profile`)
+        WHERE u.id > $after
+        RETURN u.id AS id, u.username AS username, u.fullName AS fullName, u.followersCount AS followersCount
+        ORDER BY u.id
+        LIMIT $limit
+        """
+        result = tx.run(query, after=after, limit=limit)
+        return [record.data() for record in result]
+    
     def delete_by_id(self, user_id: str) -> bool:
         """Delete user profile by ID"""
         with self._get_driver().session() as session:
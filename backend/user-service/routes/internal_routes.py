@@ -24,6 +24,17 @@ def create():
     return jsonify(user_detail.to_dict()), 201
 
 
+@internal_bp.route('/usernames', methods=['GET'])
+def list_usernames():
+    """
+    Page through {id, username, fullName, followersCount} ordered by id (internal endpoint)
+    Used by recipe-service to build its search suggestions: ?after=<last id>&limit=1000
+    """
+    after = request.args.get('after', '')
+    limit = int(request.args.get('limit', 1000))
+    return jsonify(user_profile_service.list_usernames(after, limit)), 200
+
+
 @internal_bp.route('/<username>', methods=['GET'])
 def find_by_username(username):
     """
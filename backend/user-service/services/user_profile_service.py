@@ -5,6 +5,7 @@ from dto.requests import ProfileCreationRequest, ProfileUpdationRequest
 from dto.responses import UserDetail
 from repositories.repositories import UserProfileRepository
 from clients.media_client import MediaClient
+from clients.recipe_client import RecipeClient
 from exceptions.exceptions import AppException, ErrorCode
 from config import Config
 import logging
@@ -18,6 +19,7 @@ class UserProfileService:
     def __init__(self):
         self.repository = UserProfileRepository()
         self.media_client = MediaClient()
+        self.recipe_client = RecipeClient()
         self.default_avatar = Config.DEFAULT_AVATAR
     
     def create(self, request: ProfileCreationRequest) -> UserDetail:
@@ -36,6 +38,7 @@ class UserProfileService:
         
         # Save to database
         saved_profile = self.repository.save(user_profile)
+        self.recipe_client.notify_profile_changed(saved_profile)
         
         # Convert to UserDetail response
         return UserDetail.from_user_profile(saved_profile)
@@ -69,6 +72,8 @@ class UserProfileService:
         
         # Save updated profile
         saved_profile = self.repository.save(user_profile)
+        if request.full_name is not None:
+            self.recipe_client.notify_profile_changed(saved_profile)
         
         # Convert to UserDetail response
         return UserDetail.from_user_profile(saved_profile)
@@ -109,6 +114,12 @@ class UserProfileService:
         
         return UserDetail.from_user_profile(user_profile)
     
+    def list_usernames(self, after: str = '', limit: int = 1000) -> list:
+        """
+        Page of usernames for recipe-service search suggestions
+        """
+        return self.repository.find_usernames(after, max(1, min(limit, 5000)))
+    
     def find_by_username(self, username: str) -> UserDetail:
         """
         Find user profile by username